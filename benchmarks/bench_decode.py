@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark websocket payload decoding: stdlib json + dict walking vs the fast decode path
+
+decode+handle runs each message through a monitor's event handler end to end: normalize,
+position tracking and queueing the database writes; +write also waits for the writer thread
+to commit them.
+
+Usage: python benchmarks/bench_decode.py [payloads.jsonl] [rounds]
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from hyperliquid_monitor import decoding
+from hyperliquid_monitor.dedup import FillDeduplicator
+from hyperliquid_monitor.monitor import HyperliquidMonitor
+
+DEFAULT_PAYLOADS = Path(__file__).parent / "payloads" / "user_fills.jsonl"
+ADDRESS = "0x010461c14e146ac35fe42271bdc1134ee31c703a"
+
+def run(label, messages, decode, db_path, rounds):
+    fills = sum(len(json.loads(m)["data"]["fills"]) for m in messages) * rounds
+    
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            decode(message)
+    decode_seconds = time.perf_counter() - started
+    
+    # No network needed: only the in-process handler is exercised
+    with patch("hyperliquid_monitor.monitor.Info"):
+        monitor = HyperliquidMonitor([ADDRESS], db_path=db_path, silent=True)
+    handler = monitor.create_event_handler(ADDRESS)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        # Every round re-sends the same fills, which would otherwise be dropped as duplicates
+        monitor.dedup = FillDeduplicator()
+        for message in messages:
+            handler(decode(message))
+    handle_seconds = time.perf_counter() - started
+    monitor.writer.flush()
+    total_seconds = time.perf_counter() - started
+    monitor.stop()
+    
+    print(f"{label:<22} decode {decode_seconds / fills * 1e6:7.2f} us/fill   "
+          f"decode+handle {handle_seconds / fills * 1e6:7.2f} us/fill   "
+          f"+write {total_seconds / fills * 1e6:7.2f} us/fill   "
+          f"{fills / total_seconds:>10,.0f} fills/s")
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PAYLOADS
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    messages = path.read_text().splitlines()
+    
+    print(f"{len(messages)} messages x {rounds} rounds, fast backend: {decoding.BACKEND}")
+    with tempfile.TemporaryDirectory() as tmp:
+        run("stdlib json + dicts", messages, json.loads, f"{tmp}/json.db", rounds)
+        run(f"fast ({decoding.BACKEND})", messages, decoding.decode_message, f"{tmp}/fast.db", rounds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Benchmark the import time of the package entry points used by query tools and the monitor
+
+Each statement runs in a fresh interpreter; reports the median wall time and whether the
+Hyperliquid SDK was loaded.
+
+Usage: python benchmarks/bench_import.py [runs]
+"""
+
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = [
+    "import hyperliquid_monitor",
+    "from hyperliquid_monitor import TradeDatabase",
+    "import hyperliquid_monitor.position_tracker",
+    "from hyperliquid_monitor import HyperliquidMonitor",
+]
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+{statement}
+print(time.perf_counter() - started, 'hyperliquid.info' in sys.modules)
+"""
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for statement in STATEMENTS:
+        times = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", PROBE.format(statement=statement)],
+                                    capture_output=True, text=True, check=True).stdout.split()
+            times.append(float(output[0]))
+        sdk = "loads SDK" if output[1] == "True" else "no SDK"
+        print(f"{statement:<55} {statistics.median(times) * 1000:8.1f} ms  ({sdk})")
+
+if __name__ == "__main__":
+    main()
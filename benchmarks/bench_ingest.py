@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent fill ingestion: the old global DB lock vs the batching writer
+
+Each address gets its own handler thread, as with one websocket subscription per wallet.
+"before" reproduces the old path (one lock around the fill INSERT, its commit and the
+position tracker's own commit); "after" runs the monitor's handler, which only queues the
+writes for the DatabaseWriter thread.
+
+Usage: python benchmarks/bench_ingest.py [addresses] [fills_per_address]
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from hyperliquid_monitor.database import TradeDatabase
+from hyperliquid_monitor.monitor import HyperliquidMonitor
+from hyperliquid_monitor.position_tracker import PositionTracker
+
+def make_fills(count):
+    """Alternating open/close fills so the position tracker does real work"""
+    fills = []
+    for i in range(count):
+        opening = i % 2 == 0
+        fills.append({
+            "coin": "ETH", "px": "1850.5", "sz": "0.5", "side": "B" if opening else "A",
+            "time": 1699457400000 + i * 1000, "startPosition": "0",
+            "dir": "Open Long" if opening else "Close Long",
+            "closedPnl": "0" if opening else "1.25", "hash": "0xabc", "oid": i, "tid": i,
+            "fee": "0.1", "feeToken": "USDC", "crossed": False
+        })
+    return fills
+
+def run_threads(addresses, target):
+    threads = [threading.Thread(target=target, args=(address,)) for address in addresses]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+def before(db_path, addresses, fills):
+    db = TradeDatabase(db_path)
+    tracker = PositionTracker(db_path)
+    lock = threading.Lock()
+    waits = {}
+    
+    def ingest(address):
+        waited = 0.0
+        for fill in fills:
+            record = {**fill, "address": address}
+            requested = time.perf_counter()
+            with lock:
+                waited += time.perf_counter() - requested
+                fill_id = db.store_fill(record)
+                tracker.process_fill(record, fill_id)
+        waits[address] = waited
+    
+    elapsed = run_threads(addresses, ingest)
+    db.close()
+    return elapsed, sum(waits.values())
+
+def after(db_path, addresses, fills):
+    # No network needed: only the in-process handler is exercised
+    with patch("hyperliquid_monitor.monitor.Info"):
+        monitor = HyperliquidMonitor(addresses, db_path=db_path, silent=True)
+    
+    def ingest(address):
+        handler = monitor.create_event_handler(address)
+        for fill in fills:
+            handler({"data": {"fills": [fill]}})
+    
+    started = time.perf_counter()
+    handled = run_threads(addresses, ingest)
+    monitor.writer.flush()
+    elapsed = time.perf_counter() - started
+    metrics = monitor.writer.metrics()
+    monitor.stop()
+    return elapsed, handled, metrics
+
+def main():
+    address_count = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    per_address = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    addresses = [f"0x{i:040x}" for i in range(address_count)]
+    fills = make_fills(per_address)
+    total = address_count * per_address
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{address_count} addresses x {per_address} fills")
+        elapsed, waited = before(str(Path(tmp) / "before.db"), addresses, fills)
+        print(f"before (global lock)   {total / elapsed:>10,.0f} fills/s   "
+              f"lock wait {waited:7.3f}s total, {waited / total * 1e6:8.1f} us/fill")
+        
+        elapsed, handled, metrics = after(str(Path(tmp) / "after.db"), addresses, fills)
+        print(f"after (writer thread)  {total / elapsed:>10,.0f} fills/s   "
+              f"queue wait {metrics.enqueue_wait_seconds:7.3f}s total, "
+              f"{metrics.enqueue_wait_seconds / total * 1e6:8.1f} us/fill")
+        print(f"                       handlers done in {handled:.3f}s, {metrics.batches} commits, "
+              f"avg batch {metrics.avg_batch:.1f}, max batch {metrics.max_batch}")
+
+if __name__ == "__main__":
+    main()
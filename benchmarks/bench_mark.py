@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Benchmark mark-to-market revaluation of many open positions
+
+Usage: python benchmarks/bench_mark.py [positions] [ticks]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime
+
+from hyperliquid_monitor.position_tracker import Position
+from hyperliquid_monitor.pricing import MarkToMarket, PriceCache
+
+COINS = ["BTC", "ETH", "SOL", "ARB", "DOGE", "AVAX", "OP", "SUI", "APT", "LINK"]
+
+def main():
+    position_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rng = random.Random(1)
+    
+    mtm = MarkToMarket(PriceCache(), min_interval=0)
+    for i in range(position_count):
+        mtm.on_position_change("open", Position(
+            f"0x{i % 500:040x}", rng.choice(COINS), rng.choice(["LONG", "SHORT"]),
+            rng.uniform(0.1, 10), rng.uniform(1, 100), datetime.now(), i, id=i
+        ))
+    
+    mids = {coin: rng.uniform(1, 100) for coin in COINS}
+    started = time.perf_counter()
+    for _ in range(ticks):
+        for coin in COINS:
+            mids[coin] *= rng.uniform(0.999, 1.001)
+        mtm.on_prices(mids)
+    elapsed = time.perf_counter() - started
+    
+    stats = mtm.stats()
+    print(f"{position_count} positions in {stats.pairs_revalued // stats.revaluations} (address, coin) pairs, "
+          f"{ticks} ticks of {len(COINS)} coins")
+    print(f"{elapsed / ticks * 1e6:8.1f} us/tick   {position_count * ticks / elapsed:>14,.0f} positions revalued/s")
+
+if __name__ == "__main__":
+    main()
@@ -29,7 +29,8 @@ def main():
     monitor = HyperliquidMonitor(
         addresses=addresses,
         db_path="trades.db",
-        silent=True  # No console output, only database recording
+        silent=True,  # No console output, only database recording
+        memory_report_interval=3600  # Log RSS and the top allocation sites every hour
     )
     
     try:
@@ -1,13 +1,48 @@
-from .monitor import HyperliquidMonitor
-from .types import Trade, TradeCallback, TradeType, TradeSide
-from .database import TradeDatabase, init_database
-
-__all__ = [
-    'HyperliquidMonitor',
-    'Trade',
-    'TradeCallback', 
-    'TradeType',
-    'TradeSide',
-    'TradeDatabase',
-    'init_database'
-]
\ No newline at end of file
+import logging
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Like any library, write no log output unless the application configures logging (or calls
+# log.configure_logging): without a handler, warnings would reach stderr through logging.lastResort
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+# Public names are imported on first access, so `import hyperliquid_monitor.position_tracker`
+# or `from hyperliquid_monitor import TradeDatabase` don't load the monitor and the Hyperliquid
+# SDK (websocket and signing dependencies) behind it.
+_EXPORTS = {
+    'HyperliquidMonitor': '.monitor',
+    'MultiNetworkMonitor': '.networks',
+    'Trade': '.types',
+    'TradeCallback': '.types',
+    'TradeType': '.types',
+    'TradeSide': '.types',
+    'Page': '.types',
+    'AccountEvent': '.types',
+    'TradeDatabase': '.database',
+    'init_database': '.database',
+    'OrderBook': '.order_book',
+    'OpenOrder': '.order_book',
+    'EventBus': '.bus',
+    'Subscription': '.bus'
+}
+
+if TYPE_CHECKING:
+    from .monitor import HyperliquidMonitor
+    from .networks import MultiNetworkMonitor
+    from .types import Trade, TradeCallback, TradeType, TradeSide, Page, AccountEvent
+    from .database import TradeDatabase, init_database
+    from .order_book import OrderBook, OpenOrder
+    from .bus import EventBus, Subscription
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value  # Later lookups don't go through __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+__all__ = list(_EXPORTS)
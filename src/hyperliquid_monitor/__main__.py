@@ -0,0 +1,5 @@
+import sys
+
+from hyperliquid_monitor.cli import main
+
+sys.exit(main())
@@ -0,0 +1,173 @@
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Literal, Optional, Tuple
+
+from hyperliquid_monitor.types import Trade, TradeType
+
+AlertCondition = Literal["fill_notional_above", "closed_pnl_below", "cancel_count_above"]
+
+# The only trade type each condition can match, used to build the dispatch table
+_CONDITION_TRADE_TYPES: Dict[str, TradeType] = {
+    "fill_notional_above": "FILL",
+    "closed_pnl_below": "FILL",
+    "cancel_count_above": "ORDER_CANCELLED",
+}
+
+@dataclass
+class AlertRule:
+    name: str
+    condition: AlertCondition
+    threshold: float
+    address: Optional[str] = None  # None matches every address
+    coin: Optional[str] = None  # None matches every coin
+    window_seconds: float = 10.0  # Sliding window for count conditions
+    cooldown_seconds: float = 0.0  # Minimum time between two alerts of this rule for one address
+
+    def __post_init__(self):
+        """Validate rule data after initialization"""
+        if self.condition not in _CONDITION_TRADE_TYPES:
+            raise ValueError(
+                f"Invalid condition: {self.condition}. "
+                f"Must be one of {', '.join(sorted(_CONDITION_TRADE_TYPES))}"
+            )
+
+    @property
+    def trade_type(self) -> TradeType:
+        return _CONDITION_TRADE_TYPES[self.condition]
+
+@dataclass
+class Alert:
+    rule: AlertRule
+    trade: Trade
+    value: float  # The measured value that crossed the threshold
+    message: str
+
+AlertCallback = Callable[[Alert], None]
+
+@dataclass
+class RuleMetrics:
+    evaluations: int = 0
+    fired: int = 0
+    suppressed: int = 0  # Matches swallowed by the cooldown
+    total_seconds: float = 0.0  # Time spent evaluating the rule
+
+    @property
+    def avg_evaluation_us(self) -> float:
+        return self.total_seconds / self.evaluations * 1e6 if self.evaluations else 0.0
+
+def load_rules(path: str) -> List[AlertRule]:
+    """
+    Load alert rules from a JSON file.
+
+    Args:
+        path: File containing either a list of rule objects or {"rules": [...]}.
+             Each object takes the AlertRule fields, e.g.
+             {"name": "big-eth", "condition": "fill_notional_above", "threshold": 100000, "coin": "ETH"}
+
+    Returns:
+        List[AlertRule]: The parsed rules
+    """
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("rules", [])
+    return [AlertRule(**rule) for rule in data]
+
+class AlertEngine:
+    def __init__(self,
+                 rules: List[AlertRule],
+                 callback: Optional[AlertCallback] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Compile alert rules into a dispatch table keyed by (address, coin, trade_type).
+
+        Args:
+            rules: Rules to evaluate
+            callback: Optional function called for each alert that fires
+            clock: Time source in seconds used for windows and cooldowns
+        """
+        names = [rule.name for rule in rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Alert rule names must be unique")
+
+        self.rules = list(rules)
+        self.callback = callback
+        self._clock = clock
+        self._dispatch: Dict[Tuple[Optional[str], Optional[str], str], List[AlertRule]] = {}
+        for rule in self.rules:
+            self._dispatch.setdefault((rule.address, rule.coin, rule.trade_type), []).append(rule)
+        self._metrics: Dict[str, RuleMetrics] = {rule.name: RuleMetrics() for rule in self.rules}
+        self._last_fired: Dict[Tuple[str, str], float] = {}
+        self._windows: Dict[Tuple[str, str, str], Deque[float]] = {}
+
+    def evaluate(self, trade: Trade) -> List[Alert]:
+        """Evaluate the rules that can match a trade and return the alerts that fired"""
+        dispatch = self._dispatch
+        address, coin, trade_type = trade.address, trade.coin, trade.trade_type
+        candidates = []
+        for key in ((address, coin, trade_type), (address, None, trade_type),
+                    (None, coin, trade_type), (None, None, trade_type)):
+            rules = dispatch.get(key)
+            if rules:
+                candidates.extend(rules)
+        if not candidates:
+            return []
+
+        alerts = []
+        now = self._clock()
+        for rule in candidates:
+            metrics = self._metrics[rule.name]
+            started = time.perf_counter()
+            value = self._check(rule, trade, now)
+            metrics.evaluations += 1
+            metrics.total_seconds += time.perf_counter() - started
+            if value is None:
+                continue
+
+            cooldown_key = (rule.name, address)
+            last = self._last_fired.get(cooldown_key)
+            if last is not None and now - last < rule.cooldown_seconds:
+                metrics.suppressed += 1
+                continue
+            self._last_fired[cooldown_key] = now
+            metrics.fired += 1
+
+            alert = Alert(
+                rule=rule,
+                trade=trade,
+                value=value,
+                message=f"{rule.name}: {rule.condition} {value:.2f} (threshold {rule.threshold}) "
+                        f"for {address} {coin}"
+            )
+            alerts.append(alert)
+            if self.callback:
+                self.callback(alert)
+
+        return alerts
+
+    def _check(self, rule: AlertRule, trade: Trade, now: float) -> Optional[float]:
+        """Return the measured value if the rule matches, else None"""
+        if rule.condition == "fill_notional_above":
+            notional = trade.size * trade.price
+            return notional if notional > rule.threshold else None
+
+        if rule.condition == "closed_pnl_below":
+            if not trade.position_info:
+                return None
+            pnl = trade.position_info.get('pnl') or 0.0
+            return pnl if pnl < rule.threshold else None
+
+        # cancel_count_above: sliding window of cancel times per rule, address and coin
+        window = self._windows.setdefault((rule.name, trade.address, trade.coin), deque())
+        window.append(now)
+        cutoff = now - rule.window_seconds
+        while window and window[0] <= cutoff:
+            window.popleft()
+        count = len(window)
+        return float(count) if count > rule.threshold else None
+
+    def metrics(self) -> Dict[str, RuleMetrics]:
+        """Per-rule evaluation counts, fired/suppressed alerts and evaluation cost"""
+        return dict(self._metrics)
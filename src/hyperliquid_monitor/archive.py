@@ -0,0 +1,425 @@
+import heapq
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from hyperliquid_monitor.types import DEFAULT_NETWORK
+
+logger = logging.getLogger(__name__)
+
+# Segment layout: magic, format version byte, zlib-compressed blocks of JSON rows, the
+# zlib-compressed JSON index, then the index offset and length as two little-endian uint64.
+# Each block holds up to block_rows rows of one address in (time column, id) order, and the
+# index maps every address to its blocks with their time range, so a query decompresses only
+# the blocks of the address and time range it reads.
+MAGIC = b"HLMSEG"
+VERSION = 1
+_TRAILER = struct.Struct("<QQ")
+
+# Tables moved by archive_history: name -> (time column, condition on the rows moved)
+ARCHIVED_TABLES = {
+    "fills": ("timestamp", ""),
+    "positions": ("exit_time", "status = 'CLOSED'"),
+}
+
+# Columns added to the archived tables since segments were first written, with the value they
+# read as in older segments
+_COLUMN_DEFAULTS = {"network": DEFAULT_NETWORK}
+
+class ArchiveError(ValueError):
+    """Raised when a segment file is corrupt or has an unsupported format"""
+
+@dataclass
+class ArchiveReport:
+    before: datetime
+    rows: Dict[str, int] = field(default_factory=dict)  # Rows moved per table
+    segments: List[str] = field(default_factory=list)  # Segment files written
+    bytes_written: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "before": self.before.isoformat(),
+            **{f"{table}_archived": count for table, count in self.rows.items()},
+            "segments": len(self.segments),
+            "bytes_written": self.bytes_written,
+            "seconds": round(self.seconds, 3),
+        }
+
+class Segment:
+    def __init__(self, path: str):
+        """
+        Read-only view of a segment file, memory-mapped.
+
+        Raises:
+            ArchiveError: If the file is not a valid segment
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                raise ArchiveError(f"Not an archive segment: {path}") from None
+        header = len(MAGIC) + 1
+        if len(self._map) < header + _TRAILER.size or self._map[:len(MAGIC)] != MAGIC:
+            raise ArchiveError(f"Not an archive segment: {path}")
+        if self._map[len(MAGIC)] != VERSION:
+            raise ArchiveError(f"Unsupported segment version: {self._map[len(MAGIC)]}")
+        offset, length = _TRAILER.unpack_from(self._map, len(self._map) - _TRAILER.size)
+        try:
+            index = json.loads(zlib.decompress(self._map[offset:offset + length]))
+            self.table: str = index["table"]
+            self.time_column: str = index["time_column"]
+            self.columns: List[str] = index["columns"]
+            self._blocks: Dict[str, List[list]] = index["addresses"]
+        except (zlib.error, ValueError, KeyError, TypeError) as e:
+            raise ArchiveError(f"Corrupt segment index in {path}: {e}") from None
+
+    def addresses(self) -> List[str]:
+        return list(self._blocks)
+
+    def rows(self,
+             address: str,
+             descending: bool = False,
+             low: Optional[str] = None,
+             high: Optional[str] = None) -> Iterator[list]:
+        """
+        Rows of an address in (time column, id) order, decompressing one block at a time.
+
+        Blocks entirely before low or after high (time column values) are skipped unread.
+        """
+        blocks = self._blocks.get(address, ())
+        for offset, length, _count, min_time, max_time in (reversed(blocks) if descending else blocks):
+            if (low is not None and max_time < low) or (high is not None and min_time > high):
+                continue
+            try:
+                rows = json.loads(zlib.decompress(self._map[offset:offset + length]))
+            except (zlib.error, ValueError) as e:
+                raise ArchiveError(f"Corrupt block in {self.path}: {e}") from None
+            yield from (reversed(rows) if descending else rows)
+
+    def close(self) -> None:
+        self._map.close()
+
+@lru_cache(maxsize=64)
+def _open_segment(path: str, mtime_ns: int, size: int) -> Segment:
+    return Segment(path)
+
+def open_segment(path: str) -> Segment:
+    """Open a segment, reusing the mapping of a recently opened one (segments are immutable)"""
+    stat = os.stat(path)
+    return _open_segment(path, stat.st_mtime_ns, stat.st_size)
+
+def write_segment(path: str,
+                  table: str,
+                  time_column: str,
+                  columns: List[str],
+                  rows: Iterable[tuple],
+                  block_rows: int = 1000) -> Tuple[List[int], Optional[str], Optional[str]]:
+    """
+    Write rows, ordered by (address, time column, id), to a new segment file.
+
+    The file is written under a temporary name and renamed once synced, so a segment either
+    exists complete or not at all.
+
+    Returns:
+        Tuple[List[int], Optional[str], Optional[str]]: The ids of the rows written and the
+        smallest and largest time column values
+    """
+    if block_rows < 1:
+        raise ValueError("block_rows must be at least 1")
+    address_index = columns.index("address")
+    time_index = columns.index(time_column)
+    id_index = columns.index("id")
+    ids: List[int] = []
+    blocks: Dict[str, List[list]] = {}
+    min_time = max_time = None
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + bytes([VERSION]))
+        for address, address_rows in groupby(rows, key=lambda row: row[address_index]):
+            address_blocks = blocks.setdefault(address, [])
+            block: List[tuple] = []
+            for row in address_rows:
+                block.append(row)
+                ids.append(row[id_index])
+                if len(block) == block_rows:
+                    address_blocks.append(_write_block(f, block, time_index))
+                    block = []
+            if block:
+                address_blocks.append(_write_block(f, block, time_index))
+        for address_blocks in blocks.values():
+            first, last = address_blocks[0][3], address_blocks[-1][4]
+            min_time = first if min_time is None or first < min_time else min_time
+            max_time = last if max_time is None or last > max_time else max_time
+        index = zlib.compress(json.dumps({
+            "table": table,
+            "time_column": time_column,
+            "columns": columns,
+            "addresses": blocks
+        }, separators=(",", ":")).encode(), 6)
+        offset = f.tell()
+        f.write(index)
+        f.write(_TRAILER.pack(offset, len(index)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return ids, min_time, max_time
+
+def _write_block(f, rows: List[tuple], time_index: int) -> list:
+    """Append one compressed block, returning its index entry"""
+    data = zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), 6)
+    offset = f.tell()
+    f.write(data)
+    return [offset, len(data), len(rows), rows[0][time_index], rows[-1][time_index]]
+
+def _database_dir(conn: sqlite3.Connection) -> Path:
+    for _seq, name, file in conn.execute("PRAGMA database_list"):
+        if name == "main":
+            return Path(file).parent
+    return Path.cwd()
+
+def segment_paths(conn: sqlite3.Connection, table: str) -> List[str]:
+    """Paths of the segments a table's rows were archived to, oldest first"""
+    try:
+        rows = conn.execute("SELECT path FROM archive_segments WHERE table_name = ? ORDER BY id",
+                            (table,)).fetchall()
+    except sqlite3.OperationalError:
+        return []  # Databases created before archiving existed
+    if not rows:
+        return []
+    base = _database_dir(conn)
+    return [str(base / path) for path, in rows]
+
+def archived_addresses(conn: sqlite3.Connection, table: str) -> List[str]:
+    """Addresses with rows archived from a table"""
+    addresses = set()
+    for path in segment_paths(conn, table):
+        addresses.update(open_segment(path).addresses())
+    return sorted(addresses)
+
+def _keyset(row: tuple) -> tuple:
+    return row[1], row[0]
+
+def archived_rows(conn: sqlite3.Connection,
+                  table: str,
+                  columns: str,
+                  time_column: str,
+                  filters: Dict[str, Any],
+                  start: Optional[str] = None,
+                  end: Optional[str] = None,
+                  after: Optional[Tuple[str, int]] = None,
+                  descending: bool = False) -> Optional[Iterator[tuple]]:
+    """
+    The archived rows of a history query, shaped like query.iter_rows rows.
+
+    Args:
+        conn: Connection to the database the rows were archived from
+        table, columns, time_column, filters: As in query.iter_rows
+        start: Optional inclusive lower bound, formatted like the time column
+        end: Optional exclusive upper bound, formatted like the time column
+        after: Optional (time value, id) keyset position to continue strictly after
+        descending: If True, rows come newest first
+
+    Returns:
+        Optional[Iterator[tuple]]: Rows of (id, time value, *columns) in keyset order, or None
+        if nothing was archived from the table
+    """
+    paths = segment_paths(conn, table)
+    if not paths:
+        return None
+    names = ["id", time_column] + [name.strip() for name in columns.split(",")]
+    # Bounds used to skip whole blocks: a superset of the rows wanted
+    low, high = start, end
+    if after is not None:
+        if descending:
+            high = after[0] if high is None else min(high, after[0])
+        else:
+            low = after[0] if low is None else max(low, after[0])
+
+    streams = []
+    for path in paths:
+        segment = open_segment(path)
+        positions = {name: i for i, name in enumerate(segment.columns)}
+        project = [(positions.get(name), _COLUMN_DEFAULTS.get(name)) for name in names]
+        checks = [(positions.get(column), value) for column, value in filters.items()
+                  if value is not None and (column in positions or _COLUMN_DEFAULTS.get(column) != value)]
+        address = filters.get("address")
+        addresses = [address] if address is not None else segment.addresses()
+        for address in addresses:
+            if segment.time_column == time_column:
+                rows = segment.rows(address, descending, low, high)
+            else:
+                # Blocks are ordered by another column: read the address whole and sort
+                rows = segment.rows(address)
+            stream = _select(rows, project, checks, start, end, after, descending)
+            if segment.time_column != time_column:
+                stream = iter(sorted(stream, key=_keyset, reverse=descending))
+            streams.append(stream)
+    return heapq.merge(*streams, key=_keyset, reverse=descending)
+
+def _select(rows: Iterable[list],
+            project: List[Tuple[Optional[int], Any]],
+            checks: List[Tuple[Optional[int], Any]],
+            start: Optional[str],
+            end: Optional[str],
+            after: Optional[Tuple[str, int]],
+            descending: bool) -> Iterator[tuple]:
+    """Filter segment rows and project them to (id, time value, *columns)"""
+    for row in rows:
+        if any(index is None or row[index] != value for index, value in checks):
+            continue
+        item = tuple(default if index is None else row[index] for index, default in project)
+        moment = item[1]
+        if moment is None or (start is not None and moment < start) or (end is not None and moment >= end):
+            continue
+        if after is not None and ((_keyset(item) >= after) if descending else (_keyset(item) <= after)):
+            continue
+        yield item
+
+def merge_rows(rows: Iterable[tuple], archived: Optional[Iterable[tuple]], descending: bool) -> Iterator[tuple]:
+    """
+    Merge database and archived rows, both in keyset order.
+
+    A row read from the database just before an archive run committed can also be read from the
+    new segment; the copies are adjacent in keyset order and only the first is kept.
+    """
+    if archived is None:
+        yield from rows
+        return
+    last_id = None
+    for row in heapq.merge(rows, archived, key=_keyset, reverse=descending):
+        if row[0] != last_id:
+            yield row
+        last_id = row[0]
+
+def _merge_progress(target_path: str, source_path: str) -> Tuple[Dict[str, int], List[int]]:
+    """
+    What ShardMerger has merged from a source database into a target: the high-water mark of
+    each table, and the positions it merged while open and has yet to copy the close of.
+    """
+    source = str(Path(source_path).resolve())
+    if not Path(target_path).exists():
+        return {}, []
+    conn = sqlite3.connect(Path(target_path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        marks = dict(conn.execute('''
+        SELECT table_name, last_id FROM merge_high_water WHERE source = ?
+        ''', (source,)).fetchall())
+        pending = [row[0] for row in conn.execute('''
+        SELECT source_id FROM merge_positions WHERE source = ? AND closed = 0
+        ''', (source,))]
+    except sqlite3.OperationalError:
+        return {}, []  # Nothing was ever merged into the target
+    finally:
+        conn.close()
+    return marks, pending
+
+def archive_history(db_path: str,
+                    before: datetime,
+                    archive_dir: Optional[str] = None,
+                    block_rows: int = 1000,
+                    vacuum: bool = False,
+                    merged_into: Optional[str] = None) -> ArchiveReport:
+    """
+    Move fills and closed positions older than a cutoff from the database to segment files.
+
+    Each table's rows are written to a new immutable segment, then deleted from the database in
+    the same transaction that records the segment in archive_segments, so queries see every row
+    exactly once, from one side or the other. Reads go through transparently: the history
+    queries (query.iter_rows and fetch_page, the TradeDatabase and PositionTracker history and
+    stats methods, the CLI and the query server) merge the segments in.
+
+    Safe to run next to a live monitor: rows are read without blocking the writer and the write
+    transaction only deletes rows by id. Open positions are never archived.
+
+    Args:
+        db_path: Path to the database
+        before: Rows whose time (a fill's timestamp, a position's exit time) is earlier are moved
+        archive_dir: Directory for the segment files, defaults to <database name>.archive next
+                    to the database
+        block_rows: Rows per compressed block, the unit decompressed by a query
+        vacuum: If True, VACUUM the database afterwards to return the freed pages to the OS
+        merged_into: Optional central database this one is merged into with ShardMerger. The
+                    merger only reads the live tables, so only rows it has already merged (fills
+                    and positions below its high-water marks, and positions whose close it has
+                    copied) are archived.
+
+    Returns:
+        ArchiveReport: What was moved
+    """
+    # The schema (including archive_segments) is owned by the database module, which imports
+    # the query layer and through it this module
+    from hyperliquid_monitor.database import init_database
+
+    started = time.perf_counter()
+    db_path = init_database(db_path)
+    archive_dir = Path(archive_dir) if archive_dir else Path(db_path).with_suffix(".archive")
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    cutoff = before.isoformat(" ")
+    report = ArchiveReport(before=before)
+
+    merged = _merge_progress(merged_into, db_path) if merged_into else None
+
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        for table, (time_column, condition) in ARCHIVED_TABLES.items():
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+            if not columns:
+                continue  # e.g. a database without position tracking
+            where = f"{time_column} < ?" + (f" AND {condition}" if condition else "")
+            params: List[Any] = [cutoff]
+            if merged is not None:
+                where += " AND id <= ?"
+                params.append(merged[0].get(table, 0))
+                if table == "positions" and merged[1]:
+                    where += f" AND id NOT IN ({','.join('?' * len(merged[1]))})"
+                    params.extend(merged[1])
+            path = archive_dir / f"{table}-{time.time_ns()}.seg"
+            ids, min_time, max_time = write_segment(
+                str(path), table, time_column, columns,
+                conn.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE {where} "
+                             f"ORDER BY address, {time_column}, id", params),
+                block_rows
+            )
+            if not ids:
+                path.unlink()
+                continue
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS archived_ids (id INTEGER PRIMARY KEY)")
+                conn.execute("DELETE FROM archived_ids")
+                conn.executemany("INSERT INTO archived_ids VALUES (?)", ((row_id,) for row_id in ids))
+                conn.execute(f"DELETE FROM {table} WHERE id IN (SELECT id FROM archived_ids)")
+                conn.execute('''
+                INSERT INTO archive_segments (table_name, path, rows, min_time, max_time)
+                VALUES (?, ?, ?, ?, ?)
+                ''', (table, os.path.relpath(path, Path(db_path).parent), len(ids), min_time, max_time))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                path.unlink()
+                raise
+            report.rows[table] = len(ids)
+            report.segments.append(str(path))
+            report.bytes_written += path.stat().st_size
+            logger.info("Archived %d %s rows to %s", len(ids), table, path,
+                        extra={"table": table, "rows": len(ids), "path": str(path)})
+        if vacuum and report.segments:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,207 @@
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from hyperliquid_monitor.coalesce import TokenBucket
+from hyperliquid_monitor.position_tracker import SNAPSHOT_FILL_ID, Position
+
+logger = logging.getLogger(__name__)
+
+MAINNET_API_URL = "https://api.hyperliquid.xyz"
+
+# Statuses worth retrying: rate limited, or the API momentarily unavailable
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+@dataclass
+class BootstrapStats:
+    requests: int = 0  # HTTP requests sent, retries included
+    coalesced: int = 0  # Calls answered by a request already in flight
+    retries: int = 0
+    rate_limited: int = 0  # 429 responses
+    errors: int = 0  # Calls that failed after all retries
+
+@dataclass
+class AddressSnapshot:
+    address: str
+    positions: List[Position] = field(default_factory=list)
+    open_orders: Optional[List[Dict]] = None  # None if not fetched
+    error: Optional[str] = None  # Set if either request failed; the other part may be filled in
+
+class SnapshotClient:
+    def __init__(self,
+                 base_url: str = MAINNET_API_URL,
+                 workers: int = 8,
+                 rate: float = 10.0,
+                 burst: Optional[float] = None,
+                 retries: int = 3,
+                 backoff: float = 0.5,
+                 timeout: float = 10.0,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        """
+        Concurrent client for the info endpoint, used to snapshot many addresses at startup.
+
+        Requests run on a bounded thread pool and share one token bucket, so a thousand
+        addresses never exceed `rate` requests per second. Identical requests made while one is
+        in flight share its result. 429 and 5xx responses are retried after the Retry-After
+        header, or an exponential backoff without one.
+
+        Args:
+            base_url: API URL, e.g. https://api.hyperliquid.xyz
+            workers: Maximum number of requests in flight
+            rate: Maximum requests per second
+            burst: Requests allowed at once, defaults to one second worth
+            retries: Retries per request after a retryable failure
+            backoff: Seconds before the first retry without Retry-After, doubled for each retry
+            timeout: Socket timeout per request, in seconds
+            executor: Optional thread pool to run the requests on, shared with other clients and
+                   left running by close(). workers is then its size.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.url = base_url.rstrip("/") + "/info"
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.stats = BootstrapStats()
+        self._owns_pool = executor is None
+        self._pool = executor or ThreadPoolExecutor(workers, thread_name_prefix="bootstrap")
+        self._bucket = TokenBucket(rate, burst)
+        self._bucket_lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def post(self, payload: Dict[str, Any]) -> Future:
+        """Send a request to the info endpoint, or join the identical one in flight"""
+        key = json.dumps(payload, sort_keys=True)
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats.coalesced += 1
+                return future
+            future = self._pool.submit(self._request, key)
+            self._inflight[key] = future
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _acquire(self) -> None:
+        """Wait for a token of the shared rate limit"""
+        while True:
+            with self._bucket_lock:
+                if self._bucket.try_acquire():
+                    return
+                wait = self._bucket.wait_time()
+            time.sleep(wait)
+
+    def _request(self, body: str) -> Any:
+        attempt = 0
+        while True:
+            self._acquire()
+            request = urllib.request.Request(self.url, data=body.encode(), method="POST",
+                                             headers={"Content-Type": "application/json"})
+            with self._lock:
+                self.stats.requests += 1
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                if e.code not in _RETRY_STATUSES or attempt >= self.retries:
+                    self._failed()
+                    raise
+                delay = self.backoff * 2 ** attempt
+                retry_after = e.headers.get("Retry-After") if e.headers else None
+                if retry_after is not None:
+                    try:
+                        delay = float(retry_after)
+                    except ValueError:
+                        pass
+                with self._lock:
+                    self.stats.retries += 1
+                    if e.code == 429:
+                        self.stats.rate_limited += 1
+            except (urllib.error.URLError, TimeoutError):
+                if attempt >= self.retries:
+                    self._failed()
+                    raise
+                delay = self.backoff * 2 ** attempt
+                with self._lock:
+                    self.stats.retries += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def _failed(self) -> None:
+        with self._lock:
+            self.stats.errors += 1
+
+    def clearinghouse_state(self, address: str) -> Future:
+        return self.post({"type": "clearinghouseState", "user": address})
+
+    def open_orders(self, address: str) -> Future:
+        return self.post({"type": "openOrders", "user": address})
+
+    def fetch(self, addresses: Iterable[str], orders: bool = True) -> Dict[str, AddressSnapshot]:
+        """
+        Snapshot the positions (and resting orders) of addresses concurrently.
+
+        Failures are reported per address in AddressSnapshot.error rather than raised.
+        """
+        now = datetime.now()
+        requests = {}
+        for address in dict.fromkeys(addresses):
+            requests[address] = (self.clearinghouse_state(address), self.open_orders(address) if orders else None)
+
+        snapshots = {}
+        for address, (state, open_orders) in requests.items():
+            snapshot = snapshots[address] = AddressSnapshot(address)
+            errors = []
+            try:
+                snapshot.positions = positions_from_state(address, state.result(), now)
+            except Exception as e:
+                errors.append(f"clearinghouseState: {e}")
+            if open_orders is not None:
+                try:
+                    snapshot.open_orders = open_orders.result() or []
+                except Exception as e:
+                    errors.append(f"openOrders: {e}")
+            if errors:
+                snapshot.error = "; ".join(errors)
+        return snapshots
+
+    def close(self) -> None:
+        if self._owns_pool:
+            self._pool.shutdown(wait=True)
+
+def positions_from_state(address: str, state: Dict, now: Optional[datetime] = None) -> List[Position]:
+    """
+    Convert a clearinghouseState response to open positions.
+
+    The exchange nets each coin into one position with a signed size. When it was opened isn't
+    part of the snapshot, so entry_time is the time of the snapshot.
+    """
+    now = now or datetime.now()
+    positions = []
+    for item in (state or {}).get("assetPositions", []):
+        data = item.get("position", {})
+        size = float(data.get("szi") or 0)
+        if size == 0:
+            continue
+        positions.append(Position(
+            address=address,
+            coin=data["coin"],
+            side="LONG" if size > 0 else "SHORT",
+            size=abs(size),
+            entry_price=float(data.get("entryPx") or 0),
+            entry_time=now,
+            entry_fill_id=SNAPSHOT_FILL_ID
+        ))
+    return positions
@@ -0,0 +1,209 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Deque, Dict, List, Literal, Optional, Tuple
+
+Topic = Literal["fills", "orders", "position_closes", "account_events"]
+OverflowPolicy = Literal["drop_oldest", "drop_newest", "block"]
+
+TOPICS = ("fills", "orders", "position_closes", "account_events")
+
+Handler = Callable[[Any], None]
+ErrorHandler = Callable[[str, Exception], None]
+
+@dataclass
+class SubscriberMetrics:
+    published: int = 0  # Items offered to the subscriber
+    delivered: int = 0
+    dropped: int = 0  # Items lost to the overflow policy
+    errors: int = 0  # Handler exceptions
+    queue_depth: int = 0
+    last_lag_seconds: float = 0.0  # Publish-to-delivery delay of the last item
+    max_lag_seconds: float = 0.0
+
+class Subscription:
+    def __init__(self,
+                 name: str,
+                 topic: Topic,
+                 handler: Handler,
+                 maxsize: int = 1000,
+                 overflow: OverflowPolicy = "drop_oldest",
+                 synchronous: bool = False,
+                 on_error: Optional[ErrorHandler] = None):
+        """
+        A single subscriber with its own bounded queue and delivery thread.
+
+        Args:
+            name: Name used in metrics and error reports
+            topic: Topic the subscriber receives
+            handler: Function called with each published item
+            maxsize: Maximum number of queued items
+            overflow: What to do when the queue is full: drop the oldest queued item,
+                     drop the new item, or block the publisher until there is room
+            synchronous: If True, the handler runs inline in the publishing thread
+                        and no queue or thread is used
+            on_error: Optional function called with the subscriber name and the exception
+                     when the handler raises
+        """
+        if overflow not in ("drop_oldest", "drop_newest", "block"):
+            raise ValueError(f"Invalid overflow policy: {overflow}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.name = name
+        self.topic = topic
+        self.handler = handler
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.synchronous = synchronous
+        self._on_error = on_error
+        self._metrics = SubscriberMetrics()
+        self._queue: Deque[Tuple[float, Any]] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+        if not synchronous:
+            self._thread = threading.Thread(target=self._run, name=f"bus-{name}", daemon=True)
+            self._thread.start()
+
+    def offer(self, item: Any) -> None:
+        """Hand an item to the subscriber according to its overflow policy"""
+        if self._closed:
+            return
+        if self.synchronous:
+            with self._cond:
+                self._metrics.published += 1
+            self._deliver(time.perf_counter(), item)
+            return
+
+        with self._cond:
+            if self._closed:
+                return
+            self._metrics.published += 1
+            if len(self._queue) >= self.maxsize:
+                if self.overflow == "drop_newest":
+                    self._metrics.dropped += 1
+                    return
+                if self.overflow == "drop_oldest":
+                    self._queue.popleft()
+                    self._metrics.dropped += 1
+                else:
+                    while len(self._queue) >= self.maxsize and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        return
+            self._queue.append((time.perf_counter(), item))
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                published_at, item = self._queue.popleft()
+                self._cond.notify_all()
+            self._deliver(published_at, item)
+
+    def _deliver(self, published_at: float, item: Any) -> None:
+        lag = time.perf_counter() - published_at
+        # Metrics are only changed under the lock: synchronous subscribers are delivered to from
+        # every publishing thread. The handler itself runs without it.
+        with self._cond:
+            self._metrics.last_lag_seconds = lag
+            if lag > self._metrics.max_lag_seconds:
+                self._metrics.max_lag_seconds = lag
+        try:
+            self.handler(item)
+        except Exception as e:
+            with self._cond:
+                self._metrics.errors += 1
+            if self._on_error:
+                self._on_error(self.name, e)
+        else:
+            with self._cond:
+                self._metrics.delivered += 1
+
+    @property
+    def metrics(self) -> SubscriberMetrics:
+        """A consistent snapshot of the subscriber's metrics"""
+        with self._cond:
+            self._metrics.queue_depth = len(self._queue)
+            return replace(self._metrics)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop accepting items and wait for the queued ones to be delivered"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+class EventBus:
+    def __init__(self, on_error: Optional[ErrorHandler] = None):
+        """
+        In-process publish/subscribe bus with typed topics.
+
+        Args:
+            on_error: Default error handler for subscribers that don't set their own
+        """
+        self._on_error = on_error
+        self._subscribers: Dict[str, Tuple[Subscription, ...]] = {topic: () for topic in TOPICS}
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def subscribe(self,
+                  topic: Topic,
+                  handler: Handler,
+                  name: Optional[str] = None,
+                  maxsize: int = 1000,
+                  overflow: OverflowPolicy = "drop_oldest",
+                  synchronous: bool = False,
+                  on_error: Optional[ErrorHandler] = None) -> Subscription:
+        """Subscribe a handler to a topic. See Subscription for the options."""
+        if topic not in self._subscribers:
+            raise ValueError(f"Invalid topic: {topic}. Must be one of {', '.join(TOPICS)}")
+        with self._lock:
+            self._counter += 1
+            subscription = Subscription(
+                name or f"{topic}-{self._counter}",
+                topic,
+                handler,
+                maxsize=maxsize,
+                overflow=overflow,
+                synchronous=synchronous,
+                on_error=on_error or self._on_error
+            )
+            # Copy-on-write so publish never takes the lock
+            self._subscribers[topic] = self._subscribers[topic] + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber and drain its queue"""
+        with self._lock:
+            self._subscribers[subscription.topic] = tuple(
+                s for s in self._subscribers[subscription.topic] if s is not subscription
+            )
+        subscription.close()
+
+    def publish(self, topic: Topic, item: Any) -> None:
+        """Publish an item to every subscriber of a topic"""
+        for subscription in self._subscribers[topic]:
+            subscription.offer(item)
+
+    def has_subscribers(self, topic: Topic) -> bool:
+        return bool(self._subscribers[topic])
+
+    def subscriptions(self) -> List[Subscription]:
+        return [s for subscribers in self._subscribers.values() for s in subscribers]
+
+    def metrics(self) -> Dict[str, SubscriberMetrics]:
+        """Delivery, drop, error and lag metrics per subscriber name"""
+        return {s.name: s.metrics for s in self.subscriptions()}
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Close every subscriber, delivering what is already queued. Metrics stay available."""
+        for subscription in self.subscriptions():
+            subscription.close(timeout)
@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Set
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+class LRUCache:
+    def __init__(self, maxsize: int = 256):
+        """
+        Thread-safe, size-bounded LRU cache with tag-based invalidation.
+
+        Args:
+            maxsize: Maximum number of entries; the least recently used entry is evicted first
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}  # tag -> keys
+        self._key_tags: Dict[Hashable, tuple] = {}  # key -> tags
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self._stats.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, tags: tuple = ()) -> None:
+        """Store a value; invalidating any of its tags later removes it"""
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = value
+            self._key_tags[key] = tags
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._stats.evictions += 1
+
+    def invalidate(self, tag: Hashable) -> int:
+        """Remove every entry stored with a tag and return how many were removed"""
+        with self._lock:
+            keys = self._tags.pop(tag, None)
+            if not keys:
+                return 0
+            for key in list(keys):
+                self._drop(key)
+            self._stats.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+
+    def _drop(self, key: Hashable) -> None:
+        """Remove an entry and its tag references. Caller must hold the lock."""
+        self._entries.pop(key, None)
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                invalidations=self._stats.invalidations,
+                size=len(self._entries)
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
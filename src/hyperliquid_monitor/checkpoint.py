@@ -0,0 +1,101 @@
+import json
+import os
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from hyperliquid_monitor.position_tracker import Position
+
+# File layout: magic, format version byte, zlib-compressed JSON body
+MAGIC = b"HLMCKPT"
+VERSION = 1
+
+class CheckpointError(ValueError):
+    """Raised when a checkpoint file is corrupt or has an unsupported format"""
+
+@dataclass
+class Checkpoint:
+    fill_high_water: int  # Largest fills.id committed when the checkpoint was taken
+    position_high_water: int  # Largest positions.id committed when the checkpoint was taken
+    positions: Dict[str, List[Position]] = field(default_factory=dict)  # Open positions per address
+    fills: Dict = field(default_factory=dict)  # FillDeduplicator.to_dict() of the committed fills
+    created_at: float = field(default_factory=time.time)
+
+def _position_to_list(position: Position) -> list:
+    return [position.id, position.coin, position.side, position.size, position.entry_price,
+            position.entry_time.isoformat(), position.entry_fill_id]
+
+def _position_from_list(address: str, item: list) -> Position:
+    pos_id, coin, side, size, entry_price, entry_time, entry_fill_id = item
+    return Position(address, coin, side, size, entry_price, datetime.fromisoformat(entry_time),
+                    entry_fill_id, id=pos_id)
+
+def encode_checkpoint(checkpoint: Checkpoint) -> bytes:
+    body = {
+        "fill_high_water": checkpoint.fill_high_water,
+        "position_high_water": checkpoint.position_high_water,
+        "created_at": checkpoint.created_at,
+        "positions": {
+            address: [_position_to_list(p) for p in positions]
+            for address, positions in checkpoint.positions.items()
+        },
+        "fills": checkpoint.fills
+    }
+    payload = json.dumps(body, separators=(",", ":")).encode()
+    return MAGIC + bytes([VERSION]) + zlib.compress(payload, 6)
+
+def decode_checkpoint(data: bytes) -> Checkpoint:
+    """
+    Parse checkpoint bytes written by encode_checkpoint.
+
+    Raises:
+        CheckpointError: If the data is not a valid checkpoint
+    """
+    if not data.startswith(MAGIC):
+        raise CheckpointError("Not a monitor checkpoint")
+    version = data[len(MAGIC)] if len(data) > len(MAGIC) else None
+    if version != VERSION:
+        raise CheckpointError(f"Unsupported checkpoint version: {version}")
+    try:
+        body = json.loads(zlib.decompress(data[len(MAGIC) + 1:]))
+        return Checkpoint(
+            fill_high_water=body["fill_high_water"],
+            position_high_water=body["position_high_water"],
+            positions={
+                address: [_position_from_list(address, item) for item in items]
+                for address, items in body["positions"].items()
+            },
+            fills=body["fills"],
+            created_at=body["created_at"]
+        )
+    except (zlib.error, ValueError, KeyError, TypeError) as e:
+        raise CheckpointError(f"Corrupt checkpoint: {e}") from None
+
+def write_checkpoint(path: str, checkpoint: Checkpoint) -> None:
+    """Write a checkpoint atomically: readers see either the old file or the complete new one"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(encode_checkpoint(checkpoint))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_checkpoint(path: str) -> Optional[Checkpoint]:
+    """
+    Read a checkpoint file.
+
+    Returns:
+        Optional[Checkpoint]: The checkpoint, or None if the file doesn't exist
+
+    Raises:
+        CheckpointError: If the file is not a valid checkpoint
+    """
+    try:
+        data = Path(path).read_bytes()
+    except FileNotFoundError:
+        return None
+    return decode_checkpoint(data)
@@ -0,0 +1,426 @@
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from hyperliquid_monitor.query import connect_readonly, iter_rows
+
+# Query subcommands only import the SQLite layer; the monitor and the Hyperliquid SDK behind it
+# are imported by `run` and `bench` alone, so queries start in milliseconds.
+
+# name -> (table, time column, columns after id and the time column)
+_TABLES = {
+    "fills": ("fills", "timestamp", ["address", "coin", "side", "size", "price", "direction", "tx_hash",
+                                     "fee", "fee_token", "start_position", "closed_pnl", "oid", "tid", "notional",
+                                     "net_pnl", "network"]),
+    "orders": ("orders", "timestamp", ["address", "coin", "action", "side", "size", "price", "order_id",
+                                       "network"]),
+    "positions": ("positions", "entry_time", ["address", "coin", "side", "size", "entry_price", "entry_time",
+                                              "exit_price", "exit_time", "duration_seconds", "pnl", "funding",
+                                              "notional", "fees", "net_pnl", "status", "network"]),
+    "funding": ("funding_payments", "timestamp", ["address", "coin", "usdc", "size", "funding_rate", "network"]),
+}
+
+def write_rows(rows: Iterable[Dict], fmt: str, out: TextIO) -> int:
+    """
+    Stream rows to out as JSON lines or CSV (header taken from the first row).
+
+    Returns:
+        int: Number of rows written
+    """
+    count = 0
+    writer = None
+    for row in rows:
+        if fmt == "csv":
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+        else:
+            out.write(json.dumps(row, default=str))
+            out.write("\n")
+        count += 1
+    return count
+
+def _parse_datetime(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date: {value!r} (expected ISO format)") from None
+
+def _connect(args) -> sqlite3.Connection:
+    if not Path(args.db).exists():
+        raise SystemExit(f"Database not found: {args.db}")
+    return connect_readonly(args.db)
+
+def _iter_table(conn: sqlite3.Connection, name: str, filters: Dict, start: Optional[datetime] = None,
+                end: Optional[datetime] = None, descending: bool = False,
+                time_column: Optional[str] = None) -> Iterator[Dict]:
+    """Stream a table's rows as dicts in (time column, id) order"""
+    table, default_time_column, columns = _TABLES[name]
+    time_column = time_column or default_time_column
+    keys = ["id", time_column] + columns
+    for row in iter_rows(conn, table, ", ".join(columns), time_column, filters, start, end,
+                         descending=descending, fetch_size=1000):
+        yield dict(zip(keys, row))
+
+def _cmd_positions(args, out: TextIO) -> int:
+    conn = _connect(args)
+    try:
+        if args.history:
+            rows = _iter_table(conn, "positions", {"address": args.address, "coin": args.coin, "status": "CLOSED",
+                                                   "network": args.network},
+                               args.start, args.end, descending=True, time_column="exit_time")
+        else:
+            rows = _iter_table(conn, "positions", {"address": args.address, "coin": args.coin, "status": "OPEN",
+                                                   "network": args.network})
+        write_rows(rows, args.format, out)
+    finally:
+        conn.close()
+    return 0
+
+def _cmd_stats(args, out: TextIO) -> int:
+    from hyperliquid_monitor.position_tracker import position_stats
+
+    conn = _connect(args)
+    try:
+        rows = ({"address": address, **position_stats(conn, address, args.coin, args.network)} for address in args.addresses)
+        write_rows(rows, args.format, out)
+    finally:
+        conn.close()
+    return 0
+
+def _cmd_export(args, out: TextIO) -> int:
+    conn = _connect(args)
+    try:
+        write_rows(_iter_table(conn, args.table, {"address": args.address, "coin": args.coin,
+                                                  "network": args.network},
+                               args.start, args.end), args.format, out)
+    finally:
+        conn.close()
+    return 0
+
+def _cmd_tail(args, out: TextIO) -> int:
+    """Follow fills as they are committed, by row id: each poll reads only the new rows"""
+    table, time_column, columns = _TABLES["fills"]
+    keys = ["id", time_column] + columns
+    conn = _connect(args)
+    query = f"SELECT id, {time_column}, {', '.join(columns)} FROM {table} WHERE id > ?"
+    params: List = []
+    if args.address:
+        query += " AND address = ?"
+        params.append(args.address)
+    if args.network:
+        query += " AND network = ?"
+        params.append(args.network)
+    query += " ORDER BY id LIMIT ?"
+    try:
+        last_id = args.from_id
+        if last_id is None:
+            last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+        written = 0
+        idle = 0.0
+        while args.count is None or written < args.count:
+            limit = 1000 if args.count is None else min(1000, args.count - written)
+            rows = conn.execute(query, [last_id] + params + [limit]).fetchall()
+            if rows:
+                last_id = rows[-1][0]
+                written += write_rows((dict(zip(keys, row)) for row in rows), args.format, out)
+                out.flush()
+                idle = 0.0
+                continue
+            if args.idle_timeout is not None and idle >= args.idle_timeout:
+                break
+            time.sleep(args.interval)
+            idle += args.interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+    return 0
+
+def _shard(addresses: List[str], shard: Optional[str]) -> List[str]:
+    """The addresses of shard "index/count", split by a stable hash of the address"""
+    if not shard:
+        return addresses
+    try:
+        index, count = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise SystemExit(f"Invalid shard {shard!r}, expected INDEX/COUNT") from None
+    if not 0 <= index < count:
+        raise SystemExit(f"Invalid shard {shard!r}, index must be below count")
+    return [a for a in addresses if zlib.crc32(a.lower().encode()) % count == index]
+
+def _read_addresses(args) -> List[str]:
+    addresses = list(args.addresses)
+    if args.addresses_file:
+        with open(args.addresses_file) as f:
+            addresses += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return _shard(addresses, args.shard)
+
+def _parse_api_urls(values: Optional[List[str]]) -> Dict[str, str]:
+    """NETWORK=URL pairs given with --api-url"""
+    urls = {}
+    for value in values or []:
+        network, sep, url = value.partition("=")
+        if not sep or not network or not url:
+            raise SystemExit(f"Invalid API URL {value!r}, expected NETWORK=URL")
+        urls[network] = url
+    return urls
+
+def _cmd_run(args, out: TextIO) -> int:
+    from hyperliquid_monitor.log import configure_logging
+    from hyperliquid_monitor.monitor import HyperliquidMonitor
+    from hyperliquid_monitor.networks import MultiNetworkMonitor
+
+    configure_logging(args.log_level, json_format=not args.plain_logs)
+    addresses = _read_addresses(args)
+    if not addresses:
+        raise SystemExit("No addresses to monitor")
+    networks = list(dict.fromkeys(args.network or ["mainnet"]))
+    api_urls = _parse_api_urls(args.api_url)
+
+    def print_trade(trade) -> None:
+        write_rows([vars(trade)], "json", out)
+        out.flush()
+
+    options = dict(
+        db_path=args.db,
+        callback=None if args.quiet else print_trade,
+        silent=args.quiet,
+        checkpoint_path=args.checkpoint,
+        mark_to_market=args.mark_to_market,
+        coalesce_window=args.coalesce_window,
+        write_batch_size=args.batch_size,
+        memory_report_interval=args.memory_report,
+        profile_dir=args.profile_dir,
+        bootstrap=args.bootstrap
+    )
+    try:
+        if len(networks) == 1:
+            monitor = HyperliquidMonitor(addresses=addresses, network=networks[0],
+                                         api_url=api_urls.get(networks[0]), **options)
+        else:
+            if args.serve is not None:
+                raise SystemExit("--serve supports a single network")
+            monitor = MultiNetworkMonitor({network: addresses for network in networks}, api_urls=api_urls,
+                                          **options)
+    except ValueError as e:
+        raise SystemExit(str(e)) from None
+    if args.serve is not None:
+        monitor.serve(port=args.serve)
+    try:
+        monitor.start()
+    except KeyboardInterrupt:
+        monitor.stop()
+    return 0
+
+def _cmd_bench(args, out: TextIO) -> int:
+    """Ingest synthetic fills through the monitor's write path, then read them back"""
+    from hyperliquid_monitor.monitor import HyperliquidMonitor
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        addresses = [f"0x{i:040x}" for i in range(args.addresses)]
+        # Only the write path is measured: the SDK client is never created, so there's no network I/O
+        monitor = HyperliquidMonitor(addresses, db_path=db_path, silent=True, write_batch_size=args.batch_size)
+        handlers = [monitor.create_event_handler(address) for address in addresses]
+        base_time = int(time.time() * 1000)
+
+        started = time.perf_counter()
+        for i in range(args.fills):
+            handlers[i % len(handlers)]({"data": {"fills": [{
+                "coin": "ETH", "px": "1850.5", "sz": "0.5", "side": "B", "time": base_time + i,
+                "dir": "Open Long" if (i // len(handlers)) % 2 == 0 else "Close Long",
+                "closedPnl": "0", "hash": f"0x{i:x}", "oid": i, "tid": i, "fee": "0.1", "feeToken": "USDC"
+            }]}})
+        monitor.writer.flush()
+        ingest_seconds = time.perf_counter() - started
+        monitor.stop()
+
+        conn = connect_readonly(db_path)
+        started = time.perf_counter()
+        exported = sum(1 for _ in _iter_table(conn, "fills", {}))
+        export_seconds = time.perf_counter() - started
+        conn.close()
+
+    write_rows([{
+        "fills": args.fills,
+        "addresses": args.addresses,
+        "ingest_fills_per_second": round(args.fills / ingest_seconds),
+        "export_rows_per_second": round(exported / export_seconds),
+    }], args.format, out)
+    return 0
+
+def _cmd_replay(args, out: TextIO) -> int:
+    """Replay recorded or exported fills into a new database and report the throughput"""
+    from hyperliquid_monitor.alerts import load_rules
+    from hyperliquid_monitor.replay import replay
+
+    if bool(args.source_db) == bool(args.files):
+        raise SystemExit("Specify either --from-db or exported files to replay")
+    if args.source_db and not Path(args.source_db).exists():
+        raise SystemExit(f"Database not found: {args.source_db}")
+    try:
+        report = replay(
+            args.db,
+            source_db=args.source_db,
+            files=args.files or None,
+            addresses=args.address or None,
+            workers=args.workers,
+            alert_rules=load_rules(args.rules) if args.rules else None,
+            start=args.start,
+            end=args.end,
+            network=args.network,
+            fresh=args.fresh
+        )
+    except ValueError as e:
+        raise SystemExit(str(e)) from None
+    write_rows([report.to_dict()], args.format, out)
+    return 0
+
+def _cmd_archive(args, out: TextIO) -> int:
+    """Move old fills and closed positions to compressed segment files"""
+    from hyperliquid_monitor.archive import archive_history
+
+    if not Path(args.db).exists():
+        raise SystemExit(f"Database not found: {args.db}")
+    if (args.before is None) == (args.older_than is None):
+        raise SystemExit("Specify either --before or --older-than")
+    before = args.before or datetime.now() - timedelta(days=args.older_than)
+    report = archive_history(args.db, before, archive_dir=args.dir, vacuum=args.vacuum, merged_into=args.merged_into)
+    write_rows([report.to_dict()], args.format, out)
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="hyperliquid-monitor",
+                                     description="Monitor Hyperliquid addresses and query the recorded history")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_db(p):
+        p.add_argument("--db", default="trades.db", help="SQLite database path (default: trades.db)")
+
+    def add_format(p):
+        p.add_argument("--format", choices=("json", "csv"), default="json",
+                       help="Output format: JSON lines or CSV (default: json)")
+
+    def add_network(p):
+        p.add_argument("--network", help="Only this network, e.g. mainnet or testnet (default: all)")
+
+    def add_range(p):
+        p.add_argument("--start", type=_parse_datetime, help="Inclusive ISO start time")
+        p.add_argument("--end", type=_parse_datetime, help="Exclusive ISO end time")
+
+    run = subparsers.add_parser("run", help="Monitor addresses and record their activity")
+    run.add_argument("addresses", nargs="*", help="Addresses to monitor")
+    run.add_argument("--addresses-file", help="File with one address per line")
+    run.add_argument("--shard", help="Only monitor shard INDEX/COUNT of the addresses, e.g. 0/4")
+    run.add_argument("--db", default="trades.db", help="SQLite database path (default: trades.db)")
+    run.add_argument("--network", action="append",
+                     help="Network to monitor the addresses on: mainnet, testnet, local or one given with "
+                          "--api-url (repeatable, default: mainnet)")
+    run.add_argument("--api-url", action="append", metavar="NETWORK=URL", help="API URL of a network (repeatable)")
+    run.add_argument("--batch-size", type=int, default=500, help="Writes committed per transaction")
+    run.add_argument("--coalesce-window", type=float, help="Merge fills of one order within this many seconds")
+    run.add_argument("--checkpoint", help="Checkpoint file for warm restarts")
+    run.add_argument("--mark-to-market", action="store_true", help="Track unrealized PnL from live prices")
+    run.add_argument("--serve", type=int, metavar="PORT", help="Start the query server on this port")
+    run.add_argument("--memory-report", type=float, metavar="SECONDS",
+                     help="Log RSS and the top allocation sites at this interval")
+    run.add_argument("--profile-dir", help="Write a sampling profile here on SIGUSR1")
+    run.add_argument("--bootstrap", action="store_true",
+                     help="Snapshot positions opened before monitoring began on start")
+    run.add_argument("--quiet", action="store_true", help="Record only, don't print trades")
+    run.add_argument("--log-level", default="INFO")
+    run.add_argument("--plain-logs", action="store_true", help="Plain text logs instead of JSON lines")
+    run.set_defaults(handler=_cmd_run)
+
+    positions = subparsers.add_parser("positions", help="Open (or with --history, closed) positions")
+    positions.add_argument("address")
+    positions.add_argument("--coin")
+    positions.add_argument("--history", action="store_true", help="Closed positions, most recent first")
+    add_network(positions)
+    add_range(positions)
+    add_db(positions)
+    add_format(positions)
+    positions.set_defaults(handler=_cmd_positions)
+
+    stats = subparsers.add_parser("stats", help="PnL, funding and win rate of closed positions")
+    stats.add_argument("addresses", nargs="+")
+    stats.add_argument("--coin")
+    add_network(stats)
+    add_db(stats)
+    add_format(stats)
+    stats.set_defaults(handler=_cmd_stats)
+
+    export = subparsers.add_parser("export", help="Stream a table in time order")
+    export.add_argument("table", choices=sorted(_TABLES))
+    export.add_argument("--address")
+    export.add_argument("--coin")
+    add_network(export)
+    add_range(export)
+    add_db(export)
+    add_format(export)
+    export.set_defaults(handler=_cmd_export)
+
+    tail = subparsers.add_parser("tail", help="Follow new fills as they are recorded")
+    tail.add_argument("--address")
+    add_network(tail)
+    tail.add_argument("--from-id", type=int, help="Start after this fill id (default: only new fills)")
+    tail.add_argument("--interval", type=float, default=0.5, help="Seconds between polls when idle")
+    tail.add_argument("--count", type=int, help="Exit after this many fills")
+    tail.add_argument("--idle-timeout", type=float, help="Exit after this many seconds without new fills")
+    add_db(tail)
+    add_format(tail)
+    tail.set_defaults(handler=_cmd_tail)
+
+    replay = subparsers.add_parser("replay", help="Replay historical fills through positions and alert rules")
+    replay.add_argument("files", nargs="*", help="Fill files exported with `export fills` (JSON lines or .csv)")
+    replay.add_argument("--from-db", dest="source_db", help="Replay the fills of this database instead")
+    replay.add_argument("--db", default="replay.db", help="Database the replay is written to (default: replay.db)")
+    replay.add_argument("--address", action="append", help="Only replay this address (repeatable)")
+    replay.add_argument("--workers", type=int, default=1, help="Worker processes, addresses are split between them")
+    replay.add_argument("--rules", help="JSON file of alert rules to evaluate")
+    replay.add_argument("--fresh", action="store_true", help="Delete the replay database first if it already exists")
+    add_network(replay)
+    add_range(replay)
+    add_format(replay)
+    replay.set_defaults(handler=_cmd_replay)
+
+    archive = subparsers.add_parser("archive", help="Move old fills and closed positions to compressed segments")
+    archive.add_argument("--before", type=_parse_datetime, help="Archive rows older than this ISO time")
+    archive.add_argument("--older-than", type=float, metavar="DAYS", help="Archive rows older than this many days")
+    archive.add_argument("--dir", help="Segment directory (default: <database name>.archive next to it)")
+    archive.add_argument("--vacuum", action="store_true", help="VACUUM the database afterwards to shrink the file")
+    archive.add_argument("--merged-into", metavar="DB",
+                         help="Central database this one is merged into: only archive rows already merged")
+    add_db(archive)
+    add_format(archive)
+    archive.set_defaults(handler=_cmd_archive)
+
+    bench = subparsers.add_parser("bench", help="Measure ingest and export throughput on a temporary database")
+    bench.add_argument("--fills", type=int, default=20000)
+    bench.add_argument("--addresses", type=int, default=10)
+    bench.add_argument("--batch-size", type=int, default=500)
+    add_format(bench)
+    bench.set_defaults(handler=_cmd_bench)
+    return parser
+
+def main(argv: Optional[List[str]] = None, out: Optional[TextIO] = None) -> int:
+    args = build_parser().parse_args(argv)
+    out = out or sys.stdout
+    try:
+        return args.handler(args, out)
+    except BrokenPipeError:
+        # Output piped into `head` and the like
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from itertools import count
+from typing import Callable, Dict, List, Optional
+
+from hyperliquid_monitor.types import Trade, TradeCallback
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Token bucket rate limiter. Not thread-safe; callers serialize access.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity, defaults to one second worth of tokens (at least 1)
+            clock: Time source, injectable for tests
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        if self.burst < 1:
+            raise ValueError("burst must be at least 1")
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available"""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available"""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+@dataclass
+class CoalescerStats:
+    received: int = 0  # Trades added
+    emitted: int = 0  # Trades passed to the callback
+    merged: int = 0  # Fills folded into an earlier fill of the same group
+    deferred: int = 0  # Groups held back by an address's rate limit
+    dropped: int = 0  # Oldest pending groups discarded to stay within max_pending
+
+class _Group:
+    """Fills of one order or transaction, aggregated while the coalescing window is open"""
+    __slots__ = ("first", "last", "size", "notional", "fee", "closed_pnl", "count", "due", "deferred")
+
+    def __init__(self, trade: Trade, due: float):
+        self.first = self.last = trade
+        self.size = trade.size
+        self.notional = trade.size * trade.price
+        self.fee = trade.fee
+        self.closed_pnl = trade.closed_pnl
+        self.count = 1
+        self.due = due
+        self.deferred = False
+
+    def merge(self, trade: Trade) -> None:
+        self.last = trade
+        self.size += trade.size
+        self.notional += trade.size * trade.price
+        if trade.fee is not None:
+            self.fee = (self.fee or 0.0) + trade.fee
+        if trade.closed_pnl is not None:
+            self.closed_pnl = (self.closed_pnl or 0.0) + trade.closed_pnl
+        self.count += 1
+
+    def trade(self) -> Trade:
+        if self.count == 1:
+            return self.first
+        return replace(
+            self.first,
+            size=self.size,
+            price=self.notional / self.size if self.size else self.last.price,
+            fee=self.fee,
+            closed_pnl=self.closed_pnl,
+            position_duration=self.last.position_duration or self.first.position_duration,
+            position_info=self.last.position_info or self.first.position_info,
+            fill_count=self.count
+        )
+
+class FillCoalescer:
+    def __init__(self,
+                 emit: TradeCallback,
+                 window: float = 0.05,
+                 rate: Optional[float] = None,
+                 burst: Optional[float] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 autostart: bool = True,
+                 max_pending: Optional[int] = None):
+        """
+        Merges bursts of fills before they reach a callback, and rate limits it per address.
+
+        Fills of the same address, coin and side that share an order id or transaction hash and
+        arrive within `window` seconds of the group's first fill are emitted as one Trade: summed
+        size, fee and closed PnL at the volume-weighted average price, with `fill_count` set.
+        Other trades (order placements and cancels) are passed through unmerged.
+
+        With a rate, each address gets a token bucket: groups that are due while the address is
+        over its limit stay pending, keep absorbing fills of their order, and are emitted as soon
+        as a token is available. Nothing is dropped unless max_pending groups are waiting, in
+        which case the oldest is discarded for each new one.
+
+        Args:
+            emit: Function called with each (aggregated) trade, from the coalescer's thread
+            window: Seconds a group stays open after its first fill
+            rate: Optional maximum trades per second emitted per address
+            burst: Number of trades an address may emit at once, defaults to one second worth
+            on_error: Optional function called with exceptions raised by emit
+            clock: Time source, injectable for tests
+            autostart: If False, no background thread is started and flush() must be called
+            max_pending: Optional maximum number of groups waiting to be emitted
+        """
+        if window < 0:
+            raise ValueError("window must not be negative")
+        if max_pending is not None and max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self._emit = emit
+        self.window = window
+        self.rate = rate
+        self.burst = burst
+        self._on_error = on_error
+        self._clock = clock
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[tuple, _Group]" = OrderedDict()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._sequence = count()
+        self._stats = CoalescerStats()
+        self._lock = threading.Lock()
+        self._emit_lock = threading.Lock()  # Keeps emitted trades in order across flushers
+        self._wakeup = threading.Event()
+        # When the last flush() found the next pending group due, None if nothing was pending:
+        # the thread sleeps until then unless a group due earlier arrives
+        self._next_due: Optional[float] = None
+        self._closed = False
+        self._thread = None
+        if autostart:
+            self._thread = threading.Thread(target=self._run, name="fill-coalescer", daemon=True)
+            self._thread.start()
+
+    def _key(self, trade: Trade) -> tuple:
+        if trade.trade_type == "FILL":
+            group = trade.order_id if trade.order_id is not None else trade.tx_hash
+            if group is not None:
+                return (trade.address, trade.coin, trade.side, group)
+        return (trade.address, None, None, next(self._sequence))
+
+    def add(self, trade: Trade) -> None:
+        """Queue a trade (bus subscriber)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._stats.received += 1
+            key = self._key(trade)
+            group = self._pending.get(key)
+            if group is not None:
+                group.merge(trade)
+                self._stats.merged += 1
+                return
+            if self.max_pending is not None and len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)
+                self._stats.dropped += 1
+            group = self._pending[key] = _Group(trade, self._clock() + self.window)
+            # Another address's group may hold the thread in a long rate limit wait
+            wake = self._next_due is None or group.due < self._next_due
+        if wake:
+            self._wakeup.set()
+
+    def _bucket(self, address: str) -> Optional[TokenBucket]:
+        if self.rate is None:
+            return None
+        bucket = self._buckets.get(address)
+        if bucket is None:
+            bucket = self._buckets[address] = TokenBucket(self.rate, self.burst, self._clock)
+        return bucket
+
+    def flush(self, force: bool = False) -> Optional[float]:
+        """
+        Emit the groups whose window has elapsed, as far as the rate limits allow.
+
+        Args:
+            force: Emit every pending group now, ignoring windows and rate limits
+
+        Returns:
+            Optional[float]: Seconds until the next pending group can be emitted, None if
+            nothing is pending
+        """
+        with self._emit_lock:
+            ready: List[_Group] = []
+            next_wait = None
+            with self._lock:
+                now = self._clock()
+                for key, group in list(self._pending.items()):
+                    if not force and group.due > now:
+                        wait = group.due - now
+                    else:
+                        bucket = None if force else self._bucket(group.first.address)
+                        if bucket is None or bucket.try_acquire():
+                            del self._pending[key]
+                            ready.append(group)
+                            continue
+                        if not group.deferred:
+                            group.deferred = True
+                            self._stats.deferred += 1
+                        wait = bucket.wait_time()
+                    next_wait = wait if next_wait is None else min(next_wait, wait)
+                self._stats.emitted += len(ready)
+                self._next_due = None if next_wait is None else now + next_wait
+
+            for group in ready:
+                try:
+                    self._emit(group.trade())
+                except Exception as e:
+                    if self._on_error:
+                        self._on_error(e)
+            return next_wait
+
+    def _run(self) -> None:
+        timeout = None
+        while True:
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            if self._closed:
+                return
+            timeout = self.flush()
+
+    def stats(self) -> CoalescerStats:
+        with self._lock:
+            return replace(self._stats)
+
+    def close(self) -> None:
+        """Stop accepting trades and emit everything still pending"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+        self.flush(force=True)
@@ -9,4 +9,7 @@ load_dotenv()
 ADDRESSES = [addr.strip() for addr in os.getenv("MONITORED_ADDRESSES", "").split(",") if addr.strip()]
 
 # Initialize database and get path
-DB_PATH = init_database(os.getenv("DB_PATH", "trades.db"))
\ No newline at end of file
+DB_PATH = init_database(os.getenv("DB_PATH", "trades.db"))
+
+# Optional alert rules file (JSON), read with alerts.load_rules()
+ALERT_RULES_PATH = os.getenv("ALERT_RULES_PATH")
\ No newline at end of file
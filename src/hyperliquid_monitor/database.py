@@ -1,9 +1,80 @@
+import heapq
+import json
+import logging
 import sqlite3
 import threading
 import os
 from datetime import datetime
+from itertools import chain
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from hyperliquid_monitor.archive import archived_rows
+from hyperliquid_monitor.decoding import FillRecord, OrderUpdateRecord, as_fill_record, as_order_update_record
+from hyperliquid_monitor.query import fetch_page, iter_rows
+from hyperliquid_monitor.types import DEFAULT_NETWORK, Page
+
+logger = logging.getLogger(__name__)
+
+# Order lifecycle states tracked in the order_states table
+ORDER_OPEN = "OPEN"
+ORDER_PARTIALLY_FILLED = "PARTIALLY_FILLED"
+ORDER_FILLED = "FILLED"
+ORDER_CANCELED = "CANCELED"
+
+# Tolerance used when comparing filled size against the placed size
+_SIZE_EPSILON = 1e-9
+
+# Columns following (id, timestamp) in history queries, in the order the row converters expect
+_FILL_COLUMNS = ("address, coin, side, size, price, direction, tx_hash, fee, fee_token, "
+                 "start_position, closed_pnl, oid, tid, notional, net_pnl, network")
+_ORDER_COLUMNS = "address, coin, action, side, size, price, order_id, network"
+
+# Type of the network column; rows recorded before networks were tracked are mainnet's
+NETWORK_COLUMN = f"TEXT NOT NULL DEFAULT '{DEFAULT_NETWORK}'"
+
+def _ensure_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]) -> List[str]:
+    """
+    Add any missing columns to an existing table (lightweight schema migration).
+
+    Returns:
+        List[str]: The columns added, so derived columns can be backfilled once
+    """
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    added = []
+    for name, column_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+            logger.info("Added column %s.%s", table, name)
+            added.append(name)
+    return added
+
+def _create_network_keyed_table(cursor: sqlite3.Cursor, table: str, create_sql: str) -> None:
+    """
+    Create a table whose key or UNIQUE constraint includes the network column.
+
+    A table created before networks were tracked is rebuilt with the new schema and its rows
+    copied over, as SQLite can't alter a constraint in place.
+    """
+    cursor.execute(create_sql)
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = [row[1] for row in cursor.fetchall()]
+    if "network" in columns:
+        return
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+    cursor.execute(create_sql)
+    names = ", ".join(columns)
+    cursor.execute(f"INSERT INTO {table} ({names}) SELECT {names} FROM {table}_old")
+    cursor.execute(f"DROP TABLE {table}_old")  # Its indexes go with it and are recreated below
+    logger.info("Rebuilt table %s with a network column", table)
+
+def _network_clause(network: Optional[str], params: list) -> str:
+    """SQL condition restricting a query to one network (appending its parameter), or nothing for all"""
+    if network is None:
+        return ""
+    params.append(network)
+    return " AND network = ?"
 
 def init_database(db_path: Optional[str] = None) -> str:
     """
@@ -53,6 +124,19 @@ def init_database(db_path: Optional[str] = None) -> str:
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
         )
         ''')
+        
+        # Databases created before oid/tid were recorded get the columns appended
+        _ensure_columns(cursor, "fills", {"oid": "INTEGER", "tid": "INTEGER"})
+        # Derived at ingest so reports can sort and filter on them through an index:
+        # notional = size * price, net_pnl = closed_pnl - fee
+        added = _ensure_columns(cursor, "fills", {"notional": "REAL", "net_pnl": "REAL"})
+        if added and cursor.execute("SELECT 1 FROM fills LIMIT 1").fetchone():
+            cursor.execute('''
+            UPDATE fills SET notional = size * price, net_pnl = COALESCE(closed_pnl, 0) - COALESCE(fee, 0)
+            ''')
+            logger.info("Backfilled notional and net_pnl of %d fills", cursor.rowcount)
+        # Network the row was recorded from, so several networks can share a database
+        _ensure_columns(cursor, "fills", {"network": NETWORK_COLUMN})
 
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS orders (
@@ -68,6 +152,85 @@ def init_database(db_path: Optional[str] = None) -> str:
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
         )
         ''')
+        _ensure_columns(cursor, "orders", {"network": NETWORK_COLUMN})
+        
+        # One row per order, updated incrementally as placements, fills and cancels arrive
+        _create_network_keyed_table(cursor, "order_states", f'''
+        CREATE TABLE IF NOT EXISTS order_states (
+            network {NETWORK_COLUMN},
+            address TEXT NOT NULL,
+            oid INTEGER NOT NULL,
+            coin TEXT,
+            side TEXT,
+            size REAL,  -- placed size, NULL if the order was never seen resting
+            price REAL,
+            filled_size REAL NOT NULL DEFAULT 0,
+            status TEXT NOT NULL,  -- 'OPEN', 'PARTIALLY_FILLED', 'FILLED' or 'CANCELED'
+            placed_time DATETIME,
+            first_fill_time DATETIME,
+            last_fill_time DATETIME,
+            canceled_time DATETIME,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (network, address, oid)
+        )
+        ''')
+        
+        # Account events that aren't fills; the UNIQUE constraints dedup re-sent events
+        _create_network_keyed_table(cursor, "funding_payments", f'''
+        CREATE TABLE IF NOT EXISTS funding_payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME,
+            network {NETWORK_COLUMN},
+            address TEXT NOT NULL,
+            coin TEXT NOT NULL,
+            usdc REAL,  -- Signed: negative when the address paid funding
+            size REAL,  -- Signed position size the funding was charged on
+            funding_rate REAL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (network, address, coin, timestamp)
+        )
+        ''')
+        _create_network_keyed_table(cursor, "liquidations", f'''
+        CREATE TABLE IF NOT EXISTS liquidations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME,
+            network {NETWORK_COLUMN},
+            address TEXT NOT NULL,
+            lid INTEGER NOT NULL,
+            liquidator TEXT,
+            liquidated_user TEXT,
+            liquidated_ntl_pos REAL,
+            liquidated_account_value REAL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (network, address, lid)
+        )
+        ''')
+        _create_network_keyed_table(cursor, "ledger_updates", f'''
+        CREATE TABLE IF NOT EXISTS ledger_updates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME,
+            network {NETWORK_COLUMN},
+            address TEXT NOT NULL,
+            tx_hash TEXT NOT NULL,
+            update_type TEXT NOT NULL,  -- 'deposit', 'withdraw', 'internalTransfer', ...
+            usdc REAL,
+            details TEXT,  -- The update as JSON
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (network, address, tx_hash, update_type)
+        )
+        ''')
+        # Segment files holding rows moved out of fills and positions (see archive.py)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archive_segments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            path TEXT NOT NULL,  -- Relative to the database's directory
+            rows INTEGER NOT NULL,
+            min_time DATETIME,
+            max_time DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
         
         # Create indexes for better query performance
         cursor.execute('''
@@ -82,9 +245,43 @@ def init_database(db_path: Optional[str] = None) -> str:
         cursor.execute('''
         CREATE INDEX IF NOT EXISTS idx_orders_timestamp ON orders(timestamp)
         ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_fills_oid ON fills(address, oid)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_order_states_status ON order_states(address, status)
+        ''')
+        # Keyset pagination walks an address's history in (timestamp, id) order
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_fills_address_timestamp ON fills(address, timestamp)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_address_timestamp ON orders(address, timestamp)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_funding_address_timestamp ON funding_payments(address, timestamp)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_liquidations_address_timestamp ON liquidations(address, timestamp)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ledger_address_timestamp ON ledger_updates(address, timestamp)
+        ''')
+        # The largest trades of an address, without sorting all of its fills
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_fills_address_notional ON fills(address, notional)
+        ''')
+        # History walks restricted to one network
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_fills_network_address_timestamp ON fills(network, address, timestamp)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_network_address_timestamp ON orders(network, address, timestamp)
+        ''')
         
         conn.commit()
         conn.close()
+        logger.debug("Initialized database %s", db_path)
         
         return str(db_path)
         
@@ -93,6 +290,20 @@ def init_database(db_path: Optional[str] = None) -> str:
     except Exception as e:
         raise ValueError(f"Error creating database at {db_path}: {str(e)}")
 
+def _parse_db_time(value) -> Optional[datetime]:
+    """Parse a DATETIME column value written by the sqlite3 default adapter."""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+def _owner(item: Union[FillRecord, OrderUpdateRecord, Dict], address: Optional[str],
+           network: Optional[str]) -> Tuple[str, str]:
+    """Address and network of a fill or order: the given ones, else the fields of a dict"""
+    if isinstance(item, dict):
+        address = address or item.get("address")
+        network = network or item.get("network")
+    return address or "Unknown", network or DEFAULT_NETWORK
+
 class TradeDatabase:
     def __init__(self, db_path: str):
         """Initialize the database connection and create tables if they don't exist."""
@@ -105,57 +316,587 @@ class TradeDatabase:
             self._local.conn = sqlite3.connect(self.db_path)
         return self._local.conn
 
-    def store_fill(self, fill: Dict) -> None:
-        """Store a fill in the database."""
+    def store_fill(self, fill: Dict) -> int:
+        """Store a fill in the database and return its row id."""
         cursor = self.conn.cursor()
-        timestamp = datetime.fromtimestamp(int(fill.get("time", 0)) / 1000)
+        fill_id = self.insert_fill(cursor, fill)
+        self.conn.commit()
+        return fill_id
+
+    def insert_fill(self, cursor: sqlite3.Cursor, fill: Union[FillRecord, Dict],
+                    address: Optional[str] = None, network: Optional[str] = None) -> int:
+        """
+        Insert a fill and update its order state using the given cursor, without committing.
+        
+        The fill is a FillRecord or a fill dict; address and network default to the dict's
+        own fields.
+        """
+        address, network = _owner(fill, address, network)
+        fill = as_fill_record(fill)
+        timestamp = datetime.fromtimestamp(fill.time / 1000)
+        size = fill.sz
+        price = fill.px
+        fee = fill.fee
+        closed_pnl = fill.closedPnl
         
         cursor.execute('''
         INSERT INTO fills (
             timestamp, address, coin, side, size, price, direction, tx_hash, 
-            fee, fee_token, start_position, closed_pnl
+            fee, fee_token, start_position, closed_pnl, oid, tid, notional, net_pnl, network
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             timestamp,
-            fill.get("address", "Unknown"),
-            fill.get("coin", "Unknown"),
-            "BUY" if fill.get("side", "B") == "A" else "SELL",
-            float(fill.get("sz", 0)),
-            float(fill.get("px", 0)),
-            fill.get("dir", "Unknown"),
-            fill.get("hash", "Unknown"),
-            float(fill.get("fee", 0)),
-            fill.get("feeToken", "Unknown"),
-            float(fill.get("startPosition", 0)),
-            float(fill.get("closedPnl", 0))
+            address,
+            fill.coin,
+            "BUY" if fill.side == "A" else "SELL",
+            size,
+            price,
+            fill.dir if fill.dir is not None else "Unknown",
+            fill.hash if fill.hash is not None else "Unknown",
+            fee,
+            fill.feeToken if fill.feeToken is not None else "Unknown",
+            fill.startPosition,
+            closed_pnl,
+            fill.oid,
+            fill.tid,
+            size * price,
+            closed_pnl - fee,
+            network
         ))
+        fill_id = cursor.lastrowid
         
-        self.conn.commit()
+        if fill.oid is not None:
+            self._apply_fill_to_order_state(cursor, fill, address, network, timestamp)
+        
+        return fill_id
 
     def store_order(self, order: Dict, action: str) -> None:
         """Store an order in the database."""
         cursor = self.conn.cursor()
-        timestamp = datetime.fromtimestamp(int(order.get("time", 0)) / 1000)
+        self.insert_order(cursor, order, action)
+        self.conn.commit()
+
+    def insert_order(self, cursor: sqlite3.Cursor, order: Union[OrderUpdateRecord, Dict],
+                     action: Optional[str] = None, address: Optional[str] = None,
+                     network: Optional[str] = None) -> None:
+        """
+        Insert an order and update its order state using the given cursor, without committing.
         
-        # Get the placed or canceled order details
-        order_details = order.get("placed", {}) if action == "placed" else order.get("canceled", {})
+        The order is an OrderUpdateRecord or an order update dict, whose `placed` or `canceled`
+        details are read according to action. address and network default to the dict's own fields.
+        """
+        address, network = _owner(order, address, network)
+        if isinstance(order, dict):
+            # Get the placed or canceled order details
+            order = as_order_update_record({"coin": order.get("coin", "Unknown"), "time": order.get("time", 0),
+                                            action: order.get(action, {})})
+        action = order.action
+        timestamp = datetime.fromtimestamp(order.time / 1000)
         
         cursor.execute('''
-        INSERT INTO orders (timestamp, address, coin, action, side, size, price, order_id)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO orders (timestamp, address, coin, action, side, size, price, order_id, network)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             timestamp,
-            order.get("address", "Unknown"),
-            order.get("coin", "Unknown"),
+            address,
+            order.coin,
             action,
-            "BUY" if order_details.get("side", "B") == "A" else "SELL",
-            float(order_details.get("sz", 0)),
-            float(order_details.get("px", 0)),
-            int(order_details.get("oid", 0))
+            "BUY" if order.side == "A" else "SELL",
+            order.sz,
+            order.px,
+            order.oid,
+            network
         ))
         
-        self.conn.commit()
+        self._apply_order_to_order_state(cursor, order, address, network, timestamp)
+
+    def insert_funding(self, cursor: sqlite3.Cursor, funding: Dict) -> bool:
+        """
+        Insert a funding payment ({time, coin, usdc, szi, fundingRate} plus address) without committing.
+        
+        Returns:
+            bool: False if the payment was already stored
+        """
+        cursor.execute('''
+        INSERT OR IGNORE INTO funding_payments (timestamp, address, coin, usdc, size, funding_rate, network)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            datetime.fromtimestamp(int(funding.get("time", 0)) / 1000),
+            funding.get("address", "Unknown"),
+            funding.get("coin", "Unknown"),
+            float(funding.get("usdc", 0)),
+            float(funding.get("szi", 0)),
+            float(funding.get("fundingRate", 0)),
+            funding.get("network", DEFAULT_NETWORK)
+        ))
+        return cursor.rowcount > 0
+
+    def insert_liquidation(self, cursor: sqlite3.Cursor, liquidation: Dict) -> bool:
+        """Insert a liquidation event without committing. Returns False if it was already stored."""
+        cursor.execute('''
+        INSERT OR IGNORE INTO liquidations (
+            timestamp, address, lid, liquidator, liquidated_user, liquidated_ntl_pos, liquidated_account_value,
+            network
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            datetime.fromtimestamp(int(liquidation.get("time", 0)) / 1000),
+            liquidation.get("address", "Unknown"),
+            int(liquidation.get("lid", 0)),
+            liquidation.get("liquidator"),
+            liquidation.get("liquidated_user"),
+            float(liquidation.get("liquidated_ntl_pos", 0)),
+            float(liquidation.get("liquidated_account_value", 0)),
+            liquidation.get("network", DEFAULT_NETWORK)
+        ))
+        return cursor.rowcount > 0
+
+    def insert_ledger_update(self, cursor: sqlite3.Cursor, update: Dict) -> bool:
+        """Insert a non-funding ledger update ({time, hash, delta} plus address) without committing."""
+        delta = update.get("delta", {})
+        cursor.execute('''
+        INSERT OR IGNORE INTO ledger_updates (timestamp, address, tx_hash, update_type, usdc, details, network)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            datetime.fromtimestamp(int(update.get("time", 0)) / 1000),
+            update.get("address", "Unknown"),
+            update.get("hash", "Unknown"),
+            delta.get("type", "unknown"),
+            float(delta.get("usdc", 0)),
+            json.dumps(delta),
+            update.get("network", DEFAULT_NETWORK)
+        ))
+        return cursor.rowcount > 0
+
+    def get_funding_payments(self, address: str, coin: Optional[str] = None, limit: int = 50,
+                             network: Optional[str] = None) -> List[Dict]:
+        """Get the most recent funding payments of an address, newest first (of one network, or all)."""
+        query = '''
+        SELECT id, timestamp, address, coin, usdc, size, funding_rate, network
+        FROM funding_payments WHERE address = ?
+        '''
+        params = [address]
+        if coin:
+            query += " AND coin = ?"
+            params.append(coin)
+        query += _network_clause(network, params)
+        cursor = self.conn.cursor()
+        cursor.execute(query + " ORDER BY timestamp DESC, id DESC LIMIT ?", params + [limit])
+        return [{
+            'id': row[0],
+            'timestamp': _parse_db_time(row[1]),
+            'address': row[2],
+            'coin': row[3],
+            'usdc': row[4],
+            'size': row[5],
+            'funding_rate': row[6],
+            'network': row[7]
+        } for row in cursor.fetchall()]
+
+    def get_funding_summary(self, address: str, network: Optional[str] = None) -> Dict[str, float]:
+        """Get the net funding received (negative if paid) per coin."""
+        params: list = [address]
+        network_clause = _network_clause(network, params)
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+        SELECT coin, SUM(usdc) FROM funding_payments WHERE address = ?{network_clause} GROUP BY coin
+        ''', params)
+        return dict(cursor.fetchall())
+
+    def get_realized_totals(self, address: str, network: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Get the realized PnL, fees and net funding of an address per coin."""
+        params: list = [address]
+        network_clause = _network_clause(network, params)
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+        SELECT coin, SUM(closed_pnl), SUM(fee) FROM fills WHERE address = ?{network_clause} GROUP BY coin
+        ''', params)
+        totals = {coin: {'realized_pnl': pnl or 0.0, 'fees': fees or 0.0, 'funding': 0.0}
+                  for coin, pnl, fees in cursor.fetchall()}
+        for _id, _time, coin, pnl, fee in archived_rows(self.conn, "fills", "coin, closed_pnl, fee", "timestamp",
+                                                         {"address": address, "network": network}) or ():
+            coin_totals = totals.setdefault(coin, {'realized_pnl': 0.0, 'fees': 0.0, 'funding': 0.0})
+            coin_totals['realized_pnl'] += pnl or 0.0
+            coin_totals['fees'] += fee or 0.0
+        for coin, funding in self.get_funding_summary(address, network).items():
+            totals.setdefault(coin, {'realized_pnl': 0.0, 'fees': 0.0, 'funding': 0.0})['funding'] = funding or 0.0
+        return totals
+
+    def get_liquidations(self, address: str, limit: int = 50, network: Optional[str] = None) -> List[Dict]:
+        """Get the most recent liquidations of an address, newest first."""
+        params: list = [address]
+        network_clause = _network_clause(network, params)
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+        SELECT id, timestamp, address, lid, liquidator, liquidated_user, liquidated_ntl_pos, liquidated_account_value,
+               network
+        FROM liquidations WHERE address = ?{network_clause}
+        ORDER BY timestamp DESC, id DESC LIMIT ?
+        ''', params + [limit])
+        return [{
+            'id': row[0],
+            'timestamp': _parse_db_time(row[1]),
+            'address': row[2],
+            'lid': row[3],
+            'liquidator': row[4],
+            'liquidated_user': row[5],
+            'liquidated_ntl_pos': row[6],
+            'liquidated_account_value': row[7],
+            'network': row[8]
+        } for row in cursor.fetchall()]
+
+    def get_ledger_updates(self, address: str, update_type: Optional[str] = None, limit: int = 50,
+                           network: Optional[str] = None) -> List[Dict]:
+        """Get the most recent non-funding ledger updates (deposits, withdrawals, transfers) of an address."""
+        query = '''
+        SELECT id, timestamp, address, tx_hash, update_type, usdc, details, network
+        FROM ledger_updates WHERE address = ?
+        '''
+        params = [address]
+        if update_type:
+            query += " AND update_type = ?"
+            params.append(update_type)
+        query += _network_clause(network, params)
+        cursor = self.conn.cursor()
+        cursor.execute(query + " ORDER BY timestamp DESC, id DESC LIMIT ?", params + [limit])
+        return [{
+            'id': row[0],
+            'timestamp': _parse_db_time(row[1]),
+            'address': row[2],
+            'tx_hash': row[3],
+            'update_type': row[4],
+            'usdc': row[5],
+            'details': json.loads(row[6]) if row[6] else None,
+            'network': row[7]
+        } for row in cursor.fetchall()]
+
+    def _apply_order_to_order_state(self, cursor: sqlite3.Cursor, order: OrderUpdateRecord, address: str,
+                                    network: str, timestamp: datetime) -> None:
+        """Fold a placement or cancel into the order_states row for its oid."""
+        params = (
+            address,
+            order.oid,
+            order.coin,
+            "BUY" if order.side == "A" else "SELL",
+            order.sz,
+            order.px,
+            timestamp,
+            network
+        )
+        
+        if order.action == "placed":
+            # A fill can arrive before its placement, so recompute the status from what is already filled
+            cursor.execute('''
+            INSERT INTO order_states (address, oid, coin, side, size, price, status, placed_time, network)
+            VALUES (?, ?, ?, ?, ?, ?, 'OPEN', ?, ?)
+            ON CONFLICT(network, address, oid) DO UPDATE SET
+                coin = excluded.coin,
+                side = excluded.side,
+                size = excluded.size,
+                price = excluded.price,
+                placed_time = excluded.placed_time,
+                status = CASE
+                    WHEN status = 'CANCELED' THEN status
+                    WHEN filled_size >= excluded.size - ? THEN 'FILLED'
+                    WHEN filled_size > 0 THEN 'PARTIALLY_FILLED'
+                    ELSE 'OPEN'
+                END,
+                updated_at = CURRENT_TIMESTAMP
+            ''', params + (_SIZE_EPSILON,))
+        else:
+            cursor.execute('''
+            INSERT INTO order_states (address, oid, coin, side, size, price, status, canceled_time, network)
+            VALUES (?, ?, ?, ?, ?, ?, 'CANCELED', ?, ?)
+            ON CONFLICT(network, address, oid) DO UPDATE SET
+                status = CASE WHEN status = 'FILLED' THEN status ELSE 'CANCELED' END,
+                canceled_time = excluded.canceled_time,
+                updated_at = CURRENT_TIMESTAMP
+            ''', params)
+
+    def _apply_fill_to_order_state(self, cursor: sqlite3.Cursor, fill: FillRecord, address: str, network: str,
+                                   timestamp: datetime) -> None:
+        """Add a fill's size to the order_states row for its oid."""
+        # Orders that crossed immediately never produce a placement, so their size stays unknown
+        # and any fill marks them as filled
+        cursor.execute('''
+        INSERT INTO order_states (
+            address, oid, coin, side, price, filled_size, status, first_fill_time, last_fill_time, network
+        )
+        VALUES (?, ?, ?, ?, ?, ?, 'FILLED', ?, ?, ?)
+        ON CONFLICT(network, address, oid) DO UPDATE SET
+            filled_size = filled_size + excluded.filled_size,
+            first_fill_time = COALESCE(first_fill_time, excluded.first_fill_time),
+            last_fill_time = excluded.last_fill_time,
+            status = CASE
+                WHEN status = 'CANCELED' THEN status
+                WHEN size IS NULL OR filled_size + excluded.filled_size >= size - ? THEN 'FILLED'
+                ELSE 'PARTIALLY_FILLED'
+            END,
+            updated_at = CURRENT_TIMESTAMP
+        ''', (
+            address,
+            fill.oid,
+            fill.coin,
+            "BUY" if fill.side == "A" else "SELL",
+            fill.px,
+            fill.sz,
+            timestamp,
+            timestamp,
+            network,
+            _SIZE_EPSILON
+        ))
+
+    def get_recent_fills(self, address: str, limit: int = 50, network: Optional[str] = None) -> List[Dict]:
+        """Get the most recent fills of an address, newest first."""
+        return self.get_fills_page(address, limit=limit, network=network).items
+
+    def get_largest_fills(self,
+                          address: str,
+                          coin: Optional[str] = None,
+                          min_notional: Optional[float] = None,
+                          limit: int = 50,
+                          network: Optional[str] = None) -> List[Dict]:
+        """
+        Get the largest fills of an address by notional (size * price), largest first.
+        
+        Reads idx_fills_address_notional from the top, so the cost doesn't grow with the number
+        of fills. Archived fills are included.
+        
+        Args:
+            address: Address whose fills are read
+            coin: Optional coin filter
+            min_notional: Optional smallest notional returned
+            limit: Maximum number of fills
+            network: Optional network filter, None for all networks
+        
+        Returns:
+            List[Dict]: Fills in the same format as get_recent_fills
+        """
+        query = f'''
+        SELECT id, timestamp, {_FILL_COLUMNS} FROM fills
+        WHERE address = ? AND notional IS NOT NULL'''
+        params: list = [address]
+        if coin:
+            query += " AND coin = ?"
+            params.append(coin)
+        if min_notional is not None:
+            query += " AND notional >= ?"
+            params.append(min_notional)
+        query += _network_clause(network, params)
+        query += " ORDER BY notional DESC, id DESC LIMIT ?"
+        fills = [self._fill_row_to_dict(row) for row in self.conn.execute(query, params + [limit])]
+        archived = archived_rows(self.conn, "fills", _FILL_COLUMNS, "timestamp",
+                                 {"address": address, "coin": coin, "network": network})
+        if archived is not None:
+            archived_fills = (fill for fill in map(self._fill_row_to_dict, archived)
+                              if min_notional is None or fill['notional'] >= min_notional)
+            fills = heapq.nlargest(limit, chain(fills, archived_fills), key=lambda fill: (fill['notional'], fill['id']))
+        return fills
+
+    def iter_fills(self,
+                   address: str,
+                   coin: Optional[str] = None,
+                   start: Optional[datetime] = None,
+                   end: Optional[datetime] = None,
+                   cursor: Optional[str] = None,
+                   descending: bool = False,
+                   fetch_size: int = 500,
+                   network: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Stream the fills of an address in time order with constant memory.
+        
+        Args:
+            address: Address whose fills are read
+            coin: Optional coin filter
+            start: Optional inclusive lower bound on the fill time
+            end: Optional exclusive upper bound on the fill time
+            cursor: Optional Page.next_cursor to resume after
+            descending: If True, newest fills come first
+            fetch_size: Number of rows fetched from SQLite per query
+            network: Optional network filter, None for all networks
+        
+        Returns:
+            Iterator[Dict]: Fills in the same format as get_recent_fills
+        """
+        for row in iter_rows(self.conn, "fills", _FILL_COLUMNS, "timestamp",
+                             {"address": address, "coin": coin, "network": network},
+                             start, end, cursor, descending, fetch_size):
+            yield self._fill_row_to_dict(row)
+
+    def get_fills_page(self,
+                       address: str,
+                       coin: Optional[str] = None,
+                       start: Optional[datetime] = None,
+                       end: Optional[datetime] = None,
+                       cursor: Optional[str] = None,
+                       limit: int = 100,
+                       descending: bool = True,
+                       network: Optional[str] = None) -> Page:
+        """
+        Get one page of an address's fills, newest first by default.
+        
+        Returns:
+            Page: The fills and the cursor of the next page (None on the last page)
+        """
+        return fetch_page(self.conn, "fills", _FILL_COLUMNS, "timestamp",
+                          {"address": address, "coin": coin, "network": network},
+                          self._fill_row_to_dict, start, end, cursor, descending, limit)
+
+    def iter_orders(self,
+                    address: str,
+                    coin: Optional[str] = None,
+                    start: Optional[datetime] = None,
+                    end: Optional[datetime] = None,
+                    cursor: Optional[str] = None,
+                    descending: bool = False,
+                    fetch_size: int = 500,
+                    network: Optional[str] = None) -> Iterator[Dict]:
+        """Stream the order placements and cancels of an address in time order. See iter_fills."""
+        for row in iter_rows(self.conn, "orders", _ORDER_COLUMNS, "timestamp",
+                             {"address": address, "coin": coin, "network": network},
+                             start, end, cursor, descending, fetch_size):
+            yield self._order_row_to_dict(row)
+
+    def get_orders_page(self,
+                        address: str,
+                        coin: Optional[str] = None,
+                        start: Optional[datetime] = None,
+                        end: Optional[datetime] = None,
+                        cursor: Optional[str] = None,
+                        limit: int = 100,
+                        descending: bool = True,
+                        network: Optional[str] = None) -> Page:
+        """Get one page of an address's order placements and cancels, newest first by default."""
+        return fetch_page(self.conn, "orders", _ORDER_COLUMNS, "timestamp",
+                          {"address": address, "coin": coin, "network": network},
+                          self._order_row_to_dict, start, end, cursor, descending, limit)
+
+    def _order_row_to_dict(self, row) -> Dict:
+        """Convert an orders row to a dictionary"""
+        return {
+            'id': row[0],
+            'timestamp': _parse_db_time(row[1]),
+            'address': row[2],
+            'coin': row[3],
+            'action': row[4],
+            'side': row[5],
+            'size': row[6],
+            'price': row[7],
+            'order_id': row[8],
+            'network': row[9]
+        }
+
+    def _fill_row_to_dict(self, row) -> Dict:
+        """Convert a fills row to a dictionary"""
+        return {
+            'id': row[0],
+            'timestamp': _parse_db_time(row[1]),
+            'address': row[2],
+            'coin': row[3],
+            'side': row[4],
+            'size': row[5],
+            'price': row[6],
+            'direction': row[7],
+            'tx_hash': row[8],
+            'fee': row[9],
+            'fee_token': row[10],
+            'start_position': row[11],
+            'closed_pnl': row[12],
+            'oid': row[13],
+            'tid': row[14],
+            # Computed from the stored columns for rows archived before they were derived at ingest
+            'notional': row[15] if row[15] is not None else (row[5] or 0.0) * (row[6] or 0.0),
+            'net_pnl': row[16] if row[16] is not None else (row[12] or 0.0) - (row[9] or 0.0),
+            'network': row[17]
+        }
+
+    def get_order_state(self, address: str, oid: int, network: Optional[str] = None) -> Optional[Dict]:
+        """Get the lifecycle state of a single order."""
+        params: list = [address, oid]
+        network_clause = _network_clause(network, params)
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+        SELECT address, oid, coin, side, size, price, filled_size, status,
+               placed_time, first_fill_time, last_fill_time, canceled_time, network
+        FROM order_states WHERE address = ? AND oid = ?{network_clause}
+        ''', params)
+        row = cursor.fetchone()
+        return self._order_state_row_to_dict(row) if row else None
+
+    def get_open_orders(self, address: str, coin: Optional[str] = None,
+                        network: Optional[str] = None) -> List[Dict]:
+        """Get orders that are still resting (open or partially filled) for an address."""
+        cursor = self.conn.cursor()
+        query = '''
+        SELECT address, oid, coin, side, size, price, filled_size, status,
+               placed_time, first_fill_time, last_fill_time, canceled_time, network
+        FROM order_states
+        WHERE address = ? AND status IN ('OPEN', 'PARTIALLY_FILLED')
+        '''
+        params = [address]
+        if coin:
+            query += " AND coin = ?"
+            params.append(coin)
+        query += _network_clause(network, params)
+        cursor.execute(query + " ORDER BY placed_time DESC", params)
+        return [self._order_state_row_to_dict(row) for row in cursor.fetchall()]
+
+    def get_order_stats(self, address: str, network: Optional[str] = None) -> Dict:
+        """
+        Get order lifecycle statistics for an address.
+        
+        Returns:
+            Dict with order counts per status, fill and cancel ratios over orders seen
+            placed, and the average placement-to-first-fill latency in seconds.
+        """
+        params: list = [address]
+        network_clause = _network_clause(network, params)
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+        SELECT status, COUNT(*) FROM order_states
+        WHERE address = ? AND placed_time IS NOT NULL{network_clause}
+        GROUP BY status
+        ''', params)
+        counts = {ORDER_OPEN: 0, ORDER_PARTIALLY_FILLED: 0, ORDER_FILLED: 0, ORDER_CANCELED: 0}
+        counts.update(dict(cursor.fetchall()))
+        placed = sum(counts.values())
+        
+        cursor.execute(f'''
+        SELECT AVG((julianday(first_fill_time) - julianday(placed_time)) * 86400.0)
+        FROM order_states
+        WHERE address = ? AND placed_time IS NOT NULL AND first_fill_time IS NOT NULL{network_clause}
+        ''', params)
+        avg_latency = cursor.fetchone()[0]
+        
+        return {
+            'placed': placed,
+            'open': counts[ORDER_OPEN],
+            'partially_filled': counts[ORDER_PARTIALLY_FILLED],
+            'filled': counts[ORDER_FILLED],
+            'canceled': counts[ORDER_CANCELED],
+            'fill_ratio': counts[ORDER_FILLED] / placed if placed else 0.0,
+            'cancel_ratio': counts[ORDER_CANCELED] / placed if placed else 0.0,
+            'avg_fill_latency_seconds': avg_latency
+        }
+
+    def _order_state_row_to_dict(self, row) -> Dict:
+        """Convert an order_states row to a dictionary"""
+        return {
+            'address': row[0],
+            'oid': row[1],
+            'coin': row[2],
+            'side': row[3],
+            'size': row[4],
+            'price': row[5],
+            'filled_size': row[6],
+            'status': row[7],
+            'placed_time': _parse_db_time(row[8]),
+            'first_fill_time': _parse_db_time(row[9]),
+            'last_fill_time': _parse_db_time(row[10]),
+            'canceled_time': _parse_db_time(row[11]),
+            'network': row[12]
+        }
 
     def close(self) -> None:
         """Close the database connection."""
@@ -0,0 +1,261 @@
+import json
+import logging
+import time
+from dataclasses import field, make_dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - depends on the environment
+    msgspec = None
+
+if TYPE_CHECKING:
+    from hyperliquid_monitor.profiling import StageTimings
+
+logger = logging.getLogger(__name__)
+
+# Fast-path decoding of websocket payloads into typed fill and order records. orjson and msgspec
+# are optional: with msgspec, userFills messages decode and validate straight into FillRecord
+# objects; with orjson the JSON parsing runs in C; otherwise the stdlib json module is used.
+# Every backend produces the same records.
+if orjson is not None:
+    loads = orjson.loads
+    _LOAD_ERRORS = (ValueError,)
+elif msgspec is not None:
+    loads = msgspec.json.decode
+    _LOAD_ERRORS = (ValueError, msgspec.DecodeError)
+else:
+    loads = json.loads
+    _LOAD_ERRORS = (ValueError,)
+
+BACKEND = "msgspec" if msgspec is not None else "orjson" if orjson is not None else "json"
+
+class DecodeError(ValueError):
+    """Raised when a payload doesn't match the expected fill or order schema"""
+
+# (name, type, default) of each record field. Names follow the wire format so records decode
+# straight from the payload.
+_FILL_FIELDS = [
+    ("coin", str), ("px", float), ("sz", float), ("side", str), ("time", int),
+    ("startPosition", float, 0.0), ("dir", Optional[str], None), ("closedPnl", float, 0.0),
+    ("hash", Optional[str], None), ("oid", Optional[int], None), ("tid", Optional[int], None),
+    ("fee", float, 0.0), ("feeToken", Optional[str], None), ("crossed", bool, False),
+]
+_ORDER_UPDATE_FIELDS = [
+    ("coin", str), ("time", int), ("action", str), ("side", str),
+    ("px", float), ("sz", float), ("oid", int),
+]
+
+def _fill_to_dict(self) -> Dict[str, Any]:
+    """Fill dict in the wire layout with already-converted values, omitting missing fields"""
+    return {name: value for name, value in zip(_FILL_NAMES, _astuple(self)) if value is not None}
+
+def _order_update_to_dict(self) -> Dict[str, Any]:
+    """Order update dict in the layout handled by the monitor"""
+    return {
+        "coin": self.coin,
+        "time": self.time,
+        self.action: {"side": self.side, "px": self.px, "sz": self.sz, "oid": self.oid}
+    }
+
+def _define_record(name: str, fields: List[tuple], to_dict) -> type:
+    """Build a record type: a msgspec Struct when msgspec is installed, else a dataclass"""
+    if msgspec is not None:
+        return msgspec.defstruct(name, fields, namespace={"to_dict": to_dict}, module=__name__)
+    return make_dataclass(
+        name,
+        [(f[0], f[1], field(default=f[2])) if len(f) == 3 else f for f in fields],
+        namespace={"to_dict": to_dict}
+    )
+
+_FILL_NAMES = tuple(f[0] for f in _FILL_FIELDS)
+_astuple = msgspec.structs.astuple if msgspec is not None else (lambda record: tuple(record.__dict__.values()))
+
+FillRecord = _define_record("FillRecord", _FILL_FIELDS, _fill_to_dict)
+OrderUpdateRecord = _define_record("OrderUpdateRecord", _ORDER_UPDATE_FIELDS, _order_update_to_dict)
+
+def parse_fill(fill: Dict[str, Any]) -> FillRecord:
+    """Validate a decoded fill dict and convert it to a FillRecord"""
+    try:
+        side = fill["side"]
+        if side not in ("A", "B"):
+            raise DecodeError(f"Invalid fill side: {side}")
+        oid = fill.get("oid")
+        tid = fill.get("tid")
+        return FillRecord(
+            coin=str(fill["coin"]),
+            px=float(fill["px"]),
+            sz=float(fill["sz"]),
+            side=side,
+            time=int(fill["time"]),
+            startPosition=float(fill.get("startPosition", 0)),
+            dir=fill.get("dir"),
+            closedPnl=float(fill.get("closedPnl", 0)),
+            hash=fill.get("hash"),
+            oid=int(oid) if oid is not None else None,
+            tid=int(tid) if tid is not None else None,
+            fee=float(fill.get("fee", 0)),
+            feeToken=fill.get("feeToken"),
+            crossed=bool(fill.get("crossed", False))
+        )
+    except KeyError as e:
+        raise DecodeError(f"Fill is missing required field {e}") from None
+    except (TypeError, ValueError) as e:
+        if isinstance(e, DecodeError):
+            raise
+        raise DecodeError(f"Invalid fill: {e}") from None
+
+def parse_order_update(update: Dict[str, Any]) -> OrderUpdateRecord:
+    """Validate a decoded `placed`/`canceled` order update and convert it to an OrderUpdateRecord"""
+    action = "placed" if "placed" in update else "canceled" if "canceled" in update else None
+    if action is None:
+        raise DecodeError("Order update has neither 'placed' nor 'canceled'")
+    details = update[action]
+    try:
+        return OrderUpdateRecord(
+            coin=str(update["coin"]),
+            time=int(update.get("time", 0)),
+            action=action,
+            side=details.get("side", "B"),
+            px=float(details.get("px", 0)),
+            sz=float(details.get("sz", 0)),
+            oid=int(details["oid"])
+        )
+    except KeyError as e:
+        raise DecodeError(f"Order update is missing required field {e}") from None
+    except (TypeError, ValueError, AttributeError) as e:
+        raise DecodeError(f"Invalid order update: {e}") from None
+
+def as_fill_record(fill: Union[FillRecord, Dict[str, Any]]) -> FillRecord:
+    """
+    Return a fill as a FillRecord. Records pass through unchanged; dicts (from the stdlib
+    decoder or older callers) are converted without validation, defaulting missing fields.
+    """
+    if isinstance(fill, FillRecord):
+        return fill
+    oid = fill.get("oid")
+    tid = fill.get("tid")
+    return FillRecord(
+        coin=fill.get("coin", "Unknown"),
+        px=float(fill.get("px", 0)),
+        sz=float(fill.get("sz", 0)),
+        side=fill.get("side", "B"),
+        time=int(fill.get("time", 0)),
+        startPosition=float(fill.get("startPosition", 0) or 0),
+        dir=fill.get("dir"),
+        closedPnl=float(fill.get("closedPnl", 0) or 0),
+        hash=fill.get("hash"),
+        oid=int(oid) if oid is not None else None,
+        tid=int(tid) if tid is not None else None,
+        fee=float(fill.get("fee", 0) or 0),
+        feeToken=fill.get("feeToken"),
+        crossed=bool(fill.get("crossed", False))
+    )
+
+def as_order_update_record(update: Union[OrderUpdateRecord, Dict[str, Any]]) -> Optional[OrderUpdateRecord]:
+    """
+    Return an order update as an OrderUpdateRecord, converting dicts without validation.
+    Returns None for updates that are neither `placed` nor `canceled`.
+    """
+    if isinstance(update, OrderUpdateRecord):
+        return update
+    action = "placed" if "placed" in update else "canceled" if "canceled" in update else None
+    if action is None:
+        return None
+    details = update[action]
+    return OrderUpdateRecord(
+        coin=update.get("coin", "Unknown"),
+        time=int(update.get("time", 0)),
+        action=action,
+        side=details.get("side", "B"),
+        px=float(details.get("px", 0)),
+        sz=float(details.get("sz", 0)),
+        oid=int(details.get("oid", 0))
+    )
+
+if msgspec is not None:
+    class _UserFillsData(msgspec.Struct):
+        user: str
+        fills: List[FillRecord]
+        isSnapshot: bool = False
+
+    class _UserFillsMessage(msgspec.Struct):
+        channel: str
+        data: _UserFillsData
+
+    # strict=False lets the decoder convert the string-encoded numbers of the wire format
+    _user_fills_decoder = msgspec.json.Decoder(_UserFillsMessage, strict=False)
+else:
+    _user_fills_decoder = None
+
+def decode_message(raw: Union[str, bytes]) -> Dict[str, Any]:
+    """
+    Decode a websocket message, converting fills and order updates to typed records.
+
+    The result keeps the SDK's message layout ({"channel": ..., "data": {...}}), so it can be
+    dispatched to subscription callbacks unchanged.
+
+    The records are handed to the monitor's event handler as they are: its normalize, position
+    and database stages read their attributes directly.
+
+    Raises:
+        DecodeError: If a fill or order update doesn't match the schema
+    """
+    if _user_fills_decoder is not None:
+        try:
+            message = _user_fills_decoder.decode(raw)
+            data = message.data
+            for fill in data.fills:
+                if fill.side not in ("A", "B"):
+                    raise DecodeError(f"Invalid fill side: {fill.side}")
+            return {
+                "channel": message.channel,
+                "data": {"user": data.user, "isSnapshot": data.isSnapshot, "fills": data.fills}
+            }
+        except msgspec.DecodeError:
+            pass  # Not a valid userFills message, let the generic path decode or reject it
+
+    try:
+        message = loads(raw)
+    except _LOAD_ERRORS as e:
+        raise DecodeError(f"Invalid JSON: {e}") from None
+    data = message.get("data") if isinstance(message, dict) else None
+    if isinstance(data, dict):
+        if "fills" in data:
+            data["fills"] = [parse_fill(fill) for fill in data["fills"]]
+        if "orderUpdates" in data:
+            data["orderUpdates"] = [parse_order_update(update) for update in data["orderUpdates"]]
+    return message
+
+def install_fast_decoder(ws_manager, timings: Optional["StageTimings"] = None) -> None:
+    """
+    Route an SDK WebsocketManager's incoming messages through decode_message.
+
+    Messages that fail validation fall back to the stdlib decoder, so subscription callbacks
+    always receive the message. With timings, decoding is recorded as the "decode" stage.
+    """
+    from hyperliquid.websocket_manager import ws_msg_to_identifier
+
+    def on_message(_ws, message):
+        if message == "Websocket connection established.":
+            return
+        started = time.perf_counter_ns()
+        try:
+            ws_msg = decode_message(message)
+        except DecodeError as e:
+            logger.debug("Fast decode failed, falling back to json: %s", e)
+            ws_msg = json.loads(message)
+        if timings:
+            timings.record("decode", started)
+        identifier = ws_msg_to_identifier(ws_msg)
+        if identifier == "pong" or identifier is None:
+            return
+        for active_subscription in ws_manager.active_subscriptions[identifier]:
+            active_subscription.callback(ws_msg)
+
+    ws_manager.ws.on_message = on_message
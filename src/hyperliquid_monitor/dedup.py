@@ -0,0 +1,109 @@
+from collections import deque
+from typing import Deque, Dict, Hashable, Optional, Set, Tuple
+
+class _AddressFills:
+    __slots__ = ("tids", "order", "last_time", "floor_time")
+
+    def __init__(self):
+        self.tids: Set[Hashable] = set()
+        self.order: Deque[Tuple[Hashable, int]] = deque()  # (tid, time) oldest first
+        self.last_time = 0  # Time of the newest fill seen, in ms
+        self.floor_time = 0  # Fills at or before this time were evicted from the window
+
+class FillDeduplicator:
+    def __init__(self, window: int = 10000):
+        """
+        Remembers the fills already processed per address.
+
+        The exchange re-sends recent fills in the snapshot that follows every (re)subscription,
+        so the monitor skips fills whose trade id it has seen. The newest `window` trade ids are
+        kept per address; fills older than the evicted ones are treated as seen too. Any hashable
+        id works in place of a trade id, so other event streams are deduplicated the same way.
+
+        Args:
+            window: Number of trade ids remembered per address
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self._addresses: Dict[str, _AddressFills] = {}
+
+    def _state(self, address: str) -> _AddressFills:
+        state = self._addresses.get(address)
+        if state is None:
+            state = self._addresses.setdefault(address, _AddressFills())
+        return state
+
+    def is_duplicate(self, address: str, tid: Optional[Hashable], time_ms: int) -> bool:
+        """Whether a fill was already seen. Fills without a trade id are never duplicates."""
+        if tid is None:
+            return False
+        state = self._addresses.get(address)
+        if state is None:
+            return False
+        return tid in state.tids or time_ms <= state.floor_time
+
+    def add(self, address: str, tid: Optional[Hashable], time_ms: int) -> None:
+        """Record a processed fill"""
+        state = self._state(address)
+        if time_ms > state.last_time:
+            state.last_time = time_ms
+        if tid is None or tid in state.tids:
+            return
+        state.tids.add(tid)
+        state.order.append((tid, time_ms))
+        if len(state.order) > self.window:
+            old_tid, old_time = state.order.popleft()
+            state.tids.discard(old_tid)
+            if old_time > state.floor_time:
+                state.floor_time = old_time
+
+    def discard(self, address: str, tid: Optional[Hashable]) -> None:
+        """Forget a fill, e.g. one whose write was rolled back, so a resend of it is processed"""
+        state = self._addresses.get(address)
+        if state is None or tid is None or tid not in state.tids:
+            return
+        state.tids.discard(tid)
+        state.order = deque(item for item in state.order if item[0] != tid)
+
+    def raise_floor(self, address: str, time_ms: int) -> None:
+        """Treat every fill of an address up to time_ms as seen, e.g. fills no longer in the database"""
+        state = self._state(address)
+        if time_ms > state.floor_time:
+            state.floor_time = time_ms
+        if time_ms > state.last_time:
+            state.last_time = time_ms
+
+    def check(self, address: str, tid: Optional[Hashable], time_ms: int) -> bool:
+        """Return True for a duplicate fill, otherwise record it and return False"""
+        if self.is_duplicate(address, tid, time_ms):
+            return True
+        self.add(address, tid, time_ms)
+        return False
+
+    def last_fill_time(self, address: str) -> Optional[int]:
+        """Time in ms of the newest fill seen for an address"""
+        state = self._addresses.get(address)
+        return state.last_time if state else None
+
+    def to_dict(self) -> Dict:
+        """Serializable state, see from_dict()"""
+        return {
+            address: {
+                "last_time": state.last_time,
+                "floor_time": state.floor_time,
+                "fills": [list(item) for item in state.order]
+            }
+            for address, state in list(self._addresses.items())
+        }
+
+    def load(self, data: Dict) -> None:
+        """Replace the state of the addresses in data with a to_dict() snapshot"""
+        for address, saved in data.items():
+            state = _AddressFills()
+            state.last_time = saved["last_time"]
+            state.floor_time = saved["floor_time"]
+            for tid, time_ms in saved["fills"][-self.window:]:
+                state.tids.add(tid)
+                state.order.append((tid, time_ms))
+            self._addresses[address] = state
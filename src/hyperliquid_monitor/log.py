@@ -0,0 +1,195 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional, TextIO, Union
+
+from hyperliquid_monitor.coalesce import TokenBucket
+
+# Every module logs to a child of this logger (logging.getLogger(__name__)). Log calls pass
+# their arguments separately ("%s") and hot paths check isEnabledFor() before building any
+# structured fields, so a disabled level costs one cached lookup and no LogRecord.
+PACKAGE_LOGGER = "hyperliquid_monitor"
+
+Level = Union[int, str]
+
+def _level(level: Level) -> int:
+    return level if isinstance(level, int) else logging.getLevelName(level.upper())
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including fields passed with `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self,
+                 rate: float = 1.0,
+                 burst: float = 10,
+                 level: Level = logging.WARNING,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Rate limits records at or above a level, per logger and message template.
+
+        A flood of the same error (one per failing fill) is reduced to `rate` records per
+        second after an initial burst. The number of records dropped is reported in the
+        `suppressed` field of the next record let through.
+
+        Args:
+            rate: Records per second let through per (logger, message template)
+            burst: Records let through at once before the rate applies
+            level: Records below this level are not limited
+            clock: Time source, injectable for tests
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.level = _level(level)
+        self._clock = clock
+        self._buckets: Dict[tuple, TokenBucket] = {}
+        self._suppressed: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.level:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, self._clock)
+            if not bucket.try_acquire():
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+class SampleFilter(logging.Filter):
+    def __init__(self, every: int, level: Level = logging.WARNING):
+        """
+        Lets through one in `every` records below a level, per logger and message template.
+
+        Args:
+            every: Sampling interval; 1 keeps everything
+            level: Records at or above this level are always kept
+        """
+        super().__init__()
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.every = every
+        self.level = _level(level)
+        self._counts: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.level or self.every == 1:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % self.every == 0
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves the exception on the record for the listener's formatter"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The default prepare() formats the traceback into the message and drops exc_info, for
+        # queues that pickle records. This queue stays in process, so only the arguments are
+        # merged (they may change before the listener runs) and JsonFormatter still gets the
+        # exception as its own field.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_handler: Optional[logging.Handler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging(level: Level = logging.WARNING,
+                      levels: Optional[Dict[str, Level]] = None,
+                      stream: Optional[TextIO] = None,
+                      json_format: bool = True,
+                      rate: Optional[float] = 1.0,
+                      burst: float = 10,
+                      sample_every: int = 1,
+                      asynchronous: bool = True) -> logging.Logger:
+    """
+    Configure the package's log output. Calling it again replaces the previous configuration.
+
+    Args:
+        level: Level of the package logger
+        levels: Optional per-module levels, e.g. {"hyperliquid_monitor.monitor": "DEBUG"}
+        stream: Stream written to, defaults to stderr
+        json_format: If True, records are written as JSON lines, otherwise as plain text
+        rate: Records per second let through per message at WARNING and above, None for no limit
+        burst: Records let through at once before the rate applies
+        sample_every: Keep one in this many records below WARNING
+        asynchronous: If True, records are written by a background thread, so logging
+                      threads never wait on the stream
+
+    Returns:
+        logging.Logger: The package logger
+    """
+    global _handler, _listener
+    shutdown_logging()
+    logger = logging.getLogger(PACKAGE_LOGGER)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if json_format else
+                        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    if asynchronous:
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        _handler = _QueueHandler(records)
+        _listener = logging.handlers.QueueListener(records, output)
+        _listener.start()
+    else:
+        _handler = output
+    # Filters run on the logging thread before a record is queued, so dropped records cost nothing more
+    if rate is not None:
+        _handler.addFilter(RateLimitFilter(rate, burst))
+    if sample_every > 1:
+        _handler.addFilter(SampleFilter(sample_every))
+
+    logger.addHandler(_handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    for name, module_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+    return logger
+
+def shutdown_logging() -> None:
+    """Write out queued records and remove the handler installed by configure_logging"""
+    global _handler, _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+    if _handler:
+        logger = logging.getLogger(PACKAGE_LOGGER)
+        logger.removeHandler(_handler)
+        logger.propagate = True
+        _handler.close()
+        _handler = None
+
+atexit.register(shutdown_logging)
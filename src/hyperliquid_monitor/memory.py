@@ -0,0 +1,145 @@
+import logging
+import os
+import threading
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size of the process, None where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+@dataclass
+class AllocationSite:
+    location: str  # "file:line" of the allocating code
+    size: int  # Bytes allocated there and still alive
+    count: int  # Blocks still alive
+    size_diff: int  # Change in size since the previous report
+
+@dataclass
+class MemoryReport:
+    rss_bytes: Optional[int]
+    traced_bytes: int  # Python allocations traced by tracemalloc, 0 when not tracing
+    traced_peak_bytes: int
+    top: List[AllocationSite] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "rss_bytes": self.rss_bytes,
+            "traced_bytes": self.traced_bytes,
+            "traced_peak_bytes": self.traced_peak_bytes,
+            "top": [vars(site) for site in self.top]
+        }
+
+# Allocations of the import machinery and of tracemalloc itself aren't the monitor's
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+class MemoryMonitor:
+    def __init__(self,
+                 interval: float = 300.0,
+                 top: int = 10,
+                 frames: int = 1,
+                 rss_limit: Optional[int] = None,
+                 on_report: Optional[Callable[[MemoryReport], None]] = None):
+        """
+        Periodic memory self-report of a long-running process.
+
+        Every `interval` seconds the RSS and the top allocation sites traced by tracemalloc
+        (with their growth since the previous report) are logged at INFO, with the same data in
+        the record's structured fields. A site that grows in every report is a leak.
+
+        tracemalloc slows down every allocation, by more the more frames it records, so only
+        enable this where the cost is acceptable.
+
+        Args:
+            interval: Seconds between reports
+            top: Number of allocation sites reported
+            frames: Stack frames recorded per allocation; 1 reports the allocating line
+            rss_limit: Optional RSS in bytes above which each report is logged as a warning
+            on_report: Optional function called with each report
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.top = top
+        self.frames = frames
+        self.rss_limit = rss_limit
+        self._on_report = on_report
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._started_tracing = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start tracing allocations (unless already tracing) and the reporting thread"""
+        if self._thread:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="memory-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the reporting thread, and tracing if start() turned it on"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._previous = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.report()
+            except Exception:
+                logger.exception("Error reporting memory usage")
+
+    def report(self) -> MemoryReport:
+        """Take a report now, log it and pass it to on_report"""
+        with self._lock:
+            report = MemoryReport(rss_bytes(), 0, 0)
+            if tracemalloc.is_tracing():
+                report.traced_bytes, report.traced_peak_bytes = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+                if self._previous is not None:
+                    stats = snapshot.compare_to(self._previous, "lineno")
+                else:
+                    stats = snapshot.statistics("lineno")
+                for stat in stats[:self.top]:
+                    frame = stat.traceback[0]
+                    report.top.append(AllocationSite(
+                        location=f"{frame.filename}:{frame.lineno}",
+                        size=stat.size,
+                        count=stat.count,
+                        size_diff=getattr(stat, "size_diff", stat.size)
+                    ))
+                self._previous = snapshot
+
+        over_limit = self.rss_limit is not None and report.rss_bytes is not None and report.rss_bytes > self.rss_limit
+        level = logging.WARNING if over_limit else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, "Memory: rss=%s traced=%s top=%s", report.rss_bytes, report.traced_bytes,
+                       report.top[0].location if report.top else None,
+                       extra={"memory": report.to_dict()})
+        if self._on_report:
+            self._on_report(report)
+        return report
@@ -0,0 +1,391 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from hyperliquid_monitor.database import TradeDatabase, _parse_db_time
+from hyperliquid_monitor.decoding import FillRecord, OrderUpdateRecord
+from hyperliquid_monitor.position_tracker import SNAPSHOT_FILL_ID, PositionTracker
+from hyperliquid_monitor.types import DEFAULT_NETWORK
+
+# Columns read from a node's tables; columns missing from older node schemas read as NULL
+# (a NULL network is DEFAULT_NETWORK: nodes recorded mainnet only before networks were tracked)
+_FILL_COLUMNS = ["id", "timestamp", "address", "coin", "side", "size", "price", "direction", "tx_hash",
+                 "fee", "fee_token", "start_position", "closed_pnl", "oid", "tid", "network"]
+_ORDER_COLUMNS = ["id", "timestamp", "address", "coin", "action", "side", "size", "price", "order_id", "network"]
+_POSITION_COLUMNS = ["id", "address", "coin", "side", "size", "entry_price", "entry_time", "entry_fill_id",
+                     "exit_price", "exit_time", "exit_fill_id", "duration_seconds", "pnl", "status", "funding", "fees",
+                     "network"]
+
+@dataclass
+class SourceStats:
+    fills_read: int = 0
+    fills_inserted: int = 0
+    fills_duplicate: int = 0  # Fills already merged from another node (same address and tid)
+    orders_read: int = 0
+    orders_inserted: int = 0
+    positions_inserted: int = 0
+    positions_closed: int = 0
+    positions_skipped: int = 0  # Positions whose entry fill isn't in the node's fills table
+    seconds: float = 0.0  # Time spent reading from the node and applying its rows
+
+@dataclass
+class _SourceState:
+    """Merge progress of one node, read from the central store"""
+    fills: int = 0
+    orders: int = 0
+    positions: int = 0
+    open_positions: List[int] = field(default_factory=list)  # Node ids of positions merged while open
+
+@dataclass
+class _SourceBatch:
+    """Rows read from one node in one round"""
+    fills: List[tuple] = field(default_factory=list)
+    orders: List[tuple] = field(default_factory=list)
+    positions: List[tuple] = field(default_factory=list)
+    closed_positions: List[tuple] = field(default_factory=list)  # Merged while open, closed since
+    fills_high_water: int = 0
+    full: bool = False  # More rows are waiting on the node
+    seconds: float = 0.0
+
+class ShardMerger:
+    def __init__(self, target_path: str, sources: List[str], batch_size: int = 5000, workers: Optional[int] = None):
+        """
+        Incrementally merge the databases of several monitor nodes into one central store.
+
+        Each node is read in parallel from a high-water mark per table, so a run only pulls rows
+        added since the previous one. Fills are deduplicated on (network, address, tid), orders on
+        (network, address, order id, action) and positions on their entry fill, and the fill ids
+        positions refer to are remapped to the central store's ids. Order states are rebuilt
+        from the merged fills and orders.
+
+        Args:
+            target_path: Path to the central database, created if missing
+            sources: Paths to the node databases, opened read-only
+            batch_size: Maximum number of rows read per table from a node per round
+            workers: Number of nodes read concurrently, defaults to one per node
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.db = TradeDatabase(target_path)
+        self.target_path = self.db.db_path
+        PositionTracker(self.target_path, cache_size=0)  # Creates the positions table
+        self.sources = [str(Path(source).resolve()) for source in sources]
+        if self.target_path in self.sources:
+            raise ValueError("The target database can't also be a source")
+        self.batch_size = batch_size
+        self.workers = workers or max(len(self.sources), 1)
+        self.stats: Dict[str, SourceStats] = {source: SourceStats() for source in self.sources}
+        self._init_merge_tables()
+
+    def _init_merge_tables(self) -> None:
+        """Create the tables holding merge progress and the id mappings"""
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS merge_high_water (
+            source TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            last_id INTEGER NOT NULL,
+            PRIMARY KEY (source, table_name)
+        )
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS merge_fill_ids (
+            source TEXT NOT NULL,
+            source_id INTEGER NOT NULL,
+            target_id INTEGER NOT NULL,
+            PRIMARY KEY (source, source_id)
+        )
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS merge_positions (
+            source TEXT NOT NULL,
+            source_id INTEGER NOT NULL,
+            target_id INTEGER NOT NULL,
+            closed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (source, source_id)
+        )
+        ''')
+
+        # Dedup lookups on the central store, replacing the ones made before networks were tracked
+        cursor.execute('''
+        DROP INDEX IF EXISTS idx_fills_tid
+        ''')
+        cursor.execute('''
+        DROP INDEX IF EXISTS idx_orders_order_id
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_fills_network_tid ON fills(network, address, tid)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_network_order_id ON orders(network, address, order_id, action)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_positions_entry_fill ON positions(address, entry_fill_id)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_merge_positions_open ON merge_positions(source, closed)
+        ''')
+        self.db.conn.commit()
+
+    def run(self) -> Dict[str, SourceStats]:
+        """
+        Pull everything added to the nodes since the last run.
+
+        Nodes are read concurrently while the rows already read are written to the central
+        store, one transaction per batch (including the high-water marks), so an interrupted
+        run resumes where it stopped.
+
+        Returns:
+            Dict[str, SourceStats]: Cumulative statistics per node path
+        """
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="merge") as pool:
+            futures: Dict[Future, str] = {
+                pool.submit(self._read_source, source, self._load_state(source)): source
+                for source in self.sources
+            }
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source = futures.pop(future)
+                    batch = future.result()
+                    started = time.perf_counter()
+                    self._apply(source, batch)
+                    self.stats[source].seconds += batch.seconds + time.perf_counter() - started
+                    if batch.full:
+                        futures[pool.submit(self._read_source, source, self._load_state(source))] = source
+        return self.stats
+
+    def follow(self, interval: float = 5.0, stop_event: Optional[threading.Event] = None) -> None:
+        """Run merges every interval seconds until stop_event is set"""
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            self.run()
+            stop_event.wait(interval)
+
+    def _load_state(self, source: str) -> _SourceState:
+        cursor = self.db.conn.cursor()
+        cursor.execute('''
+        SELECT table_name, last_id FROM merge_high_water WHERE source = ?
+        ''', (source,))
+        state = _SourceState(**dict(cursor.fetchall()))
+        cursor.execute('''
+        SELECT source_id FROM merge_positions WHERE source = ? AND closed = 0
+        ''', (source,))
+        state.open_positions = [row[0] for row in cursor.fetchall()]
+        return state
+
+    def _read_source(self, source: str, state: _SourceState) -> _SourceBatch:
+        """Read the rows after the high-water marks from a node (runs in a worker thread)"""
+        started = time.perf_counter()
+        batch = _SourceBatch(fills_high_water=state.fills)
+        conn = sqlite3.connect(Path(source).as_uri() + "?mode=ro", uri=True)
+        try:
+            fills = self._select(conn, "fills", _FILL_COLUMNS)
+            if fills:
+                batch.fills = conn.execute(f"{fills} WHERE id > ? ORDER BY id LIMIT ?",
+                                           (state.fills, self.batch_size)).fetchall()
+                if batch.fills:
+                    batch.fills_high_water = batch.fills[-1][0]
+
+            orders = self._select(conn, "orders", _ORDER_COLUMNS)
+            if orders:
+                batch.orders = conn.execute(f"{orders} WHERE id > ? ORDER BY id LIMIT ?",
+                                            (state.orders, self.batch_size)).fetchall()
+
+            positions = self._select(conn, "positions", _POSITION_COLUMNS)
+            if positions:
+                rows = conn.execute(f"{positions} WHERE id > ? ORDER BY id LIMIT ?",
+                                    (state.positions, self.batch_size)).fetchall()
+                # Stop at the first position whose entry fill hasn't been read yet
+                for row in rows:
+                    if row[7] is not None and row[7] > batch.fills_high_water:
+                        batch.full = True
+                        break
+                    batch.positions.append(row)
+
+                for start in range(0, len(state.open_positions), 500):
+                    ids = state.open_positions[start:start + 500]
+                    batch.closed_positions.extend(conn.execute(
+                        f"{positions} WHERE id IN ({','.join('?' * len(ids))}) "
+                        "AND status = 'CLOSED' AND exit_fill_id <= ?",
+                        ids + [batch.fills_high_water]
+                    ).fetchall())
+                batch.full = batch.full or len(rows) == self.batch_size
+
+            batch.full = batch.full or self.batch_size in (len(batch.fills), len(batch.orders))
+        finally:
+            conn.close()
+        batch.seconds = time.perf_counter() - started
+        return batch
+
+    def _select(self, conn: sqlite3.Connection, table: str, columns: List[str]) -> Optional[str]:
+        """SELECT clause for a node table, None if the node doesn't have the table"""
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if not existing:
+            return None
+        return f"SELECT {', '.join(c if c in existing else 'NULL' for c in columns)} FROM {table}"
+
+    def _apply(self, source: str, batch: _SourceBatch) -> None:
+        """Write one node batch to the central store in a single transaction"""
+        stats = self.stats[source]
+        conn = self.db.conn
+        cursor = conn.cursor()
+        try:
+            for row in batch.fills:
+                self._merge_fill(cursor, source, row, stats)
+            for row in batch.orders:
+                self._merge_order(cursor, row, stats)
+            for row in batch.positions:
+                self._merge_position(cursor, source, row, batch.fills_high_water, stats)
+            for row in batch.closed_positions:
+                self._merge_close(cursor, source, row, stats)
+
+            marks = {"fills": batch.fills_high_water}
+            if batch.orders:
+                marks["orders"] = batch.orders[-1][0]
+            if batch.positions:
+                marks["positions"] = batch.positions[-1][0]
+            cursor.executemany('''
+            INSERT INTO merge_high_water (source, table_name, last_id) VALUES (?, ?, ?)
+            ON CONFLICT(source, table_name) DO UPDATE SET last_id = excluded.last_id
+            ''', [(source, table, last_id) for table, last_id in marks.items()])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _merge_fill(self, cursor: sqlite3.Cursor, source: str, row: tuple, stats: SourceStats) -> None:
+        (source_id, timestamp, address, coin, side, size, price, direction, tx_hash,
+         fee, fee_token, start_position, closed_pnl, oid, tid, network) = row
+        network = network or DEFAULT_NETWORK
+        stats.fills_read += 1
+        target_id = None
+        if tid is not None:
+            cursor.execute('''
+            SELECT id FROM fills WHERE network = ? AND address = ? AND tid = ?
+            ''', (network, address, tid))
+            existing = cursor.fetchone()
+            if existing:
+                target_id = existing[0]
+                stats.fills_duplicate += 1
+
+        if target_id is None:
+            cursor.execute('''
+            INSERT INTO fills (
+                timestamp, address, coin, side, size, price, direction, tx_hash,
+                fee, fee_token, start_position, closed_pnl, oid, tid, notional, net_pnl, network
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', row[1:-1] + ((size or 0.0) * (price or 0.0), (closed_pnl or 0.0) - (fee or 0.0), network))
+            target_id = cursor.lastrowid
+            stats.fills_inserted += 1
+            if oid is not None:
+                # Fold the fill into the central order state, in wire format
+                self.db._apply_fill_to_order_state(cursor, FillRecord(
+                    coin=coin, px=price or 0.0, sz=size or 0.0, side="A" if side == "BUY" else "B", time=0, oid=oid
+                ), address, network, _parse_db_time(timestamp))
+
+        cursor.execute('''
+        INSERT OR REPLACE INTO merge_fill_ids (source, source_id, target_id) VALUES (?, ?, ?)
+        ''', (source, source_id, target_id))
+
+    def _merge_order(self, cursor: sqlite3.Cursor, row: tuple, stats: SourceStats) -> None:
+        _, timestamp, address, coin, action, side, size, price, order_id, network = row
+        network = network or DEFAULT_NETWORK
+        stats.orders_read += 1
+        cursor.execute('''
+        SELECT 1 FROM orders WHERE network = ? AND address = ? AND order_id = ? AND action = ?
+        ''', (network, address, order_id, action))
+        if cursor.fetchone():
+            return
+        cursor.execute('''
+        INSERT INTO orders (timestamp, address, coin, action, side, size, price, order_id, network)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', row[1:-1] + (network,))
+        stats.orders_inserted += 1
+        self.db._apply_order_to_order_state(
+            cursor,
+            OrderUpdateRecord(coin=coin, time=0, action=action, side="A" if side == "BUY" else "B",
+                              px=price or 0.0, sz=size or 0.0, oid=order_id),
+            address,
+            network,
+            _parse_db_time(timestamp)
+        )
+
+    def _target_fill_id(self, cursor: sqlite3.Cursor, source: str, source_id: Optional[int]) -> Optional[int]:
+        if source_id is None:
+            return None
+        cursor.execute('''
+        SELECT target_id FROM merge_fill_ids WHERE source = ? AND source_id = ?
+        ''', (source, source_id))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _merge_position(self, cursor: sqlite3.Cursor, source: str, row: tuple, fills_high_water: int,
+                        stats: SourceStats) -> None:
+        (source_id, address, coin, side, size, entry_price, entry_time, entry_fill_id,
+         exit_price, exit_time, exit_fill_id, duration_seconds, pnl, status, funding, fees, network) = row
+        # A close whose fill hasn't been merged yet is picked up by a later round
+        closed = status == 'CLOSED' and exit_fill_id is not None and exit_fill_id <= fills_high_water
+
+        if entry_fill_id == SNAPSHOT_FILL_ID:
+            # Seeded from an exchange snapshot: there's no entry fill to key it by, only its node row
+            entry_id = SNAPSHOT_FILL_ID
+            cursor.execute('''
+            SELECT target_id FROM merge_positions WHERE source = ? AND source_id = ?
+            ''', (source, source_id))
+        else:
+            entry_id = self._target_fill_id(cursor, source, entry_fill_id)
+            if entry_id is None:
+                stats.positions_skipped += 1
+                return
+            cursor.execute('''
+            SELECT id FROM positions WHERE address = ? AND entry_fill_id = ?
+            ''', (address, entry_id))
+        existing = cursor.fetchone()
+        if existing:
+            target_id = existing[0]
+        else:
+            cursor.execute('''
+            INSERT INTO positions (address, coin, side, size, entry_price, entry_time, entry_fill_id, funding,
+                                   notional, fees, network)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (address, coin, side, size, entry_price, entry_time, entry_id, funding or 0.0,
+                  size * entry_price, fees or 0.0, network or DEFAULT_NETWORK))
+            target_id = cursor.lastrowid
+            stats.positions_inserted += 1
+
+        cursor.execute('''
+        INSERT OR REPLACE INTO merge_positions (source, source_id, target_id, closed) VALUES (?, ?, ?, 0)
+        ''', (source, source_id, target_id))
+        if closed:
+            self._merge_close(cursor, source, row, stats)
+
+    def _merge_close(self, cursor: sqlite3.Cursor, source: str, row: tuple, stats: SourceStats) -> None:
+        """Copy the close of a merged position"""
+        source_id, exit_price, exit_time, exit_fill_id, duration_seconds, pnl, funding, fees = (
+            row[0], row[8], row[9], row[10], row[11], row[12], row[14], row[15]
+        )
+        cursor.execute('''
+        SELECT target_id FROM merge_positions WHERE source = ? AND source_id = ?
+        ''', (source, source_id))
+        target_id = cursor.fetchone()[0]
+        cursor.execute('''
+        UPDATE positions
+        SET exit_price = ?, exit_time = ?, exit_fill_id = ?, duration_seconds = ?, pnl = ?,
+            funding = ?, fees = ?, net_pnl = ?, status = 'CLOSED'
+        WHERE id = ? AND status = 'OPEN'
+        ''', (exit_price, exit_time, self._target_fill_id(cursor, source, exit_fill_id),
+              duration_seconds, pnl, funding or 0.0, fees or 0.0, (pnl or 0.0) + (funding or 0.0) - (fees or 0.0),
+              target_id))
+        stats.positions_closed += cursor.rowcount
+        cursor.execute('''
+        UPDATE merge_positions SET closed = 1 WHERE source = ? AND source_id = ?
+        ''', (source, source_id))
+
+    def close(self) -> None:
+        self.db.close()
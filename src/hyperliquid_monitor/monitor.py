@@ -1,50 +1,247 @@
+import logging
+import os
 import signal
 import sys
 import threading
+import time
+from concurrent.futures import Future
+from dataclasses import replace
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Union
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple, Union
 
 from hyperliquid.info import Info
-from hyperliquid.utils import constants
 
-from hyperliquid_monitor.database import TradeDatabase
-from hyperliquid_monitor.types import Trade, TradeCallback
-from hyperliquid_monitor.position_tracker import PositionTracker
+from hyperliquid_monitor.archive import archived_rows
+from hyperliquid_monitor.database import TradeDatabase, _parse_db_time
+from hyperliquid_monitor.types import DEFAULT_NETWORK, AccountEvent, Trade, TradeCallback
+from hyperliquid_monitor.position_tracker import Position, PositionTracker
+from hyperliquid_monitor.order_book import OrderBook, OpenOrder, OpenOrdersSource
+from hyperliquid_monitor.alerts import AlertCallback, AlertEngine, AlertRule
+from hyperliquid_monitor.bus import EventBus, Handler, OverflowPolicy, Subscription, Topic
+from hyperliquid_monitor.decoding import (FillRecord, OrderUpdateRecord, as_fill_record, as_order_update_record,
+                                          install_fast_decoder)
+from hyperliquid_monitor.writer import DatabaseWriter
+from hyperliquid_monitor.dedup import FillDeduplicator
+from hyperliquid_monitor.checkpoint import Checkpoint, CheckpointError, read_checkpoint, write_checkpoint
+from hyperliquid_monitor.pricing import MarkToMarket, PriceCache, mark_position
+from hyperliquid_monitor.coalesce import FillCoalescer
+from hyperliquid_monitor.portfolio import PortfolioTracker
+from hyperliquid_monitor.memory import MemoryMonitor, MemoryReport
+from hyperliquid_monitor.profiling import SamplingProfiler, StageStats, StageTimings
+from hyperliquid_monitor.bootstrap import AddressSnapshot, SnapshotClient
+from hyperliquid_monitor.networks import network_url
+
+if TYPE_CHECKING:
+    from hyperliquid_monitor.server import QueryServer
+
+logger = logging.getLogger(__name__)
+
+def _to_millis(value) -> int:
+    """Convert a DATETIME column value back to the exchange's millisecond timestamps"""
+    return int(round(_parse_db_time(value).timestamp() * 1000))
 
 class HyperliquidMonitor:
     def __init__(self, 
                  addresses: List[str], 
                  db_path: Optional[str] = None,
                  callback: Optional[TradeCallback] = None,
-                 silent: bool = False):
+                 silent: bool = False,
+                 open_orders_source: Optional[OpenOrdersSource] = None,
+                 alert_rules: Optional[List[AlertRule]] = None,
+                 alert_callback: Optional[AlertCallback] = None,
+                 fast_decode: bool = False,
+                 checkpoint_path: Optional[str] = None,
+                 checkpoint_interval: float = 60.0,
+                 mark_to_market: bool = False,
+                 mark_interval: float = 0.25,
+                 coalesce_window: Optional[float] = None,
+                 callback_rate: Optional[float] = None,
+                 callback_burst: Optional[float] = None,
+                 write_batch_size: int = 500,
+                 portfolios: Optional[Dict[str, List[str]]] = None,
+                 dedup_window: int = 10000,
+                 write_queue_size: int = 10000,
+                 max_pending_callbacks: int = 10000,
+                 memory_report_interval: Optional[float] = None,
+                 memory_limit_mb: Optional[float] = None,
+                 profile_dir: Optional[str] = None,
+                 profile_seconds: float = 30.0,
+                 bootstrap: bool = False,
+                 bootstrap_workers: int = 8,
+                 bootstrap_rate: float = 10.0,
+                 network: str = DEFAULT_NETWORK,
+                 api_url: Optional[str] = None,
+                 timings: Optional[StageTimings] = None):
         """
         Initialize the Hyperliquid monitor.
         
         Args:
             addresses: List of addresses to monitor
             db_path: Optional path to SQLite database. If None, trades won't be stored
-            callback: Optional callback function that will be called for each trade
+            callback: Optional callback function that will be called for each trade. It is a
+                   convenience wrapper for a synchronous subscriber on the "fills" and "orders"
+                   topics of the monitor's event bus (see subscribe()).
             silent: If True, callback notifications will be suppressed even if callback is provided.
                    Useful for silent database recording. Default is False.
+            open_orders_source: Optional function returning the resting orders of an address,
+                   used to seed the in-memory order book at startup. Defaults to the
+                   `openOrders` info endpoint.
+            alert_rules: Optional alert rules evaluated against every trade. Rules are
+                   explicit configuration, so they are evaluated in silent mode too.
+            alert_callback: Optional function called for each alert that fires
+            fast_decode: If True, websocket payloads are decoded with orjson/msgspec (when
+                   installed) straight into validated FillRecord/OrderUpdateRecord objects
+            checkpoint_path: Optional path of a checkpoint file. The monitor saves its in-memory
+                   state (open positions, processed fills) there every checkpoint_interval seconds
+                   and on shutdown, and restores it on start. Requires db_path.
+            checkpoint_interval: Seconds between checkpoints
+            mark_to_market: If True, mid prices of all coins are streamed into `prices` and the
+                   unrealized PnL of open positions is kept up to date. Requires db_path.
+            mark_interval: Minimum seconds between two revaluations of the open positions
+            coalesce_window: Optional number of seconds during which fills of the same order or
+                   transaction are merged into one trade before reaching the callback
+            callback_rate: Optional maximum number of callback calls per second per address.
+                   Trades over the limit are held back (and keep merging) until allowed.
+            callback_burst: Number of callback calls an address may make at once under
+                   callback_rate, defaults to one second worth
+            write_batch_size: Maximum number of fills and orders the writer thread commits in
+                   one transaction
+            portfolios: Optional named groups of addresses whose net positions, PnL and
+                   exposure are aggregated in memory (see get_portfolio()). Requires db_path.
+            dedup_window: Number of fill (and account event) ids remembered per address to
+                   skip the snapshots re-sent on resubscription
+            write_queue_size: Maximum number of writes waiting for the writer thread; event
+                   handlers block when it is full
+            max_pending_callbacks: Maximum number of coalesced trades waiting for the callback;
+                   the oldest is dropped beyond it
+            memory_report_interval: Optional number of seconds between memory reports (RSS and
+                   the top allocation sites, traced with tracemalloc) in the log
+            memory_limit_mb: Optional RSS above which memory reports are logged as warnings
+            profile_dir: Optional directory for sampling profiles. When set, SIGUSR1 profiles
+                   the running monitor for profile_seconds (see profile()).
+            profile_seconds: Default duration of a sampling profile
+            bootstrap: If True, start() snapshots the positions and resting orders of every
+                   address concurrently, so positions opened before monitoring began are
+                   tracked (see bootstrap_snapshots()). Requires db_path.
+            bootstrap_workers: Maximum number of snapshot requests in flight
+            bootstrap_rate: Maximum snapshot requests per second
+            network: Network the addresses are monitored on: "mainnet", "testnet", "local" or
+                   any name given with an api_url. Everything recorded is tagged with it, so
+                   monitors of several networks can share a database (see MultiNetworkMonitor).
+            api_url: Optional API URL, defaults to the network's (see networks.NETWORKS)
+            timings: Optional stage timings to record into, e.g. shared by several monitors
         """
-        self.info = Info(constants.MAINNET_API_URL)
+        self.network = network
+        self.api_url = network_url(network, api_url)
+        # Created on first use (see the info property): building it fetches exchange metadata
+        self._info: Optional[Info] = None
+        self._info_lock = threading.Lock()
+        # Time spent per ingest stage, and the on-demand sampling profiler
+        self.timings = timings or StageTimings()
+        self.profiler = SamplingProfiler()
+        self.profile_dir = profile_dir
+        self.profile_seconds = profile_seconds
         self.addresses = addresses
         self.callback = callback if not silent else None
         self.silent = silent
         self.db = TradeDatabase(db_path) if db_path else None
-        self.position_tracker = PositionTracker(db_path) if db_path else None
+        self.position_tracker = PositionTracker(db_path, network=network) if db_path else None
+        # The only thread that writes to the database; handlers hand it jobs and never wait on it
+        self.writer = DatabaseWriter(db_path, batch_size=write_batch_size, maxsize=write_queue_size,
+                                     on_error=self._handle_writer_error, timings=self.timings) if db_path else None
+        if self.writer:
+            self.writer.add_commit_listener(self._invalidate_position_reads)
         self._stop_event = threading.Event()
-        self._db_lock = threading.Lock() if db_path else None
+        self.order_book = OrderBook()
+        self._open_orders_source = open_orders_source
+        self.alerts = AlertEngine(alert_rules, alert_callback) if alert_rules else None
+        self.bus = EventBus(on_error=self._handle_subscriber_error)
+        self.server = None
+        self.fast_decode = fast_decode
+        # Fills already processed, so the snapshot re-sent on (re)subscription isn't stored twice
+        self.dedup = FillDeduplicator(dedup_window)
+        # The same, as committed by the writer thread; this is what checkpoints save
+        self._committed_fills = FillDeduplicator(dedup_window) if db_path else None
+        # Funding payments, liquidations and ledger updates already processed, keyed by event id
+        self._event_dedup = FillDeduplicator(dedup_window)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        
+        # Latest mid price per coin, fed by one allMids subscription for all coins
+        self.prices = PriceCache()
+        self.mtm = MarkToMarket(self.prices, mark_interval) if mark_to_market and db_path else None
+        if self.mtm:
+            self.position_tracker.add_listener(self.mtm.on_position_change)
+        
+        if checkpoint_path and not db_path:
+            raise ValueError("Checkpoints require a database path to be specified")
+        if mark_to_market and not db_path:
+            raise ValueError("Mark-to-market requires a database path to be specified")
+        if portfolios and not db_path:
+            raise ValueError("Portfolios require a database path to be specified")
+        if bootstrap and not db_path:
+            raise ValueError("Bootstrapping positions requires a database path to be specified")
+        self.bootstrap = bootstrap
+        # Time in ms of the snapshot each seeded position was taken from, per (address, coin)
+        self._snapshot_times: Dict[Tuple[str, str], int] = {}
+        self.bootstrap_workers = bootstrap_workers
+        self.bootstrap_rate = bootstrap_rate
+        
+        # Net positions and PnL per group of addresses, updated by every position change and fill
+        self.portfolios = PortfolioTracker(portfolios, self.prices) if portfolios and db_path else None
+        if self.portfolios:
+            self.position_tracker.add_listener(self.portfolios.on_position_change)
+            self.bus.subscribe("fills", self.portfolios.on_fill, name="portfolio-fills", synchronous=True)
+            self.bus.subscribe("account_events", self.portfolios.on_account_event,
+                               name="portfolio-funding", synchronous=True)
+        
+        # Merges bursts of fills and rate limits the callback, when configured
+        self.coalescer = None
+        if self.callback and (coalesce_window or callback_rate):
+            self.coalescer = FillCoalescer(
+                self.callback,
+                window=coalesce_window or 0.0,
+                rate=callback_rate,
+                burst=callback_burst,
+                on_error=lambda e: self._handle_subscriber_error("callback", e),
+                max_pending=max_pending_callbacks
+            )
+            self.bus.subscribe("fills", self.coalescer.add, name="callback-fills", synchronous=True)
+            self.bus.subscribe("orders", self.coalescer.add, name="callback-orders", synchronous=True)
+        elif self.callback:
+            self.bus.subscribe("fills", self.callback, name="callback-fills", synchronous=True)
+            self.bus.subscribe("orders", self.callback, name="callback-orders", synchronous=True)
+        if self.alerts:
+            self.bus.subscribe("fills", self.alerts.evaluate, name="alerts-fills", synchronous=True)
+            self.bus.subscribe("orders", self.alerts.evaluate, name="alerts-orders", synchronous=True)
         
         if silent and not db_path:
             raise ValueError("Silent mode requires a database path to be specified")
         
+        self.memory = MemoryMonitor(
+            memory_report_interval,
+            rss_limit=int(memory_limit_mb * 1024 * 1024) if memory_limit_mb else None
+        ) if memory_report_interval else None
+        
+    @property
+    def info(self) -> Info:
+        """Hyperliquid SDK client, created on first use so that constructing a monitor does no I/O"""
+        if self._info is None:
+            with self._info_lock:
+                if self._info is None:
+                    self._info = Info(self.api_url)
+        return self._info
+
+    @info.setter
+    def info(self, info: Info) -> None:
+        self._info = info
+
     def handle_shutdown(self, signum=None, frame=None):
         """Handle shutdown signals"""
         if self._stop_event.is_set():
             sys.exit(0)
             
-        print("\nShutting down gracefully...")
+        logger.info("Shutting down gracefully...")
         self._stop_event.set()
         self.cleanup()
         signal.signal(signal.SIGINT, signal.SIG_DFL)
@@ -53,14 +250,26 @@ class HyperliquidMonitor:
         
     def cleanup(self):
         """Clean up resources"""
+        if self.server:
+            self.server.stop()
+            self.server = None
+        self.bus.close()
+        if self.memory:
+            self.memory.stop()
+        if self.coalescer:
+            self.coalescer.close()
+        if self.writer:
+            if self.checkpoint_path and not self.writer.closed:
+                self.checkpoint()
+            self.writer.close()
         if self.db:
-            with self._db_lock:
-                self.db.close()
-            if not self.silent:
-                print("Database connection closed.")
+            self.db.close()
+            logger.info("Database connection closed")
 
     def create_event_handler(self, address: str):
         """Creates an event handler for a specific address"""
+        timings = self.timings
+        
         def handle_event(event: Dict[str, Any]) -> None:
             if self._stop_event.is_set():
                 return
@@ -73,129 +282,594 @@ class HyperliquidMonitor:
             # Handle fills
             if "fills" in data:
                 for fill in data["fills"]:
-                    if not isinstance(fill, dict):
+                    if not isinstance(fill, (FillRecord, dict)):
                         continue
                     try:
+                        started = time.perf_counter_ns()
+                        # The fast decoder already delivers FillRecords; every stage reads them directly
+                        fill = as_fill_record(fill)
+                        if self.dedup.check(address, fill.tid, fill.time):
+                            continue
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Fill %s %s %s @ %s", fill.coin, fill.side, fill.sz, fill.px,
+                                         extra={"address": address, "tid": fill.tid})
                         trade = self._process_fill(fill, address)
-                        fill_id = None
+                        self.order_book.apply_fill(fill, address)
+                        started = timings.record("normalize", started)
                         position_info = None
                         
-                        if self.db:
-                            with self._db_lock:
-                                # Store the fill first to get the ID
-                                cursor = self.db.conn.cursor()
-                                cursor.execute('''
-                                INSERT INTO fills (
-                                    timestamp, address, coin, side, size, price, direction, tx_hash, 
-                                    fee, fee_token, start_position, closed_pnl
-                                )
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                                ''', (
-                                    trade.timestamp,
-                                    fill.get("address", address),
-                                    fill.get("coin", "Unknown"),
-                                    "BUY" if fill.get("side", "B") == "A" else "SELL",
-                                    float(fill.get("sz", 0)),
-                                    float(fill.get("px", 0)),
-                                    fill.get("dir", "Unknown"),
-                                    fill.get("hash", "Unknown"),
-                                    float(fill.get("fee", 0)),
-                                    fill.get("feeToken", "Unknown"),
-                                    float(fill.get("startPosition", 0)),
-                                    float(fill.get("closedPnl", 0))
-                                ))
-                                fill_id = cursor.lastrowid
-                                self.db.conn.commit()
-                                
-                                # Track position if we have a position tracker
-                                if self.position_tracker:
-                                    position_info = self.position_tracker.process_fill(
-                                        {**fill, "address": address}, fill_id
-                                    )
+                        if self.writer:
+                            # Positions are tracked in memory under a per-address lock; the
+                            # database writes are queued for the writer thread
+                            persist = None
+                            if self.position_tracker and not self._in_snapshot(address, fill):
+                                position_info, persist = self.position_tracker.apply_fill(fill, address)
+                                started = timings.record("position", started)
+                            job, done = self._fill_job(fill, address, persist)
+                            self.writer.submit(job, key=(address, fill.coin, "fills"), callback=done)
+                            started = timings.record("db_write", started)
                         
                         # Add position info to trade if available
                         if position_info:
                             trade.position_duration = position_info.get('duration_formatted')
                             trade.position_info = position_info
                         
-                        if self.callback and not self.silent:
-                            self.callback(trade)
-                    except Exception as e:
-                        if not self.silent:
-                            print(f"Error processing fill: {e}")
+                        self.bus.publish("fills", trade)
+                        if position_info:
+                            self.bus.publish("position_closes", trade)
+                        timings.record("callback", started)
+                    except Exception:
+                        logger.exception("Error processing fill", extra={"address": address})
                         
             # Handle order updates        
             if "orderUpdates" in data:
                 for update in data["orderUpdates"]:
-                    if not isinstance(update, dict):
+                    if not isinstance(update, (OrderUpdateRecord, dict)):
                         continue
                     try:
+                        started = time.perf_counter_ns()
+                        update = as_order_update_record(update)
+                        if update is None:
+                            continue
                         trades = self._process_order_update(update, address)
-                        if self.db:
-                            with self._db_lock:
-                                if "placed" in update:
-                                    self.db.store_order(update, "placed")
-                                elif "canceled" in update:
-                                    self.db.store_order(update, "canceled")
-                        if self.callback and not self.silent:
-                            for trade in trades:
-                                self.callback(trade)
-                    except Exception as e:
-                        if not self.silent:
-                            print(f"Error processing order update: {e}")
+                        self.order_book.apply_order_update(update, address)
+                        started = timings.record("normalize", started)
+                        if self.writer:
+                            self.writer.submit(
+                                self._order_job(update, address),
+                                key=(address, update.coin, "orders")
+                            )
+                            started = timings.record("db_write", started)
+                        for trade in trades:
+                            self.bus.publish("orders", trade)
+                        timings.record("callback", started)
+                    except Exception:
+                        logger.exception("Error processing order update", extra={"address": address})
+            
+            # Handle funding payments (userEvents sends one, userFundings a list),
+            # liquidations and the other ledger updates (deposits, withdrawals, transfers)
+            if "funding" in data:
+                self._handle_account_event(address, "funding", data["funding"])
+            for funding in data.get("fundings", ()):
+                self._handle_account_event(address, "funding", funding)
+            if "liquidation" in data:
+                self._handle_account_event(address, "liquidation", data["liquidation"])
+            for update in data.get("nonFundingLedgerUpdates", ()):
+                self._handle_account_event(address, "ledger", update)
         
         return handle_event
 
-    def _process_fill(self, fill: Dict, address: str) -> Trade:
+    def _handle_account_event(self, address: str, kind: str, item: Dict) -> None:
+        """Store and publish a funding payment, liquidation or ledger update"""
+        if not isinstance(item, dict):
+            return
+        try:
+            started = time.perf_counter_ns()
+            if kind == "funding" and isinstance(item.get("delta"), dict):
+                # The info endpoint's shape: {time, hash, delta: {type: "funding", coin, usdc, ...}}
+                item = {"time": item.get("time"), "hash": item.get("hash"), **item["delta"]}
+            record = {**item, "address": address, "network": self.network}
+            if kind == "liquidation":
+                # Liquidation events carry no time; use the time they were received
+                record.setdefault("time", int(time.time() * 1000))
+            event = self._process_account_event(record, kind)
+            time_ms = int(record.get("time", 0))
+            if kind == "funding":
+                event_id = ("funding", event.coin, time_ms)
+            elif kind == "liquidation":
+                event_id = ("liquidation", record.get("lid"))
+            else:
+                event_id = ("ledger", event.tx_hash, event.details.get("type"))
+            # Funding arrives on both userEvents and userFundings, and every subscription
+            # starts with a snapshot of recent events
+            if self._event_dedup.check(address, event_id, time_ms):
+                return
+            if self.writer:
+                self.writer.submit(self._account_event_job(record, kind), key=(address, event.coin, kind))
+            self.bus.publish("account_events", event)
+            self.timings.record("account_event", started)
+        except Exception:
+            logger.exception("Error processing %s event", kind, extra={"address": address})
+
+    def _process_account_event(self, record: Dict, kind: str) -> AccountEvent:
+        """Convert a funding payment, liquidation or ledger update to an AccountEvent"""
+        timestamp = datetime.fromtimestamp(int(record.get("time", 0)) / 1000)
+        address = record["address"]
+        if kind == "funding":
+            return AccountEvent(
+                timestamp=timestamp,
+                address=address,
+                event_type="FUNDING",
+                usdc=float(record.get("usdc", 0)),
+                coin=record.get("coin", "Unknown"),
+                tx_hash=record.get("hash"),
+                details={key: record[key] for key in ("szi", "fundingRate") if key in record},
+                network=self.network
+            )
+        if kind == "liquidation":
+            return AccountEvent(
+                timestamp=timestamp,
+                address=address,
+                event_type="LIQUIDATION",
+                details={key: value for key, value in record.items() if key not in ("address", "time", "network")},
+                network=self.network
+            )
+        delta = record.get("delta", {})
+        return AccountEvent(
+            timestamp=timestamp,
+            address=address,
+            event_type="LEDGER",
+            usdc=float(delta["usdc"]) if "usdc" in delta else None,
+            tx_hash=record.get("hash"),
+            details=delta,
+            network=self.network
+        )
+
+    def _in_snapshot(self, address: str, fill: FillRecord) -> bool:
+        """
+        Whether a fill is already part of a position seeded by bootstrap_snapshots(). The fills
+        sent on subscription (isSnapshot) reach back before the snapshot: they are stored, but
+        applying them would open the seeded position a second time, or close it with an old fill.
+        """
+        if not self._snapshot_times:
+            return False
+        snapshot_time = self._snapshot_times.get((address, fill.coin))
+        return snapshot_time is not None and fill.time <= snapshot_time
+
+    def _fill_job(self, fill: FillRecord, address: str, persist):
+        """
+        Writer job storing a fill, then the position change it caused, and the callback that
+        marks both as committed once the transaction is, or undoes them if it failed
+        """
+        finish = []
+        
+        def job(cursor) -> int:
+            fill_id = self.db.insert_fill(cursor, fill, address=address, network=self.network)
+            if persist:
+                commit = persist(cursor, fill_id)
+                if commit:
+                    finish.append(commit)
+            return fill_id
+        
+        def done(future: Future) -> None:
+            committed = future.exception() is None
+            for commit in finish:
+                commit(committed)
+            if committed:
+                self._committed_fills.add(address, fill.tid, fill.time)
+                return
+            # The fill isn't stored: let a resend of it through, and rebuild the address's
+            # positions from the database, which doesn't have this fill's change
+            self.dedup.discard(address, fill.tid)
+            if self.position_tracker:
+                self.position_tracker.reload([address])
+        return job, done
+
+    def _order_job(self, update: OrderUpdateRecord, address: str):
+        """Writer job storing an order update"""
+        def job(cursor) -> None:
+            self.db.insert_order(cursor, update, address=address, network=self.network)
+        return job
+
+    def _account_event_job(self, record: Dict, kind: str):
+        """Writer job storing an account event; new funding payments are charged to the open positions"""
+        def job(cursor) -> bool:
+            if kind == "funding":
+                stored = self.db.insert_funding(cursor, record)
+                if stored and self.position_tracker:
+                    self.position_tracker.apply_funding(cursor, record["address"], record.get("coin", "Unknown"),
+                                                        float(record.get("usdc", 0)))
+                return stored
+            if kind == "liquidation":
+                return self.db.insert_liquidation(cursor, record)
+            return self.db.insert_ledger_update(cursor, record)
+        return job
+
+    def checkpoint(self) -> Future:
+        """
+        Save a checkpoint of the monitor's committed state to checkpoint_path.
+        
+        The snapshot is taken on the writer thread, so it covers exactly the fills committed
+        before it, and written once that transaction commits.
+        
+        Returns:
+            Future: Resolves to the checkpoint path once the file is written
+        """
+        if not self.checkpoint_path:
+            raise ValueError("No checkpoint_path configured")
+        done: Future = Future()
+        
+        def write(job: Future) -> None:
+            try:
+                write_checkpoint(self.checkpoint_path, self._committed_state(job.result()))
+                done.set_result(self.checkpoint_path)
+            except Exception as e:
+                logger.exception("Error writing checkpoint", extra={"path": self.checkpoint_path})
+                done.set_exception(e)
+        
+        self.writer.submit(self._checkpoint_job, callback=write)
+        return done
+    
+    def _checkpoint_job(self, cursor) -> Checkpoint:
+        """Writer job reading the high-water marks; later jobs are covered by the tail replay"""
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM fills")
+        fill_high_water = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM positions")
+        position_high_water = cursor.fetchone()[0]
+        return Checkpoint(fill_high_water=fill_high_water, position_high_water=position_high_water)
+    
+    def _committed_state(self, checkpoint: Checkpoint) -> Checkpoint:
+        """
+        Add the committed in-memory state to a checkpoint job's result. Called from the job's
+        callback, which runs after the callbacks of the jobs before it and before those after it.
+        """
+        positions = self.position_tracker.persisted_positions() if self.position_tracker else {}
+        return replace(
+            checkpoint,
+            positions={address: [replace(p) for p in items] for address, items in positions.items()},
+            fills=self._committed_fills.to_dict()
+        )
+    
+    def restore_state(self) -> None:
+        """
+        Rebuild the in-memory state from the last checkpoint plus the rows committed after it.
+        
+        Without a checkpoint, the processed fills of each address are read back from the
+        database instead. Called by start() before subscribing.
+        """
+        if not self.db:
+            return
+        started = time.perf_counter()
+        checkpoint = None
+        if self.checkpoint_path:
+            try:
+                checkpoint = read_checkpoint(self.checkpoint_path)
+            except CheckpointError as e:
+                logger.warning("Ignoring checkpoint %s: %s", self.checkpoint_path, e)
+        
+        conn = self.db.conn
+        if checkpoint is None:
+            self._load_processed_fills(conn, self.addresses)
+            return
+        
+        self.dedup.load(checkpoint.fills)
+        self._committed_fills.load(checkpoint.fills)
+        self._load_processed_fills(conn, [a for a in self.addresses if a not in checkpoint.fills])
+        self._load_archive_floors(conn, [a for a in self.addresses if a in checkpoint.fills])
+        
+        # Replay the tail: fills committed after the checkpoint...
+        tail = 0
+        for address, tid, timestamp in conn.execute('''
+        SELECT address, tid, timestamp FROM fills WHERE id > ? AND network = ? ORDER BY id
+        ''', (checkpoint.fill_high_water, self.network)):
+            time_ms = _to_millis(timestamp)
+            self.dedup.add(address, tid, time_ms)
+            self._committed_fills.add(address, tid, time_ms)
+            tail += 1
+        
+        # ...and the positions opened or closed since, for the addresses in the checkpoint
+        positions = checkpoint.positions
+        if self.position_tracker:
+            checkpointed = [p.id for items in positions.values() for p in items]
+            # Positions closed since may also have been archived: keep those still open
+            still_open = set()
+            for start in range(0, len(checkpointed), 500):
+                ids = checkpointed[start:start + 500]
+                still_open.update(row[0] for row in conn.execute(
+                    f"SELECT id FROM positions WHERE id IN ({','.join('?' * len(ids))}) AND status = 'OPEN'",
+                    ids
+                ))
+            positions = {address: [p for p in items if p.id in still_open] for address, items in positions.items()}
+            for pos_id, address, coin, side, size, entry_price, entry_time, entry_fill_id in conn.execute('''
+            SELECT id, address, coin, side, size, entry_price, entry_time, entry_fill_id
+            FROM positions WHERE id > ? AND network = ? AND status = 'OPEN'
+            ''', (checkpoint.position_high_water, self.network)):
+                if address in positions:
+                    positions[address].append(Position(address, coin, side, size, entry_price,
+                                                       _parse_db_time(entry_time), entry_fill_id, id=pos_id))
+            self.position_tracker.restore(positions)
+        
+        logger.info("Restored checkpoint with %d open positions and a tail of %d fills in %.2fs",
+                    sum(len(p) for p in positions.values()), tail, time.perf_counter() - started)
+    
+    def _load_processed_fills(self, conn, addresses: List[str]) -> None:
+        """Read the most recent fills of addresses back into the fill deduplicators"""
+        for address in addresses:
+            rows = conn.execute('''
+            SELECT tid, timestamp FROM fills WHERE address = ? AND network = ?
+            ORDER BY timestamp DESC, id DESC LIMIT ?
+            ''', (address, self.network, self.dedup.window)).fetchall()
+            for tid, timestamp in reversed(rows):
+                time_ms = _to_millis(timestamp)
+                self.dedup.add(address, tid, time_ms)
+                self._committed_fills.add(address, tid, time_ms)
+        self._load_archive_floors(conn, addresses)
+    
+    def _load_archive_floors(self, conn, addresses: List[str]) -> None:
+        """
+        Treat the archived fills of addresses as processed. The fills table has no unique key, so
+        without this the snapshot re-sent on subscription would store them (and replay them into
+        the positions) again once they have left the table.
+        """
+        for address in addresses:
+            rows = archived_rows(conn, "fills", "tid", "timestamp", {"address": address, "network": self.network},
+                                 descending=True)
+            if rows is None:
+                return
+            newest = next(iter(rows), None)
+            if newest is not None:
+                time_ms = _to_millis(newest[1])
+                self.dedup.raise_floor(address, time_ms)
+                self._committed_fills.raise_floor(address, time_ms)
+    
+    def _run_checkpoints(self) -> None:
+        while not self._stop_event.wait(self.checkpoint_interval):
+            self.checkpoint()
+
+    def subscribe(self,
+                  topic: Topic,
+                  handler: Handler,
+                  name: Optional[str] = None,
+                  maxsize: int = 1000,
+                  overflow: OverflowPolicy = "drop_oldest",
+                  synchronous: bool = False) -> Subscription:
+        """
+        Subscribe to a topic of the monitor's event bus.
+        
+        Args:
+            topic: "fills", "orders", "position_closes" (fills that closed a position) or
+                "account_events" (funding payments, liquidations and ledger updates)
+            handler: Function called with each Trade
+            name: Optional subscriber name used in bus metrics
+            maxsize: Size of the subscriber's bounded queue
+            overflow: "drop_oldest", "drop_newest" or "block" when the queue is full
+            synchronous: Run the handler inline in the event handler instead of its own thread
+        
+        Subscribers receive events in silent mode too; silent only disables `callback`.
+        """
+        return self.bus.subscribe(topic, handler, name=name, maxsize=maxsize,
+                                  overflow=overflow, synchronous=synchronous)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8765) -> "QueryServer":
+        """
+        Start the embedded read-only query server in a background thread.
+        
+        Args:
+            host: Interface to bind
+            port: Port to bind, 0 picks a free port
+        
+        Returns:
+            QueryServer: The running server, stopped automatically on cleanup
+        """
+        from hyperliquid_monitor.server import QueryServer
+        if self.server is None:
+            self.server = QueryServer(self, host, port).start()
+        return self.server
+
+    def _handle_subscriber_error(self, name: str, error: Exception) -> None:
+        """Report an exception raised by a bus subscriber"""
+        logger.error("Error in subscriber %s: %s", name, error, exc_info=error)
+
+    def _invalidate_position_reads(self, keys) -> None:
+        """Drop the position tracker's cached reads for the fills and funding of a committed batch"""
+        if self.position_tracker:
+            for address, coin, kind in keys:
+                if kind in ("fills", "funding"):
+                    self.position_tracker.invalidate(address, coin)
+
+    def _handle_writer_error(self, error: Exception) -> None:
+        """Report a database write that failed in the writer thread"""
+        logger.error("Error storing trade: %s", error, exc_info=error)
+
+    def _process_fill(self, fill: Union[FillRecord, Dict], address: str) -> Trade:
         """Process fill information and return Trade object"""
-        timestamp = datetime.fromtimestamp(int(fill.get("time", 0)) / 1000)
+        fill = as_fill_record(fill)
         return Trade(
-            timestamp=timestamp,
+            timestamp=datetime.fromtimestamp(fill.time / 1000),
             address=address,
-            coin=fill.get("coin", "Unknown"),
-            side="BUY" if fill.get("side", "B") == "A" else "SELL",
-            size=float(fill.get("sz", 0)),
-            price=float(fill.get("px", 0)),
+            coin=fill.coin,
+            side="BUY" if fill.side == "A" else "SELL",
+            size=fill.sz,
+            price=fill.px,
             trade_type="FILL",
-            direction=fill.get("dir"),
-            tx_hash=fill.get("hash"),
-            fee=float(fill.get("fee", 0)),
-            fee_token=fill.get("feeToken"),
-            start_position=float(fill.get("startPosition", 0)),
-            closed_pnl=float(fill.get("closedPnl", 0))
+            direction=fill.dir,
+            tx_hash=fill.hash,
+            fee=fill.fee,
+            fee_token=fill.feeToken,
+            start_position=fill.startPosition,
+            closed_pnl=fill.closedPnl,
+            order_id=fill.oid,
+            network=self.network
         )
         
-    def _process_order_update(self, update: Dict, address: str) -> List[Trade]:
+    def _process_order_update(self, update: Union[OrderUpdateRecord, Dict], address: str) -> List[Trade]:
         """Process order update information and return Trade objects"""
-        timestamp = datetime.fromtimestamp(int(update.get("time", 0)) / 1000)
-        trades = []
+        update = as_order_update_record(update)
+        if update is None:
+            return []
+        return [Trade(
+            timestamp=datetime.fromtimestamp(update.time / 1000),
+            address=address,
+            coin=update.coin,
+            side="BUY" if update.side == "A" else "SELL",
+            size=update.sz,
+            price=update.px,
+            trade_type="ORDER_PLACED" if update.action == "placed" else "ORDER_CANCELLED",
+            order_id=update.oid,
+            network=self.network
+        )]
+
+    def seed_order_book(self) -> None:
+        """Seed the in-memory order book with a snapshot of each address's resting orders"""
+        source = self._open_orders_source or self.info.open_orders
+        for address in self.addresses:
+            try:
+                self.order_book.seed(address, source(address))
+            except Exception as e:
+                logger.warning("Error fetching open orders for %s: %s", address, e, extra={"address": address})
+
+    def bootstrap_snapshots(self, client: Optional[SnapshotClient] = None) -> Dict[str, AddressSnapshot]:
+        """
+        Seed the positions opened before monitoring began, and the resting orders, of every address.
         
-        if "placed" in update:
-            order = update["placed"]
-            trades.append(Trade(
-                timestamp=timestamp,
-                address=address,
-                coin=update.get("coin", "Unknown"),
-                side="BUY" if order.get("side", "B") == "A" else "SELL",
-                size=float(order.get("sz", 0)),
-                price=float(order.get("px", 0)),
-                trade_type="ORDER_PLACED",
-                order_id=int(order.get("oid", 0))
-            ))
-        elif "canceled" in update:
-            order = update["canceled"]
-            trades.append(Trade(
-                timestamp=timestamp,
-                address=address,
-                coin=update.get("coin", "Unknown"),
-                side="BUY" if order.get("side", "B") == "A" else "SELL",
-                size=float(order.get("sz", 0)),
-                price=float(order.get("px", 0)),
-                trade_type="ORDER_CANCELLED",
-                order_id=int(order.get("oid", 0))
-            ))
-            
-        return trades
+        The clearinghouse state (and open orders, unless an open_orders_source is configured) of
+        all addresses are fetched concurrently. Positions in coins without an open position in
+        the database are inserted in one transaction by the writer thread and loaded into the
+        in-memory books, so the first closing fill finds them. Called by start() with bootstrap.
+        
+        Args:
+            client: Optional client to fetch with, defaults to one for the monitor's network
+        
+        Returns:
+            Dict[str, AddressSnapshot]: The snapshot of each address
+        """
+        started = time.perf_counter()
+        own_client = client is None
+        if own_client:
+            client = SnapshotClient(self.api_url, workers=self.bootstrap_workers, rate=self.bootstrap_rate)
+        try:
+            snapshots = client.fetch(self.addresses, orders=self._open_orders_source is None)
+        finally:
+            if own_client:
+                client.close()
+        
+        for address, snapshot in snapshots.items():
+            if snapshot.error:
+                logger.warning("Error fetching the snapshot of %s: %s", address, snapshot.error,
+                               extra={"address": address})
+            if snapshot.open_orders is not None:
+                self.order_book.seed(address, snapshot.open_orders)
+        seeded: List[Position] = []
+        positions = {address: s.positions for address, s in snapshots.items() if s.positions}
+        if positions and self.writer and self.position_tracker:
+            seeded = self.writer.submit(lambda cursor: self.position_tracker.seed_positions(cursor, positions)).result()
+            self.position_tracker.reload(list(positions))
+            for position in seeded:
+                self._snapshot_times[(position.address, position.coin)] = int(position.entry_time.timestamp() * 1000)
+        logger.info("Bootstrapped %d addresses, seeding %d positions, in %.2fs", len(snapshots), len(seeded),
+                    time.perf_counter() - started)
+        return snapshots
+
+    def _handle_mids(self, event: Dict[str, Any]) -> None:
+        """Handle an allMids message: update prices and revalue open positions"""
+        mids = event.get("data", {}).get("mids") if isinstance(event, dict) else None
+        if not mids:
+            return
+        try:
+            if self.mtm:
+                self.mtm.on_prices(mids)
+            else:
+                self.prices.update(mids)
+        except Exception:
+            logger.exception("Error processing prices")
+
+    def get_open_positions(self, address: Optional[str] = None) -> List[Dict]:
+        """Get open positions with their mark price, unrealized PnL and notional (None until priced)"""
+        if not self.position_tracker:
+            return []
+        return [mark_position(p, self.prices) for p in self.position_tracker.get_open_positions(address)]
+
+    def get_unrealized_pnl(self, address: str) -> Dict:
+        """
+        Get the live unrealized PnL and notional of an address, in total and per coin.
+        
+        Raises:
+            ValueError: If the monitor was created without mark_to_market
+        """
+        if not self.mtm:
+            raise ValueError("Mark-to-market is not enabled")
+        return self.mtm.get_unrealized(address)
+
+    def get_portfolio(self, name: str) -> Dict:
+        """
+        Get the net position per coin, exposure and aggregate PnL of a portfolio.
+        
+        Raises:
+            ValueError: If the monitor was created without portfolios
+            KeyError: If there is no such portfolio
+        """
+        if not self.portfolios:
+            raise ValueError("Portfolios are not enabled")
+        return self.portfolios.get_portfolio(name)
+
+    def seed_portfolios(self) -> None:
+        """Load the open positions and the realized PnL, fees and funding recorded so far into the portfolios"""
+        if not self.portfolios:
+            return
+        members = set().union(*self.portfolios.groups().values())
+        for address in members:
+            for coin, totals in self.db.get_realized_totals(address, self.network).items():
+                self.portfolios.add_realized(address, coin, totals['realized_pnl'], totals['fees'], totals['funding'])
+        self.position_tracker.load(sorted(members))
+
+    def memory_report(self) -> MemoryReport:
+        """
+        Log and return the RSS and, when memory reporting is enabled, the top allocation sites
+        and their growth since the previous report.
+        """
+        if self.memory:
+            return self.memory.report()
+        return MemoryMonitor().report()
+
+    def get_stage_timings(self) -> Dict[str, StageStats]:
+        """
+        Time spent so far in each ingest stage: decode (with fast_decode), normalize, position,
+        db_write (queueing for the writer), db_commit (writer thread, per batch), callback
+        (synchronous subscribers) and account_event.
+        """
+        return self.timings.snapshot()
+
+    def profile(self, seconds: Optional[float] = None, path: Optional[str] = None) -> str:
+        """
+        Sample the stacks of all threads for a while, without stopping the monitor, and write
+        them as a flamegraph-compatible collapsed-stack file.
+        
+        Args:
+            seconds: Duration, defaults to profile_seconds
+            path: Output file, defaults to a timestamped file in profile_dir (or the working directory)
+        
+        Returns:
+            str: Path the profile will be written to once it finishes
+        
+        Raises:
+            RuntimeError: If a profile is already running
+        """
+        if path is None:
+            name = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.collapsed"
+            path = os.path.join(self.profile_dir or ".", name)
+        self.profiler.start(seconds or self.profile_seconds, path)
+        logger.info("Profiling for %s seconds into %s", seconds or self.profile_seconds, path)
+        return path
+
+    def _handle_profile_signal(self, signum=None, frame=None) -> None:
+        try:
+            self.profile()
+        except RuntimeError:
+            logger.warning("A profile is already running")
+
+    def get_open_orders(self, address: str, coin: Optional[str] = None) -> List[OpenOrder]:
+        """Get the resting orders of an address from the in-memory order book"""
+        return self.order_book.get_open_orders(address, coin)
             
     def start(self) -> None:
         """Start monitoring addresses"""
@@ -205,6 +879,44 @@ class HyperliquidMonitor:
         # Set up signal handlers
         signal.signal(signal.SIGINT, self.handle_shutdown)
         signal.signal(signal.SIGTERM, self.handle_shutdown)
+        if self.profile_dir and hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._handle_profile_signal)
+        
+        self.start_pipeline()
+        
+        try:
+            while not self._stop_event.is_set():
+                self._stop_event.wait(1)
+        except KeyboardInterrupt:
+            self.handle_shutdown()
+
+    def start_pipeline(self, snapshot_client: Optional[SnapshotClient] = None) -> None:
+        """
+        Restore state and subscribe to the events of every address, without blocking or
+        installing signal handlers; events are then handled on the SDK's websocket thread.
+        
+        Args:
+            snapshot_client: Optional client for the bootstrap snapshots (see bootstrap_snapshots())
+        """
+        # Seed before subscribing so live updates are applied on top of the snapshot
+        if not self.bootstrap or self._open_orders_source:
+            self.seed_order_book()
+        self.restore_state()
+        if self.bootstrap:
+            self.bootstrap_snapshots(snapshot_client)
+        if self.memory:
+            self.memory.start()
+        if self.checkpoint_path:
+            threading.Thread(target=self._run_checkpoints, name="checkpoints", daemon=True).start()
+        self.seed_portfolios()
+        if self.mtm:
+            # Value every open position from the first tick, not only those touched by a fill
+            self.position_tracker.load(self.addresses)
+        if self.mtm or self.portfolios:
+            self.info.subscribe({"type": "allMids"}, self._handle_mids)
+        
+        if self.fast_decode:
+            install_fast_decoder(self.info.ws_manager, self.timings)
         
         # Subscribe to events for each address
         for address in self.addresses:
@@ -217,12 +929,14 @@ class HyperliquidMonitor:
                 {"type": "userFills", "user": address},
                 handler
             )
-        
-        try:
-            while not self._stop_event.is_set():
-                self._stop_event.wait(1)
-        except KeyboardInterrupt:
-            self.handle_shutdown()
+            self.info.subscribe(
+                {"type": "userFundings", "user": address},
+                handler
+            )
+            self.info.subscribe(
+                {"type": "userNonFundingLedgerUpdates", "user": address},
+                handler
+            )
 
     def stop(self):
         """Stop the monitor"""
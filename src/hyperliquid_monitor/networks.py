@@ -0,0 +1,223 @@
+import logging
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from hyperliquid.utils import constants
+
+from hyperliquid_monitor.bootstrap import SnapshotClient
+from hyperliquid_monitor.bus import Handler, Subscription, Topic
+from hyperliquid_monitor.memory import MemoryMonitor, MemoryReport
+from hyperliquid_monitor.profiling import SamplingProfiler, StageStats, StageTimings
+from hyperliquid_monitor.writer import WriterMetrics
+
+if TYPE_CHECKING:
+    from hyperliquid_monitor.monitor import HyperliquidMonitor
+
+logger = logging.getLogger(__name__)
+
+# API URL of each known network; other networks (e.g. a stub in CI) need an explicit URL
+NETWORKS = {
+    "mainnet": constants.MAINNET_API_URL,
+    "testnet": constants.TESTNET_API_URL,
+    "local": constants.LOCAL_API_URL,
+}
+
+def network_url(network: str, api_url: Optional[str] = None) -> str:
+    """
+    API URL of a network: api_url if given, otherwise the known URL of the network.
+
+    Raises:
+        ValueError: If the network is unknown and no api_url is given
+    """
+    if api_url:
+        return api_url.rstrip("/")
+    try:
+        return NETWORKS[network]
+    except KeyError:
+        raise ValueError(f"Unknown network {network!r}: pass its api_url, "
+                         f"or use one of {', '.join(NETWORKS)}") from None
+
+class MultiNetworkMonitor:
+    def __init__(self,
+                 networks: Dict[str, List[str]],
+                 db_path: Optional[str] = None,
+                 api_urls: Optional[Dict[str, str]] = None,
+                 checkpoint_path: Optional[str] = None,
+                 memory_report_interval: Optional[float] = None,
+                 memory_limit_mb: Optional[float] = None,
+                 profile_dir: Optional[str] = None,
+                 profile_seconds: float = 30.0,
+                 bootstrap_workers: int = 8,
+                 **options: Any):
+        """
+        Monitor addresses on several networks at once, e.g. mainnet and testnet, into one database.
+
+        Each network gets its own HyperliquidMonitor: its own websocket connection, dedup window,
+        position books, event bus and writer thread, so an event of one network can never be
+        applied to the state of another. Every row is tagged with its network, and reads can be
+        filtered by it. What isn't per-network state is shared: the stage timings, the bootstrap
+        thread pool, memory reporting and the sampling profiler.
+
+        Args:
+            networks: Addresses to monitor per network name (see NETWORKS)
+            db_path: Optional path to the SQLite database shared by all networks
+            api_urls: Optional API URL per network, required for networks not in NETWORKS
+            checkpoint_path: Optional checkpoint path; each network checkpoints to its own file,
+                   e.g. state.testnet.json for state.json
+            memory_report_interval: Optional number of seconds between memory reports
+            memory_limit_mb: Optional RSS above which memory reports are logged as warnings
+            profile_dir: Optional directory for sampling profiles, taken on SIGUSR1
+            profile_seconds: Default duration of a sampling profile
+            bootstrap_workers: Size of the thread pool shared by the bootstrap snapshots of all
+                   networks
+            **options: Other HyperliquidMonitor arguments, applied to every network
+
+        Raises:
+            ValueError: If no network is given, or a network has no known or given API URL
+        """
+        from hyperliquid_monitor.monitor import HyperliquidMonitor
+
+        if not networks:
+            raise ValueError("No networks configured to monitor")
+        api_urls = api_urls or {}
+        self.timings = StageTimings()
+        self.profiler = SamplingProfiler()
+        self.profile_dir = profile_dir
+        self.profile_seconds = profile_seconds
+        self.memory = MemoryMonitor(
+            memory_report_interval,
+            rss_limit=int(memory_limit_mb * 1024 * 1024) if memory_limit_mb else None
+        ) if memory_report_interval else None
+        self._bootstrap_pool: Optional[ThreadPoolExecutor] = None
+        if options.get("bootstrap"):
+            self._bootstrap_pool = ThreadPoolExecutor(bootstrap_workers, thread_name_prefix="bootstrap")
+        self._stop_event = threading.Event()
+
+        self.monitors: Dict[str, "HyperliquidMonitor"] = {}
+        for network, addresses in networks.items():
+            self.monitors[network] = HyperliquidMonitor(
+                addresses,
+                db_path=db_path,
+                network=network,
+                api_url=api_urls.get(network),
+                checkpoint_path=self._checkpoint_path(checkpoint_path, network),
+                timings=self.timings,
+                bootstrap_workers=bootstrap_workers,
+                **options
+            )
+
+    @staticmethod
+    def _checkpoint_path(checkpoint_path: Optional[str], network: str) -> Optional[str]:
+        if not checkpoint_path:
+            return None
+        path = Path(checkpoint_path)
+        return str(path.with_name(f"{path.stem}.{network}{path.suffix}"))
+
+    def start_pipelines(self) -> None:
+        """Restore state and subscribe on every network, without blocking"""
+        if self.memory:
+            self.memory.start()
+        for network, monitor in self.monitors.items():
+            client = None
+            if monitor.bootstrap:
+                client = SnapshotClient(monitor.api_url, workers=monitor.bootstrap_workers,
+                                        rate=monitor.bootstrap_rate, executor=self._bootstrap_pool)
+            try:
+                monitor.start_pipeline(client)
+            finally:
+                if client:
+                    client.close()
+            logger.info("Monitoring %d addresses on %s", len(monitor.addresses), network)
+
+    def start(self) -> None:
+        """Start monitoring every network, until stopped or interrupted"""
+        if not any(monitor.addresses for monitor in self.monitors.values()):
+            raise ValueError("No addresses configured to monitor")
+
+        signal.signal(signal.SIGINT, self.handle_shutdown)
+        signal.signal(signal.SIGTERM, self.handle_shutdown)
+        if self.profile_dir and hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._handle_profile_signal)
+
+        self.start_pipelines()
+
+        try:
+            while not self._stop_event.is_set():
+                self._stop_event.wait(1)
+        except KeyboardInterrupt:
+            self.handle_shutdown()
+
+    def handle_shutdown(self, signum=None, frame=None):
+        """Handle shutdown signals"""
+        if self._stop_event.is_set():
+            sys.exit(0)
+
+        logger.info("Shutting down gracefully...")
+        self.stop()
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        sys.exit(0)
+
+    def stop(self) -> None:
+        """Stop monitoring every network"""
+        self._stop_event.set()
+        self.cleanup()
+
+    def cleanup(self) -> None:
+        """Clean up the resources of every network, then the shared ones"""
+        for monitor in self.monitors.values():
+            monitor.stop()
+        if self.memory:
+            self.memory.stop()
+        if self._bootstrap_pool:
+            self._bootstrap_pool.shutdown(wait=True)
+            self._bootstrap_pool = None
+
+    def subscribe(self, topic: Topic, handler: Handler, **kwargs: Any) -> List[Subscription]:
+        """
+        Subscribe a handler to a topic on every network (see HyperliquidMonitor.subscribe()).
+        Events carry their network, so one handler can tell them apart.
+
+        Returns:
+            List[Subscription]: One subscription per network
+        """
+        return [monitor.subscribe(topic, handler, **kwargs) for monitor in self.monitors.values()]
+
+    def get_stage_timings(self) -> Dict[str, StageStats]:
+        """Time spent so far in each ingest stage, summed over all networks"""
+        return self.timings.snapshot()
+
+    def writer_metrics(self) -> Dict[str, WriterMetrics]:
+        """Metrics of the writer thread of each network"""
+        return {network: monitor.writer.metrics()
+                for network, monitor in self.monitors.items() if monitor.writer}
+
+    def memory_report(self) -> MemoryReport:
+        """Log and return the RSS and, when memory reporting is enabled, the top allocation sites"""
+        if self.memory:
+            return self.memory.report()
+        return MemoryMonitor().report()
+
+    def profile(self, seconds: Optional[float] = None, path: Optional[str] = None) -> str:
+        """
+        Sample the stacks of all threads, of every network, into a collapsed-stack file
+        (see HyperliquidMonitor.profile()).
+        """
+        if path is None:
+            name = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.collapsed"
+            path = os.path.join(self.profile_dir or ".", name)
+        self.profiler.start(seconds or self.profile_seconds, path)
+        logger.info("Profiling for %s seconds into %s", seconds or self.profile_seconds, path)
+        return path
+
+    def _handle_profile_signal(self, signum=None, frame=None) -> None:
+        try:
+            self.profile()
+        except RuntimeError:
+            logger.warning("A profile is already running")
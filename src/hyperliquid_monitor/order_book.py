@@ -0,0 +1,138 @@
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Union
+
+from hyperliquid_monitor.decoding import FillRecord, OrderUpdateRecord, as_fill_record, as_order_update_record
+
+# Snapshot source returning the resting orders of an address in the `openOrders` info format
+OpenOrdersSource = Callable[[str], List[Dict]]
+
+# Remaining sizes below this are treated as fully filled
+_SIZE_EPSILON = 1e-9
+
+@dataclass
+class OpenOrder:
+    address: str
+    coin: str
+    oid: int
+    side: str  # "BUY" or "SELL"
+    size: float  # remaining size
+    price: float
+    timestamp: datetime
+    orig_size: float
+
+class OrderBook:
+    """In-memory book of resting orders, indexed by address, coin and oid."""
+
+    def __init__(self):
+        # address -> coin -> oid -> order
+        self._books: Dict[str, Dict[str, Dict[int, OpenOrder]]] = {}
+        # address -> oid -> coin, so fills and cancels find their order without scanning coins
+        self._coins: Dict[str, Dict[int, str]] = {}
+        self._lock = threading.Lock()
+
+    def seed(self, address: str, snapshot: List[Dict]) -> None:
+        """
+        Replace the book for an address with a snapshot of its resting orders.
+
+        Args:
+            address: Address the snapshot belongs to
+            snapshot: Orders as returned by the `openOrders` info endpoint
+                     (coin, limitPx, oid, side, sz, timestamp)
+        """
+        book: Dict[str, Dict[int, OpenOrder]] = {}
+        coins: Dict[int, str] = {}
+        for entry in snapshot:
+            order = OpenOrder(
+                address=address,
+                coin=entry.get("coin", "Unknown"),
+                oid=int(entry.get("oid", 0)),
+                side="BUY" if entry.get("side", "B") == "A" else "SELL",
+                size=float(entry.get("sz", 0)),
+                price=float(entry.get("limitPx", entry.get("px", 0))),
+                timestamp=datetime.fromtimestamp(int(entry.get("timestamp", 0)) / 1000),
+                orig_size=float(entry.get("origSz", entry.get("sz", 0)))
+            )
+            book.setdefault(order.coin, {})[order.oid] = order
+            coins[order.oid] = order.coin
+
+        with self._lock:
+            self._books[address] = book
+            self._coins[address] = coins
+
+    def apply_order_update(self, update: Union[OrderUpdateRecord, Dict], address: str) -> None:
+        """Apply a `placed` or `canceled` order update."""
+        update = as_order_update_record(update)
+        if update is None:
+            return
+        if update.action == "placed":
+            order = OpenOrder(
+                address=address,
+                coin=update.coin,
+                oid=update.oid,
+                side="BUY" if update.side == "A" else "SELL",
+                size=update.sz,
+                price=update.px,
+                timestamp=datetime.fromtimestamp(update.time / 1000),
+                orig_size=update.sz
+            )
+            with self._lock:
+                self._books.setdefault(address, {}).setdefault(order.coin, {})[order.oid] = order
+                self._coins.setdefault(address, {})[order.oid] = order.coin
+        else:
+            with self._lock:
+                self._remove(address, update.oid)
+
+    def apply_fill(self, fill: Union[FillRecord, Dict], address: str) -> None:
+        """Reduce the remaining size of the order a fill belongs to."""
+        fill = as_fill_record(fill)
+        oid = fill.oid
+        if oid is None:
+            return
+
+        with self._lock:
+            coin = self._coins.get(address, {}).get(oid)
+            if coin is None:
+                return
+            order = self._books[address][coin][oid]
+            order.size -= fill.sz
+            if order.size <= _SIZE_EPSILON:
+                self._remove(address, oid)
+
+    def _remove(self, address: str, oid: int) -> None:
+        """Remove an order from the book. Caller must hold the lock."""
+        coin = self._coins.get(address, {}).pop(oid, None)
+        if coin is None:
+            return
+        orders = self._books[address][coin]
+        orders.pop(oid, None)
+        if not orders:
+            del self._books[address][coin]
+
+    def get_open_orders(self, address: str, coin: Optional[str] = None) -> List[OpenOrder]:
+        """
+        Get the resting orders of an address, optionally for a single coin.
+
+        The orders are copies: fills applied afterwards don't change them.
+        """
+        with self._lock:
+            book = self._books.get(address)
+            if not book:
+                return []
+            if coin is not None:
+                return [replace(order) for order in book.get(coin, {}).values()]
+            return [replace(order) for orders in book.values() for order in orders.values()]
+
+    def get_order(self, address: str, oid: int) -> Optional[OpenOrder]:
+        """Get a copy of a single resting order by oid."""
+        with self._lock:
+            coin = self._coins.get(address, {}).get(oid)
+            return replace(self._books[address][coin][oid]) if coin is not None else None
+
+    def order_count(self, address: Optional[str] = None) -> int:
+        """Number of resting orders for an address, or across all addresses."""
+        with self._lock:
+            if address is not None:
+                return len(self._coins.get(address, {}))
+            return sum(len(coins) for coins in self._coins.values())
@@ -0,0 +1,169 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from hyperliquid_monitor.position_tracker import Position
+from hyperliquid_monitor.pricing import PriceCache
+from hyperliquid_monitor.types import AccountEvent, Trade
+
+class _Totals:
+    """Running sums over the open positions and the realized results in one coin"""
+    __slots__ = ("net_size", "cost", "gross_size", "positions", "realized_pnl", "fees", "funding")
+
+    def __init__(self):
+        self.net_size = 0.0  # Long size minus short size
+        self.cost = 0.0  # Sum of signed size * entry price
+        self.gross_size = 0.0
+        self.positions = 0
+        self.realized_pnl = 0.0
+        self.fees = 0.0
+        self.funding = 0.0
+
+    def add(self, other: "_Totals", sign: int = 1) -> None:
+        for name in _Totals.__slots__:
+            setattr(self, name, getattr(self, name) + sign * getattr(other, name))
+
+class PortfolioTracker:
+    def __init__(self, groups: Optional[Dict[str, Iterable[str]]] = None, prices: Optional[PriceCache] = None):
+        """
+        Net positions, PnL and exposure of named groups of addresses, kept in memory.
+
+        Every change (a position opened or closed, a fill's realized PnL and fee, a funding
+        payment) is applied to the running per-coin totals of the address and of each group
+        containing it, so reading a group costs O(coins) however many addresses and positions it
+        holds. Totals are kept for every address seen, so groups can be added at any time.
+
+        Args:
+            groups: Optional group name -> addresses
+            prices: Optional price cache used to value the open positions
+        """
+        self.prices = prices
+        self._addresses: Dict[str, Dict[str, _Totals]] = {}  # address -> coin -> totals
+        self._groups: Dict[str, Dict[str, _Totals]] = {}  # group -> coin -> totals
+        self._members: Dict[str, Set[str]] = {}  # group -> addresses
+        self._address_groups: Dict[str, Set[str]] = {}  # address -> groups
+        self._lock = threading.Lock()
+        for name, addresses in (groups or {}).items():
+            self.add_group(name, addresses)
+
+    def add_group(self, name: str, addresses: Iterable[str]) -> None:
+        """Create or replace a group, with the totals its addresses have accumulated so far"""
+        with self._lock:
+            self._remove_group(name)
+            members = set(addresses)
+            totals: Dict[str, _Totals] = {}
+            for address in members:
+                self._address_groups.setdefault(address, set()).add(name)
+                for coin, address_totals in self._addresses.get(address, {}).items():
+                    totals.setdefault(coin, _Totals()).add(address_totals)
+            self._members[name] = members
+            self._groups[name] = totals
+
+    def remove_group(self, name: str) -> None:
+        with self._lock:
+            self._remove_group(name)
+
+    def _remove_group(self, name: str) -> None:
+        for address in self._members.pop(name, ()):
+            self._address_groups[address].discard(name)
+        self._groups.pop(name, None)
+
+    def groups(self) -> Dict[str, List[str]]:
+        with self._lock:
+            return {name: sorted(members) for name, members in self._members.items()}
+
+    def _apply(self, address: str, coin: str, delta: _Totals) -> None:
+        """Add a change to the totals of the address and its groups. Caller must hold the lock."""
+        self._addresses.setdefault(address, {}).setdefault(coin, _Totals()).add(delta)
+        for name in self._address_groups.get(address, ()):
+            self._groups[name].setdefault(coin, _Totals()).add(delta)
+
+    def on_position_change(self, event: str, position: Position) -> None:
+        """PositionTracker listener"""
+        sign = 1 if event == "open" else -1
+        signed_size = position.size if position.side == 'LONG' else -position.size
+        delta = _Totals()
+        delta.net_size = sign * signed_size
+        delta.cost = sign * signed_size * position.entry_price
+        delta.gross_size = sign * position.size
+        delta.positions = sign
+        with self._lock:
+            self._apply(position.address, position.coin, delta)
+
+    def on_fill(self, trade: Trade) -> None:
+        """Bus subscriber for fills: realized PnL and fees"""
+        delta = _Totals()
+        delta.realized_pnl = trade.closed_pnl or 0.0
+        delta.fees = trade.fee or 0.0
+        with self._lock:
+            self._apply(trade.address, trade.coin, delta)
+
+    def on_account_event(self, event: AccountEvent) -> None:
+        """Bus subscriber for account events: funding payments"""
+        if event.event_type != "FUNDING" or event.usdc is None:
+            return
+        delta = _Totals()
+        delta.funding = event.usdc
+        with self._lock:
+            self._apply(event.address, event.coin, delta)
+
+    def add_realized(self, address: str, coin: str, pnl: float = 0.0, fees: float = 0.0, funding: float = 0.0) -> None:
+        """Seed the realized results of an address recorded before the tracker started"""
+        delta = _Totals()
+        delta.realized_pnl = pnl
+        delta.fees = fees
+        delta.funding = funding
+        with self._lock:
+            self._apply(address, coin, delta)
+
+    def get_portfolio(self, name: str) -> Dict:
+        """
+        Net position, exposure and PnL of a group.
+
+        Returns:
+            Dict with totals and a per-coin breakdown. Unrealized PnL and notional are None for
+            coins without a price (and left out of the totals).
+
+        Raises:
+            KeyError: If there is no such group
+        """
+        with self._lock:
+            if name not in self._members:
+                raise KeyError(f"Unknown portfolio: {name}")
+            totals = {coin: (t.net_size, t.cost, t.gross_size, t.positions, t.realized_pnl, t.fees, t.funding)
+                      for coin, t in self._groups[name].items()}
+            address_count = len(self._members[name])
+
+        coins = {}
+        for coin, (net_size, cost, gross_size, positions, realized_pnl, fees, funding) in totals.items():
+            if not positions:
+                net_size = cost = gross_size = 0.0  # Drop the rounding left over from closed positions
+            price = self.prices.get(coin) if self.prices else None
+            coins[coin] = {
+                'net_size': net_size,
+                'avg_entry_price': cost / net_size if net_size else None,
+                'gross_size': gross_size,
+                'open_positions': positions,
+                'mark_price': price,
+                'unrealized_pnl': price * net_size - cost if price is not None else None,
+                'notional': price * gross_size if price is not None else None,
+                'net_notional': price * net_size if price is not None else None,
+                'realized_pnl': realized_pnl,
+                'fees': fees,
+                'funding': funding
+            }
+        realized = sum(c['realized_pnl'] for c in coins.values())
+        fees = sum(c['fees'] for c in coins.values())
+        funding = sum(c['funding'] for c in coins.values())
+        unrealized = sum(c['unrealized_pnl'] for c in coins.values() if c['unrealized_pnl'] is not None)
+        return {
+            'name': name,
+            'addresses': address_count,
+            'realized_pnl': realized,
+            'fees': fees,
+            'funding': funding,
+            'unrealized_pnl': unrealized,
+            'net_pnl': realized - fees + funding + unrealized,
+            'gross_notional': sum(c['notional'] for c in coins.values() if c['notional'] is not None),
+            'net_notional': sum(c['net_notional'] for c in coins.values() if c['net_notional'] is not None),
+            'coins': coins
+        }
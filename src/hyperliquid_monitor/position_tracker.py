@@ -1,7 +1,50 @@
+import heapq
+import logging
 import sqlite3
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List, Tuple
+from typing import Callable, Dict, Iterator, Optional, List, Tuple, Union
 from dataclasses import dataclass
+from itertools import chain
+
+from hyperliquid_monitor.cache import CacheStats, LRUCache
+from hyperliquid_monitor.database import NETWORK_COLUMN, _ensure_columns, _network_clause
+from hyperliquid_monitor.decoding import FillRecord, as_fill_record
+from hyperliquid_monitor.archive import archived_rows
+from hyperliquid_monitor.query import fetch_page, iter_rows
+from hyperliquid_monitor.types import DEFAULT_NETWORK, Page
+
+logger = logging.getLogger(__name__)
+
+# Columns following (id, exit_time) in position history queries
+_HISTORY_COLUMNS = ("address, coin, side, size, entry_price, entry_time, exit_price, duration_seconds, pnl, funding, "
+                    "notional, fees, net_pnl, network")
+
+# Columns get_ranked_positions can order by, each backed by an (address, column) index
+RANK_COLUMNS = ("net_pnl", "notional", "duration_seconds")
+
+# Called with True once the transaction a position change was written in commits, False if it
+# was rolled back
+CommitFunction = Callable[[bool], None]
+
+# Writes a position change given a cursor and the row id of the fill that caused it. Returns the
+# function that marks the change as committed, or None when there is nothing to mark
+PersistFunction = Callable[[sqlite3.Cursor, int], Optional[CommitFunction]]
+
+# entry_fill_id of positions seeded from an exchange snapshot rather than opened by a recorded fill
+SNAPSHOT_FILL_ID = 0
+
+# Called with "open" or "close" and the position whenever the in-memory book changes
+PositionListener = Callable[[str, "Position"], None]
+
+def _persist_nothing(cursor: sqlite3.Cursor, fill_id: int) -> None:
+    return None
+
+def _parse_time(value) -> datetime:
+    """Parse a DATETIME column value, with or without a 'T' separator or fractional seconds"""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace('Z', '+00:00').replace('+00:00', ''))
 
 @dataclass
 class Position:
@@ -11,11 +54,37 @@ class Position:
     size: float
     entry_price: float
     entry_time: datetime
-    entry_fill_id: int
+    entry_fill_id: Optional[int]
+    id: Optional[int] = None  # Row id, set once the position is persisted
 
 class PositionTracker:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, cache_size: int = 256, network: str = DEFAULT_NETWORK):
+        """
+        Track positions opened and closed by fills.
+        
+        Args:
+            db_path: Path to the SQLite database
+            cache_size: Maximum number of cached get_open_positions/get_position_history
+                       results, 0 disables the cache
+            network: Network whose positions are tracked. Positions are recorded under it and
+                    every query reads only its positions, so trackers of several networks can
+                    share a database.
+        """
         self.db_path = db_path
+        self.network = network
+        # Read-through cache of query results, tagged by address and (address, coin) so an
+        # ingest only drops the entries it can change
+        self._cache = LRUCache(cache_size) if cache_size else None
+        # Bumped on every invalidation so a result read across a write isn't cached
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        # address -> (coin, side) -> open positions, oldest first
+        self._books: Dict[str, Dict[Tuple[str, str], List[Position]]] = {}
+        # address -> row id -> open position, as committed: only changed once the transaction of a
+        # persist function commits, so it matches the database (used for checkpoints)
+        self._persisted: Dict[str, Dict[int, Position]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._listeners: List[PositionListener] = []
         self._init_position_table()
     
     def _init_position_table(self):
@@ -45,7 +114,27 @@ class PositionTracker:
             FOREIGN KEY (exit_fill_id) REFERENCES fills(id)
         )
         ''')
-        
+        # Funding paid (negative) or received while the position was open
+        _ensure_columns(cursor, "positions", {"funding": "REAL DEFAULT 0"})
+        # Derived at ingest: notional = size * entry_price, fees = the fees of the entry and exit
+        # fills, net_pnl = pnl + funding - fees once closed
+        added = _ensure_columns(cursor, "positions", {"notional": "REAL", "fees": "REAL DEFAULT 0", "net_pnl": "REAL"})
+        if added and cursor.execute("SELECT 1 FROM positions LIMIT 1").fetchone():
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fills'")
+            if cursor.fetchone():
+                cursor.execute('''
+                UPDATE positions SET
+                    fees = COALESCE((SELECT fee FROM fills WHERE fills.id = positions.entry_fill_id), 0)
+                         + COALESCE((SELECT fee FROM fills WHERE fills.id = positions.exit_fill_id), 0)
+                ''')
+            cursor.execute("UPDATE positions SET notional = size * entry_price")
+            cursor.execute('''
+            UPDATE positions SET net_pnl = COALESCE(pnl, 0) + COALESCE(funding, 0) - fees
+            WHERE status = 'CLOSED'
+            ''')
+            logger.info("Backfilled notional, fees and net_pnl of %d positions", cursor.rowcount)
+        _ensure_columns(cursor, "positions", {"network": NETWORK_COLUMN})
+
         # Create indexes
         cursor.execute('''
         CREATE INDEX IF NOT EXISTS idx_positions_address_coin ON positions(address, coin)
@@ -56,6 +145,16 @@ class PositionTracker:
         cursor.execute('''
         CREATE INDEX IF NOT EXISTS idx_positions_entry_time ON positions(entry_time)
         ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_positions_address_exit_time ON positions(address, exit_time)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_positions_network_address_exit_time ON positions(network, address, exit_time)
+        ''')
+        for column in RANK_COLUMNS:
+            cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_positions_address_{column} ON positions(address, {column})
+            ''')
         
         conn.commit()
         conn.close()
@@ -65,129 +164,322 @@ class PositionTracker:
         Process a fill and update position tracking
         Returns position info if a position was closed
         """
-        direction = fill_data.get('dir', '')
+        result, persist = self.apply_fill(fill_data)
         address = fill_data.get('address', 'Unknown')
-        coin = fill_data.get('coin', 'Unknown')
-        timestamp = datetime.fromtimestamp(int(fill_data.get('time', 0)) / 1000)
-        price = float(fill_data.get('px', 0))
-        size = float(fill_data.get('sz', 0))
-        side = "BUY" if fill_data.get('side', 'B') == 'A' else "SELL"
         
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        
-        result = None
+        finish = None
         
         try:
+            finish = persist(cursor, fill_id)
+            conn.commit()
+            if finish:
+                finish(True)
+            self.invalidate(address, fill_data.get('coin', 'Unknown'))
+        
+        except Exception:
+            conn.rollback()
+            if finish:
+                finish(False)
+            self.reload([address])
+            logger.exception("Error processing position", extra={"address": address})
+        
+        finally:
+            conn.close()
+        
+        return result
+    
+    def apply_fill(self, fill_data: Union[FillRecord, Dict],
+                   address: Optional[str] = None) -> Tuple[Optional[Dict], PersistFunction]:
+        """
+        Update the in-memory positions of the fill's address.
+        
+        The fill is a FillRecord, or a fill dict carrying its address; address overrides it.
+        
+        Only the address's own lock is taken, so fills of different addresses are processed
+        in parallel. Nothing is written to the database: the returned function persists the
+        change and must be called with a cursor and the fill's row id, in fill order (the
+        DatabaseWriter guarantees this). The function it returns, if any, must be called once
+        the transaction has committed or been rolled back; after a rollback, reload() the
+        address so its in-memory positions match the database again.
+        
+        Returns:
+            Tuple of the closed position info (or None) and the persist function. The info's
+            position_id is the position's row id, or None if the write that opens the position
+            hasn't committed yet (positions are written by the writer thread, shortly after).
+        """
+        if address is None:
+            address = fill_data.get('address', 'Unknown') if isinstance(fill_data, dict) else 'Unknown'
+        fill = as_fill_record(fill_data)
+        direction = fill.dir or ''
+        coin = fill.coin
+        timestamp = datetime.fromtimestamp(fill.time / 1000)
+        price = fill.px
+        size = fill.sz
+        fee = fill.fee
+        
+        with self._address_lock(address):
+            book = self._book(address)
+            
             # Handle position opening
             if 'Open' in direction:
                 position_side = 'LONG' if 'Long' in direction else 'SHORT'
-                self._open_position(cursor, address, coin, position_side, size, price, timestamp, fill_id)
+                return None, self._open_position(book, address, coin, position_side, size, price, timestamp, fee)
             
             # Handle position closing
-            elif 'Close' in direction:
-                pnl = float(fill_data.get('closedPnl', 0))
-                result = self._close_position(cursor, address, coin, direction, size, price, timestamp, fill_id, pnl)
+            if 'Close' in direction:
+                return self._close_position(book, address, coin, direction, price, timestamp, fill.closedPnl, fee)
             
             # Handle position flipping (Long > Short or Short > Long)
-            elif '>' in direction:
+            if '>' in direction:
                 # Close existing position first
                 old_side = 'LONG' if 'Long >' in direction else 'SHORT'
-                new_side = 'SHORT' if '> Short' in direction else 'LONG'
-                
-                pnl = float(fill_data.get('closedPnl', 0))
-                close_result = self._close_position(cursor, address, coin, f"Close {old_side.title()}", size, price, timestamp, fill_id, pnl)
                 
-                # Open new position (position flip usually involves larger size)
-                # The new position size would be the difference if any
-                if close_result:
-                    # For flips, we need to handle the new position opening
-                    # This is complex as it depends on the original position size vs trade size
-                    pass
-                
-                result = close_result
-            # Note: Unhandled directions are ignored (e.g., market making, other trade types)
-            
-            conn.commit()
+                pnl = fill.closedPnl
+                # Opening the new side is complex as it depends on the original position size vs
+                # trade size, so only the close is tracked
+                return self._close_position(book, address, coin, f"Close {old_side.title()}", price, timestamp, pnl, fee)
         
-        except Exception as e:
-            conn.rollback()
-            print(f"Error processing position: {e}")
+        # Note: Unhandled directions are ignored (e.g., market making, other trade types)
+        return None, _persist_nothing
+    
+    def _address_lock(self, address: str) -> threading.Lock:
+        """Lock guarding the in-memory positions of one address"""
+        lock = self._locks.get(address)
+        if lock is None:
+            # setdefault is atomic, so concurrent callers end up with the same lock
+            lock = self._locks.setdefault(address, threading.Lock())
+        return lock
+    
+    def _book(self, address: str) -> Dict[Tuple[str, str], List[Position]]:
+        """Open positions of an address keyed by (coin, side), loaded from the database on first use"""
+        book = self._books.get(address)
+        if book is None:
+            book = self._restore_book(address, self._load_positions(address))
+        return book
+    
+    def _load_positions(self, address: str) -> List[Position]:
+        """Read the open positions of an address from the database"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT id, coin, side, size, entry_price, entry_time, entry_fill_id
+        FROM positions WHERE address = ? AND network = ? AND status = 'OPEN'
+        ORDER BY entry_time
+        ''', (address, self.network))
+        positions = [
+            Position(
+                address=address,
+                coin=coin,
+                side=side,
+                size=size,
+                entry_price=entry_price,
+                entry_time=_parse_time(entry_time),
+                entry_fill_id=entry_fill_id,
+                id=pos_id
+            )
+            for pos_id, coin, side, size, entry_price, entry_time, entry_fill_id in cursor.fetchall()
+        ]
+        conn.close()
+        return positions
+    
+    def seed_positions(self, cursor: sqlite3.Cursor, positions: Dict[str, List[Position]]) -> List[Position]:
+        """
+        Record positions opened before monitoring began, taken from exchange snapshots.
         
-        finally:
-            conn.close()
+        Only coins without an open position in the database are seeded, so positions tracked
+        from fills are never duplicated. Runs on the caller's cursor without committing; call
+        reload() once committed.
         
-        return result
+        Args:
+            positions: Open positions per address, with entry_fill_id SNAPSHOT_FILL_ID
+        
+        Returns:
+            List[Position]: The positions inserted
+        """
+        inserted: List[Position] = []
+        for address, items in positions.items():
+            open_coins = {row[0] for row in cursor.execute(
+                "SELECT DISTINCT coin FROM positions WHERE address = ? AND network = ? AND status = 'OPEN'",
+                (address, self.network)
+            )}
+            seeded = [p for p in items if p.coin not in open_coins]
+            rows = [(address, p.coin, p.side, p.size, p.entry_price, p.entry_time, SNAPSHOT_FILL_ID,
+                     p.size * p.entry_price, self.network)
+                    for p in seeded]
+            cursor.executemany('''
+            INSERT INTO positions (address, coin, side, size, entry_price, entry_time, entry_fill_id, notional,
+                                   network)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            inserted.extend(seeded)
+        return inserted
+    
+    def reload(self, addresses: List[str]) -> None:
+        """
+        Re-read the open positions of addresses already loaded in memory from the database.
+        
+        Must be called before further fills of these addresses are applied.
+        """
+        for address in addresses:
+            with self._address_lock(address):
+                if address in self._books:
+                    self._restore_book(address, self._load_positions(address))
+            self.invalidate(address)
     
-    def _open_position(self, cursor, address: str, coin: str, side: str, size: float, price: float, timestamp: datetime, fill_id: int):
+    def _restore_book(self, address: str, positions: List[Position]) -> Dict[Tuple[str, str], List[Position]]:
+        """Install the persisted open positions of an address as its in-memory book"""
+        book: Dict[Tuple[str, str], List[Position]] = {}
+        for position in sorted(positions, key=lambda p: p.entry_time):
+            book.setdefault((position.coin, position.side), []).append(position)
+        for old in self._books.get(address, {}).values():
+            for position in old:
+                self._notify("close", position)
+        self._persisted[address] = {position.id: position for position in positions}
+        self._books[address] = book
+        for position in positions:
+            self._notify("open", position)
+        return book
+    
+    def load(self, addresses: List[str]) -> None:
+        """Load the open positions of addresses into memory now instead of on their first fill"""
+        for address in addresses:
+            with self._address_lock(address):
+                self._book(address)
+    
+    def add_listener(self, listener: PositionListener) -> None:
+        """Call a function with ("open" | "close", position) on every change to the in-memory positions"""
+        self._listeners = self._listeners + [listener]
+    
+    def _notify(self, event: str, position: Position) -> None:
+        for listener in self._listeners:
+            listener(event, position)
+    
+    def restore(self, positions: Dict[str, List[Position]]) -> None:
+        """
+        Install open positions restored from a checkpoint, replacing the database load.
+        
+        Must be called before fills of these addresses are applied.
+        
+        Args:
+            positions: Persisted open positions (with row ids) per address
+        """
+        for address, address_positions in positions.items():
+            with self._address_lock(address):
+                self._restore_book(address, address_positions)
+    
+    def persisted_positions(self) -> Dict[str, List[Position]]:
+        """
+        Committed open positions of the addresses loaded in memory.
+        
+        Call from the thread running the commit functions (the writer thread) to get a view
+        consistent with the database.
+        """
+        return {address: list(positions.values()) for address, positions in list(self._persisted.items())}
+    
+    def _open_position(self, book, address: str, coin: str, side: str, size: float, price: float, timestamp: datetime,
+                       fee: float = 0.0) -> PersistFunction:
         """Open a new position"""
-        cursor.execute('''
-        INSERT INTO positions (address, coin, side, size, entry_price, entry_time, entry_fill_id)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (address, coin, side, size, price, timestamp, fill_id))
+        position = Position(address, coin, side, size, price, timestamp, entry_fill_id=None)
+        book.setdefault((coin, side), []).append(position)
+        self._notify("open", position)
+        
+        def persist(cursor, fill_id: int) -> CommitFunction:
+            cursor.execute('''
+            INSERT INTO positions (address, coin, side, size, entry_price, entry_time, entry_fill_id, notional, fees,
+                                   network)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (address, coin, side, size, price, timestamp, fill_id, size * price, fee, self.network))
+            # Provisional until the transaction commits: later jobs of the same transaction (a
+            # close) need the id, but a rolled back id is handed out again to the next row
+            position.entry_fill_id = fill_id
+            position.id = cursor.lastrowid
+            
+            def finish(committed: bool) -> None:
+                if committed:
+                    self._persisted.setdefault(address, {})[position.id] = position
+                else:
+                    # A close still queued for this position must not update the row now holding the id
+                    position.id = position.entry_fill_id = None
+            return finish
+        
+        return persist
     
-    def _close_position(self, cursor, address: str, coin: str, direction: str, size: float, price: float, timestamp: datetime, fill_id: int, pnl: float = 0.0) -> Optional[Dict]:
+    def _close_position(self, book, address: str, coin: str, direction: str, price: float, timestamp: datetime, pnl: float = 0.0,
+                        fee: float = 0.0) -> Tuple[Optional[Dict], PersistFunction]:
         """Close existing position and return position info"""
         # Determine which side we're closing
         closing_side = 'LONG' if 'Long' in direction else 'SHORT'
         
         # Find the most recent open position for this address/coin/side
-        cursor.execute('''
-        SELECT id, size, entry_price, entry_time, entry_fill_id
-        FROM positions 
-        WHERE address = ? AND coin = ? AND side = ? AND status = 'OPEN'
-        ORDER BY entry_time DESC
-        LIMIT 1
-        ''', (address, coin, closing_side))
-        
-        position = cursor.fetchone()
-        if not position:
-            return None
-        
-        pos_id, pos_size, entry_price, entry_time_str, entry_fill_id = position
-        
-        # Handle different datetime formats
-        try:
-            if isinstance(entry_time_str, str):
-                if 'T' in entry_time_str:
-                    entry_time = datetime.fromisoformat(entry_time_str.replace('Z', '+00:00').replace('+00:00', ''))
-                else:
-                    entry_time = datetime.strptime(entry_time_str, '%Y-%m-%d %H:%M:%S.%f')
-            else:
-                entry_time = entry_time_str
-        except Exception as e:
-            print(f"Error parsing entry time {entry_time_str}: {e}")
-            return None
+        positions = book.get((coin, closing_side))
+        if not positions:
+            return None, _persist_nothing
+        index = max(range(len(positions)), key=lambda i: positions[i].entry_time)
+        position = positions.pop(index)
+        if not positions:
+            del book[(coin, closing_side)]
+        self._notify("close", position)
         
         # Calculate duration
-        duration = timestamp - entry_time
+        duration = timestamp - position.entry_time
         duration_seconds = int(duration.total_seconds())
         
         # PnL is passed as parameter
         
-        # Update position as closed
-        cursor.execute('''
-        UPDATE positions 
-        SET exit_price = ?, exit_time = ?, exit_fill_id = ?, duration_seconds = ?, pnl = ?, status = 'CLOSED'
-        WHERE id = ?
-        ''', (price, timestamp, fill_id, duration_seconds, pnl, pos_id))
+        def persist(cursor, fill_id: int) -> None:
+            # Update position as closed. The id was assigned when the open was persisted,
+            # which the writer ran before this job. SET expressions see the row before the
+            # update, so net_pnl adds the exit fee itself
+            cursor.execute('''
+            UPDATE positions 
+            SET exit_price = ?, exit_time = ?, exit_fill_id = ?, duration_seconds = ?, pnl = ?, status = 'CLOSED',
+                fees = COALESCE(fees, 0) + ?,
+                net_pnl = ? + COALESCE(funding, 0) - COALESCE(fees, 0) - ?
+            WHERE id = ?
+            ''', (price, timestamp, fill_id, duration_seconds, pnl, fee, pnl, fee, position.id))
+            
+            def finish(committed: bool) -> None:
+                if committed:
+                    self._persisted.get(address, {}).pop(position.id, None)
+            return finish
         
         return {
-            'position_id': pos_id,
+            'position_id': position.id,
             'address': address,
             'coin': coin,
             'side': closing_side,
-            'size': pos_size,
-            'entry_price': entry_price,
-            'entry_time': entry_time,
+            'size': position.size,
+            'entry_price': position.entry_price,
+            'entry_time': position.entry_time,
             'exit_price': price,
             'exit_time': timestamp,
             'duration': duration,
             'duration_seconds': duration_seconds,
             'duration_formatted': self._format_duration(duration),
             'pnl': pnl
-        }
+        }, persist
     
+    def apply_funding(self, cursor: sqlite3.Cursor, address: str, coin: str, usdc: float) -> int:
+        """
+        Charge a funding payment to the open positions of an address in a coin, pro rata to size.
+
+        Runs on the caller's cursor without committing, so it shares the transaction that
+        stores the payment.
+
+        Returns:
+            int: Number of positions charged (0 if there was no open position in the coin)
+        """
+        cursor.execute('''
+        UPDATE positions
+        SET funding = COALESCE(funding, 0) + ? * size / (
+            SELECT SUM(size) FROM positions WHERE address = ? AND coin = ? AND network = ? AND status = 'OPEN'
+        )
+        WHERE address = ? AND coin = ? AND network = ? AND status = 'OPEN'
+        ''', (usdc, address, coin, self.network, address, coin, self.network))
+        return cursor.rowcount
+
     def _format_duration(self, duration: timedelta) -> str:
         """Format duration in human-readable format"""
         total_seconds = int(duration.total_seconds())
@@ -207,21 +499,63 @@ class PositionTracker:
             hours = (total_seconds % 86400) // 3600
             return f"{days}d {hours}h"
     
+    def invalidate(self, address: str, coin: Optional[str] = None) -> None:
+        """
+        Drop cached reads that a write to an address's positions may have changed.
+        
+        Args:
+            address: Address whose positions changed
+            coin: Coin that changed; None drops every cached read of the address
+        """
+        if self._cache is None:
+            return
+        with self._generation_lock:
+            self._generation += 1
+            if coin is None:
+                self._cache.invalidate(address)
+            else:
+                self._cache.invalidate((address, coin))
+                self._cache.invalidate((address, None))
+            self._cache.invalidate((None, None))
+    
+    def cache_stats(self) -> Optional[CacheStats]:
+        """Hit, miss and eviction counts of the read cache, None if it is disabled"""
+        return self._cache.stats() if self._cache is not None else None
+    
+    def _read_through(self, key: tuple, tags: tuple, load: Callable[[], List[Dict]]) -> List[Dict]:
+        """Serve a query result from the cache, loading and caching it on a miss"""
+        if self._cache is None:
+            return load()
+        rows = self._cache.get(key)
+        if rows is None:
+            generation = self._generation
+            rows = load()
+            with self._generation_lock:
+                if self._generation == generation:
+                    self._cache.put(key, rows, tags=tags)
+        # Callers get their own dicts so the cached ones can't be modified
+        return [dict(row) for row in rows]
+    
     def get_open_positions(self, address: str = None) -> List[Dict]:
         """Get all open positions"""
+        tags = (address, (address, None)) if address else ((None, None),)
+        return self._read_through(("open", address), tags, lambda: self._load_open_positions(address))
+    
+    def _load_open_positions(self, address: Optional[str]) -> List[Dict]:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        columns = "id, address, coin, side, size, entry_price, entry_time, entry_fill_id, funding, notional, fees, network"
         if address:
-            cursor.execute('''
-            SELECT * FROM positions WHERE address = ? AND status = 'OPEN'
+            cursor.execute(f'''
+            SELECT {columns} FROM positions WHERE address = ? AND network = ? AND status = 'OPEN'
             ORDER BY entry_time DESC
-            ''', (address,))
+            ''', (address, self.network))
         else:
-            cursor.execute('''
-            SELECT * FROM positions WHERE status = 'OPEN'
+            cursor.execute(f'''
+            SELECT {columns} FROM positions WHERE network = ? AND status = 'OPEN'
             ORDER BY entry_time DESC
-            ''')
+            ''', (self.network,))
         
         positions = []
         for row in cursor.fetchall():
@@ -233,7 +567,11 @@ class PositionTracker:
                 'size': row[4],
                 'entry_price': row[5],
                 'entry_time': datetime.fromisoformat(row[6].replace('Z', '+00:00').replace('+00:00', '')),
-                'entry_fill_id': row[7]
+                'entry_fill_id': row[7],
+                'funding': row[8] or 0.0,
+                'notional': row[9] if row[9] is not None else row[4] * row[5],
+                'fees': row[10] or 0.0,
+                'network': row[11]
             })
         
         conn.close()
@@ -241,44 +579,207 @@ class PositionTracker:
     
     def get_position_history(self, address: str, coin: str = None, limit: int = 50) -> List[Dict]:
         """Get position history for an address"""
+        return self._read_through(
+            ("history", address, coin, limit),
+            (address, (address, coin)),
+            lambda: self._load_position_history(address, coin, limit)
+        )
+    
+    def _load_position_history(self, address: str, coin: Optional[str], limit: int) -> List[Dict]:
+        return self.get_position_history_page(address, coin, limit=limit).items
+    
+    def iter_position_history(self,
+                              address: str,
+                              coin: str = None,
+                              start: Optional[datetime] = None,
+                              end: Optional[datetime] = None,
+                              cursor: Optional[str] = None,
+                              descending: bool = False,
+                              fetch_size: int = 500) -> Iterator[Dict]:
+        """
+        Stream the closed positions of an address in exit time order with constant memory.
+        
+        Args:
+            address: Address whose positions are read
+            coin: Optional coin filter
+            start: Optional inclusive lower bound on the exit time
+            end: Optional exclusive upper bound on the exit time
+            cursor: Optional Page.next_cursor to resume after
+            descending: If True, the most recently closed positions come first
+            fetch_size: Number of rows fetched from SQLite per query
+        
+        Returns:
+            Iterator[Dict]: Positions in the same format as get_position_history
+        """
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        try:
+            for row in iter_rows(conn, "positions", _HISTORY_COLUMNS, "exit_time",
+                                 {"address": address, "coin": coin, "status": "CLOSED", "network": self.network},
+                                 start, end, cursor, descending, fetch_size):
+                yield self._history_row_to_dict(row)
+        finally:
+            conn.close()
+    
+    def get_position_history_page(self,
+                                  address: str,
+                                  coin: str = None,
+                                  start: Optional[datetime] = None,
+                                  end: Optional[datetime] = None,
+                                  cursor: Optional[str] = None,
+                                  limit: int = 50,
+                                  descending: bool = True) -> Page:
+        """Get one page of an address's closed positions, most recently closed first by default"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return fetch_page(conn, "positions", _HISTORY_COLUMNS, "exit_time",
+                              {"address": address, "coin": coin, "status": "CLOSED", "network": self.network},
+                              self._history_row_to_dict, start, end, cursor, descending, limit)
+        finally:
+            conn.close()
+    
+    def _history_row_to_dict(self, row) -> Dict:
+        """Convert a (id, exit_time, *_HISTORY_COLUMNS) row to a position history dictionary"""
+        duration = timedelta(seconds=row[9]) if row[9] else None
+        return {
+            'id': row[0],
+            'address': row[2],
+            'coin': row[3],
+            'side': row[4],
+            'size': row[5],
+            'entry_price': row[6],
+            'entry_time': _parse_time(row[7]),
+            'exit_price': row[8],
+            'exit_time': _parse_time(row[1]) if row[1] else None,
+            'duration': duration,
+            'duration_seconds': row[9],
+            'duration_formatted': self._format_duration(duration) if duration else None,
+            'pnl': row[10],
+            'funding': row[11] or 0.0,
+            # Computed from the stored columns for rows archived before they were derived at ingest
+            'notional': row[12] if row[12] is not None else (row[5] or 0.0) * (row[6] or 0.0),
+            'fees': row[13] or 0.0,
+            'net_pnl': row[14] if row[14] is not None else (row[10] or 0.0) + (row[11] or 0.0) - (row[13] or 0.0),
+            'network': row[15]
+        }
+    
+    def get_ranked_positions(self,
+                             address: str,
+                             by: str = "net_pnl",
+                             coin: Optional[str] = None,
+                             limit: int = 10,
+                             descending: bool = True) -> List[Dict]:
+        """
+        Get the closed positions of an address ranked by a derived column, e.g. its best or worst trades.
         
-        if coin:
-            cursor.execute('''
-            SELECT * FROM positions 
-            WHERE address = ? AND coin = ? AND status = 'CLOSED'
-            ORDER BY exit_time DESC
-            LIMIT ?
-            ''', (address, coin, limit))
-        else:
-            cursor.execute('''
-            SELECT * FROM positions 
-            WHERE address = ? AND status = 'CLOSED'
-            ORDER BY exit_time DESC
-            LIMIT ?
-            ''', (address, limit))
+        The columns are stored at ingest and indexed per address, so ranking reads the index
+        instead of computing and sorting every position. Archived positions are included.
         
-        positions = []
-        for row in cursor.fetchall():
-            entry_time = datetime.fromisoformat(row[6].replace('Z', '+00:00').replace('+00:00', ''))
-            exit_time = datetime.fromisoformat(row[9].replace('Z', '+00:00').replace('+00:00', '')) if row[9] else None
-            duration = timedelta(seconds=row[11]) if row[11] else None
-            
-            positions.append({
-                'id': row[0],
-                'address': row[1],
-                'coin': row[2],
-                'side': row[3],
-                'size': row[4],
-                'entry_price': row[5],
-                'entry_time': entry_time,
-                'exit_price': row[8],
-                'exit_time': exit_time,
-                'duration': duration,
-                'duration_formatted': self._format_duration(duration) if duration else None,
-                'pnl': row[12]
-            })
+        Args:
+            address: Address whose positions are ranked
+            by: One of RANK_COLUMNS: net_pnl, notional or duration_seconds
+            coin: Optional coin filter
+            limit: Maximum number of positions
+            descending: If True the largest values come first, otherwise the smallest
         
-        conn.close()
-        return positions
\ No newline at end of file
+        Returns:
+            List[Dict]: Positions in the same format as get_position_history
+        
+        Raises:
+            ValueError: If by is not a rank column
+        """
+        if by not in RANK_COLUMNS:
+            raise ValueError(f"Cannot rank positions by {by!r}, expected one of {', '.join(RANK_COLUMNS)}")
+        query = f'''
+        SELECT id, exit_time, {_HISTORY_COLUMNS} FROM positions
+        WHERE address = ? AND network = ? AND status = 'CLOSED' AND {by} IS NOT NULL'''
+        params: list = [address, self.network]
+        if coin:
+            query += " AND coin = ?"
+            params.append(coin)
+        direction = "DESC" if descending else "ASC"
+        query += f" ORDER BY {by} {direction}, id {direction} LIMIT ?"
+        conn = sqlite3.connect(self.db_path)
+        try:
+            positions = [self._history_row_to_dict(row) for row in conn.execute(query, params + [limit])]
+            archived = archived_rows(conn, "positions", _HISTORY_COLUMNS, "exit_time",
+                                     {"address": address, "coin": coin, "network": self.network})
+            if archived is not None:
+                candidates = chain(positions, (p for p in map(self._history_row_to_dict, archived)
+                                               if p[by] is not None))
+                select = heapq.nlargest if descending else heapq.nsmallest
+                positions = select(limit, candidates, key=lambda p: (p[by], p['id']))
+        finally:
+            conn.close()
+        return positions
+    
+    def get_position_stats(self, address: str, coin: str = None) -> Dict:
+        """Get aggregate statistics over the closed positions of an address"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return position_stats(conn, address, coin, self.network)
+        finally:
+            conn.close()
+
+def position_stats(conn: sqlite3.Connection, address: str, coin: Optional[str] = None,
+                   network: Optional[str] = None) -> Dict:
+    """
+    Aggregate statistics over the closed positions of an address (see PositionTracker.get_position_stats),
+    on one network or, with network None, all of them.
+    """
+    cursor = conn.cursor()
+    query = '''
+    SELECT COUNT(*),
+           COALESCE(SUM(pnl), 0),
+           COALESCE(SUM(funding), 0),
+           COALESCE(SUM(fees), 0),
+           SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN pnl < 0 THEN 1 ELSE 0 END),
+           COALESCE(SUM(duration_seconds), 0),
+           COUNT(duration_seconds)
+    FROM positions
+    WHERE address = ? AND status = 'CLOSED'
+    '''
+    params = [address]
+    if coin:
+        query += " AND coin = ?"
+        params.append(coin)
+    query += _network_clause(network, params)
+    cursor.execute(query, params)
+    closed, total_pnl, total_funding, total_fees, winning, losing, total_duration, timed = cursor.fetchone()
+    winning = winning or 0
+    losing = losing or 0
+    
+    # Closed positions moved to the archive
+    for _id, _time, pnl, funding, fees, duration in archived_rows(
+            conn, "positions", "pnl, funding, fees, duration_seconds", "exit_time",
+            {"address": address, "coin": coin, "network": network}) or ():
+        closed += 1
+        total_pnl += pnl or 0.0
+        total_funding += funding or 0.0
+        total_fees += fees or 0.0
+        winning += (pnl or 0) > 0
+        losing += (pnl or 0) < 0
+        if duration is not None:
+            total_duration += duration
+            timed += 1
+    
+    params = [address]
+    network_clause = _network_clause(network, params)
+    cursor.execute(f'''
+    SELECT COUNT(*) FROM positions WHERE address = ? AND status = 'OPEN'{network_clause}
+    ''', params)
+    open_count = cursor.fetchone()[0]
+    
+    decided = winning + losing
+    return {
+        'closed_positions': closed,
+        'open_positions': open_count,
+        'total_pnl': total_pnl,
+        'total_funding': total_funding,
+        'total_fees': total_fees,
+        'net_pnl': total_pnl + total_funding - total_fees,
+        'winning_trades': winning,
+        'losing_trades': losing,
+        'win_rate': winning / decided * 100 if decided else None,
+        'avg_duration_seconds': total_duration / timed if timed else None
+    }
@@ -0,0 +1,214 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Set
+
+from hyperliquid_monitor.position_tracker import Position
+
+class PriceCache:
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        Latest mid price per coin, shared by everything that needs live prices.
+
+        Fed by the monitor's single `allMids` subscription, which covers every coin, so the
+        number of subscriptions doesn't grow with the number of addresses or coins.
+        """
+        self._prices: Dict[str, float] = {}
+        self._updated: Dict[str, float] = {}
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def update(self, mids: Dict[str, object]) -> Set[str]:
+        """
+        Store new mid prices.
+
+        Returns:
+            Set[str]: Coins whose price changed
+        """
+        now = self._clock()
+        changed = set()
+        with self._lock:
+            for coin, mid in mids.items():
+                try:
+                    price = float(mid)
+                except (TypeError, ValueError):
+                    continue
+                if self._prices.get(coin) != price:
+                    self._prices[coin] = price
+                    changed.add(coin)
+                self._updated[coin] = now
+        return changed
+
+    def get(self, coin: str) -> Optional[float]:
+        return self._prices.get(coin)
+
+    def age(self, coin: str) -> Optional[float]:
+        """Seconds since the coin's price was last received"""
+        updated = self._updated.get(coin)
+        return self._clock() - updated if updated is not None else None
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._prices)
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+@dataclass
+class MarkToMarketStats:
+    ticks: int = 0  # Price updates received
+    revaluations: int = 0  # Batch recomputations run
+    throttled: int = 0  # Ticks folded into a later revaluation
+    pairs_revalued: int = 0  # (address, coin) aggregates recomputed
+    last_revaluation_seconds: float = 0.0
+
+class _Exposure:
+    """Open positions of one address in one coin, reduced to the sums PnL is linear in"""
+    __slots__ = ("net_size", "cost", "gross_size", "count", "unrealized_pnl", "notional")
+
+    def __init__(self):
+        self.net_size = 0.0  # Long size minus short size
+        self.cost = 0.0  # Sum of signed size * entry price
+        self.gross_size = 0.0
+        self.count = 0
+        self.unrealized_pnl: Optional[float] = None
+        self.notional: Optional[float] = None
+
+class MarkToMarket:
+    def __init__(self, prices: PriceCache, min_interval: float = 0.25, clock: Callable[[], float] = time.monotonic):
+        """
+        Live unrealized PnL and notional of every open position.
+
+        Unrealized PnL is linear in the mark price, so the open positions of an address in a
+        coin are kept as running sums (net size and cost); revaluing them on a tick is
+        `price * net_size - cost` per (address, coin) pair, however many positions there are.
+        Ticks arriving less than min_interval seconds after the last revaluation are folded into
+        the next one.
+
+        Args:
+            prices: Price cache the marks are read from
+            min_interval: Minimum seconds between two revaluations
+            clock: Time source, injectable for tests
+        """
+        self.prices = prices
+        self.min_interval = min_interval
+        self._clock = clock
+        self._exposures: Dict[str, Dict[str, _Exposure]] = {}  # coin -> address -> exposure
+        self._by_address: Dict[str, Dict[str, _Exposure]] = {}  # address -> coin -> the same exposures
+        self._dirty: Set[str] = set()  # Coins whose price or positions changed since the last revaluation
+        self._last_revaluation: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stats = MarkToMarketStats()
+
+    def on_position_change(self, event: str, position: Position) -> None:
+        """PositionTracker listener"""
+        self._adjust(position, 1 if event == "open" else -1)
+
+    def _adjust(self, position: Position, sign: int) -> None:
+        signed_size = position.size if position.side == 'LONG' else -position.size
+        with self._lock:
+            exposure = self._exposures.setdefault(position.coin, {}).get(position.address)
+            if exposure is None:
+                exposure = _Exposure()
+                self._exposures[position.coin][position.address] = exposure
+                self._by_address.setdefault(position.address, {})[position.coin] = exposure
+            exposure.net_size += sign * signed_size
+            exposure.cost += sign * signed_size * position.entry_price
+            exposure.gross_size += sign * position.size
+            exposure.count += sign
+            if exposure.count <= 0:
+                del self._exposures[position.coin][position.address]
+                del self._by_address[position.address][position.coin]
+                if not self._exposures[position.coin]:
+                    del self._exposures[position.coin]
+                if not self._by_address[position.address]:
+                    del self._by_address[position.address]
+            self._dirty.add(position.coin)
+
+    def on_prices(self, mids: Dict[str, object]) -> bool:
+        """
+        Store a price tick and revalue if the throttle allows.
+
+        Returns:
+            bool: Whether a revaluation ran
+        """
+        changed = self.prices.update(mids)
+        with self._lock:
+            self._stats.ticks += 1
+            self._dirty.update(coin for coin in changed if coin in self._exposures)
+            now = self._clock()
+            if self._last_revaluation is not None and now - self._last_revaluation < self.min_interval:
+                self._stats.throttled += 1
+                return False
+            self._revalue(now)
+            return True
+
+    def revalue(self) -> None:
+        """Revalue everything that changed now, ignoring the throttle"""
+        with self._lock:
+            self._revalue(self._clock())
+
+    def _revalue(self, now: float) -> None:
+        """Recompute the dirty coins. Caller must hold the lock."""
+        started = time.perf_counter()
+        for coin in self._dirty:
+            exposures = self._exposures.get(coin)
+            if not exposures:
+                continue
+            price = self.prices.get(coin)
+            for exposure in exposures.values():
+                if price is None:
+                    exposure.unrealized_pnl = exposure.notional = None
+                else:
+                    exposure.unrealized_pnl = price * exposure.net_size - exposure.cost
+                    exposure.notional = price * exposure.gross_size
+            self._stats.pairs_revalued += len(exposures)
+        self._dirty.clear()
+        self._last_revaluation = now
+        self._stats.revaluations += 1
+        self._stats.last_revaluation_seconds = time.perf_counter() - started
+
+    def get_unrealized(self, address: str) -> Dict:
+        """
+        Unrealized PnL and notional of an address's open positions, as of the last revaluation.
+
+        Returns:
+            Dict with totals and a per-coin breakdown. Coins without a price yet have None values
+            and are left out of the totals.
+        """
+        with self._lock:
+            if self._dirty:
+                # Positions changed since the last tick: reads are always current
+                self._revalue(self._clock())
+            coins = {
+                coin: {
+                    'net_size': exposure.net_size,
+                    'mark_price': self.prices.get(coin),
+                    'unrealized_pnl': exposure.unrealized_pnl,
+                    'notional': exposure.notional,
+                    'positions': exposure.count
+                }
+                for coin, exposure in self._by_address.get(address, {}).items()
+            }
+        return {
+            'address': address,
+            'unrealized_pnl': sum(c['unrealized_pnl'] for c in coins.values() if c['unrealized_pnl'] is not None),
+            'notional': sum(c['notional'] for c in coins.values() if c['notional'] is not None),
+            'coins': coins
+        }
+
+    def stats(self) -> MarkToMarketStats:
+        with self._lock:
+            return MarkToMarketStats(**vars(self._stats))
+
+def mark_position(position: Dict, prices: PriceCache) -> Dict:
+    """Add mark_price, unrealized_pnl and notional to an open position dict"""
+    price = prices.get(position['coin'])
+    position['mark_price'] = price
+    if price is None:
+        position['unrealized_pnl'] = position['notional'] = None
+    else:
+        direction = 1 if position['side'] == 'LONG' else -1
+        position['unrealized_pnl'] = (price - position['entry_price']) * position['size'] * direction
+        position['notional'] = price * position['size']
+    return position
@@ -0,0 +1,174 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class StageStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def avg_us(self) -> float:
+        return self.total_seconds / self.count * 1e6 if self.count else 0.0
+
+class _Stage:
+    __slots__ = ("count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+class StageTimings:
+    def __init__(self):
+        """
+        Cumulative time spent in each stage of the ingest path.
+
+        Stages are timed with two perf_counter_ns() calls and a short locked update, cheap
+        enough to leave on in production:
+
+            started = time.perf_counter_ns()
+            ...
+            started = timings.record("normalize", started)  # Returns now, to time the next stage
+        """
+        self._stages: Dict[str, _Stage] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, started_ns: int) -> int:
+        """
+        Add the time since started_ns (from time.perf_counter_ns()) to a stage.
+
+        Returns:
+            int: The current perf_counter_ns(), the start of the next stage
+        """
+        now = time.perf_counter_ns()
+        elapsed = now - started_ns
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _Stage()
+            stats.count += 1
+            stats.total_ns += elapsed
+            if elapsed > stats.max_ns:
+                stats.max_ns = elapsed
+        return now
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time a block as a stage"""
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, started)
+
+    def snapshot(self) -> Dict[str, StageStats]:
+        with self._lock:
+            return {name: StageStats(s.count, s.total_ns / 1e9, s.max_ns / 1e9) for name, s in self._stages.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+def _frame_name(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{name}"
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005):
+        """
+        Statistical profiler over every thread of the process.
+
+        A background thread takes the stack of every other thread each `interval` seconds
+        (sys._current_frames()), so the profiled code runs unmodified and the cost is one stack
+        walk per thread per sample. Stacks are counted in the collapsed format read by
+        flamegraph.pl, speedscope and inferno: "thread;outer frame;...;inner frame count".
+
+        Args:
+            interval: Seconds between samples
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def sample(self, stacks: Counter) -> None:
+        """Add the current stack of every other thread to stacks"""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            frames.append(names.get(ident, str(ident)))
+            stacks[";".join(reversed(frames))] += 1
+
+    def run(self, seconds: float) -> Counter:
+        """Sample for a number of seconds, in the calling thread"""
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while True:
+            self.sample(stacks)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return stacks
+            time.sleep(min(self.interval, remaining))
+
+    def start(self, seconds: float, path: str, on_done: Optional[Callable[[str], None]] = None) -> None:
+        """
+        Sample for a number of seconds in a background thread, then write the collapsed stacks.
+
+        Raises:
+            RuntimeError: If a profile is already running
+        """
+        with self._lock:
+            if self._thread is not None:
+                raise RuntimeError("A profile is already running")
+            self._thread = threading.Thread(target=self._profile, args=(seconds, path, on_done),
+                                            name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait for the running profile, if any"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _profile(self, seconds: float, path: str, on_done: Optional[Callable[[str], None]]) -> None:
+        try:
+            stacks = self.run(seconds)
+            write_collapsed(stacks, path)
+            logger.info("Wrote profile of %s samples to %s", sum(stacks.values()), path,
+                        extra={"path": path, "seconds": seconds})
+            if on_done:
+                on_done(path)
+        except Exception:
+            logger.exception("Error profiling")
+        finally:
+            with self._lock:
+                self._thread = None
+
+def write_collapsed(stacks: Counter, path: str) -> None:
+    """Write stack counts in the collapsed format, one "frame;frame;... count" line per stack"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    os.replace(tmp_path, path)
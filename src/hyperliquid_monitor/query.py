@@ -0,0 +1,155 @@
+import sqlite3
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from hyperliquid_monitor.archive import archived_rows, merge_rows
+from hyperliquid_monitor.types import Page
+
+# Keyset pagination over the history tables. Rows are ordered by (time column, id) and each page
+# or chunk continues strictly after the last row seen, so walking deep into history costs the
+# same as reading the first page (no OFFSET scan) and rows inserted meanwhile never shift pages.
+# Rows moved to archive segments (see archive.py) are merged in, in the same order.
+
+def connect_readonly(db_path: str) -> sqlite3.Connection:
+    """
+    Open a database for queries only.
+
+    The connection can't write (nor create a missing database), takes no write locks, and
+    memory-maps the file, so query tools can run next to a live monitor.
+
+    Raises:
+        sqlite3.OperationalError: If the database doesn't exist
+    """
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    conn.execute("PRAGMA query_only = ON")
+    conn.execute("PRAGMA mmap_size = 268435456")
+    conn.execute("PRAGMA cache_size = -65536")  # 64 MiB
+    return conn
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Opaque cursor pointing just after a row"""
+    return f"{sort_value}|{row_id}"
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Split a cursor returned in Page.next_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    sort_value, sep, row_id = cursor.rpartition("|")
+    if not sep:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    try:
+        return sort_value, int(row_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+
+def _time_param(value: datetime) -> str:
+    """Format a datetime the way the sqlite3 adapter stores DATETIME columns"""
+    return value.isoformat(" ")
+
+def _build_query(table: str,
+                 columns: str,
+                 time_column: str,
+                 filters: Dict[str, Any],
+                 start: Optional[datetime],
+                 end: Optional[datetime],
+                 after: Optional[Tuple[str, int]],
+                 descending: bool) -> Tuple[str, List[Any]]:
+    """SELECT over a table's rows after a keyset position, ordered by (time_column, id)"""
+    clauses = [f"{time_column} IS NOT NULL"]
+    params: List[Any] = []
+    for column, value in filters.items():
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if start is not None:
+        clauses.append(f"{time_column} >= ?")
+        params.append(_time_param(start))
+    if end is not None:
+        clauses.append(f"{time_column} < ?")
+        params.append(_time_param(end))
+    if after is not None:
+        op = "<" if descending else ">"
+        clauses.append(f"({time_column} {op} ? OR ({time_column} = ? AND id {op} ?))")
+        params.extend([after[0], after[0], after[1]])
+    direction = "DESC" if descending else "ASC"
+    query = (f"SELECT id, {time_column}, {columns} FROM {table} WHERE {' AND '.join(clauses)} "
+             f"ORDER BY {time_column} {direction}, id {direction} LIMIT ?")
+    return query, params
+
+def iter_rows(conn: sqlite3.Connection,
+              table: str,
+              columns: str,
+              time_column: str,
+              filters: Dict[str, Any],
+              start: Optional[datetime] = None,
+              end: Optional[datetime] = None,
+              cursor: Optional[str] = None,
+              descending: bool = False,
+              fetch_size: int = 500) -> Iterator[tuple]:
+    """
+    Stream rows in keyset order, fetching fetch_size rows per query.
+
+    Each chunk is a separate short query, so no read transaction stays open while the caller
+    processes rows. Yields tuples of (id, time value, *columns).
+    """
+    if fetch_size < 1:
+        raise ValueError("fetch_size must be at least 1")
+    after = decode_cursor(cursor) if cursor else None
+    rows = _iter_database_rows(conn, table, columns, time_column, filters, start, end, after, descending, fetch_size)
+    archived = archived_rows(conn, table, columns, time_column, filters,
+                             _time_param(start) if start is not None else None,
+                             _time_param(end) if end is not None else None, after, descending)
+    return merge_rows(rows, archived, descending)
+
+def _iter_database_rows(conn: sqlite3.Connection,
+                        table: str,
+                        columns: str,
+                        time_column: str,
+                        filters: Dict[str, Any],
+                        start: Optional[datetime],
+                        end: Optional[datetime],
+                        after: Optional[Tuple[str, int]],
+                        descending: bool,
+                        fetch_size: int) -> Iterator[tuple]:
+    while True:
+        query, params = _build_query(table, columns, time_column, filters, start, end, after, descending)
+        rows = conn.execute(query, params + [fetch_size]).fetchall()
+        yield from rows
+        if len(rows) < fetch_size:
+            return
+        after = (rows[-1][1], rows[-1][0])
+
+def fetch_page(conn: sqlite3.Connection,
+               table: str,
+               columns: str,
+               time_column: str,
+               filters: Dict[str, Any],
+               convert,
+               start: Optional[datetime] = None,
+               end: Optional[datetime] = None,
+               cursor: Optional[str] = None,
+               descending: bool = True,
+               limit: int = 100) -> Page:
+    """Fetch one page of rows, each converted with convert(row)"""
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    after = decode_cursor(cursor) if cursor else None
+    query, params = _build_query(table, columns, time_column, filters, start, end, after, descending)
+    # One extra row tells whether another page follows
+    rows = conn.execute(query, params + [limit + 1]).fetchall()
+    # Read after the database rows: a concurrent archive run can then only duplicate rows, never hide them
+    archived = archived_rows(conn, table, columns, time_column, filters,
+                             _time_param(start) if start is not None else None,
+                             _time_param(end) if end is not None else None, after, descending)
+    if archived is not None:
+        rows = list(islice(merge_rows(rows, archived, descending), limit + 1))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    return Page(items=[convert(row) for row in rows], next_cursor=next_cursor)
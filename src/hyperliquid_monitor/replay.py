@@ -0,0 +1,415 @@
+import csv
+import heapq
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from hyperliquid_monitor.alerts import AlertEngine, AlertRule
+from hyperliquid_monitor.archive import archived_addresses
+from hyperliquid_monitor.database import _parse_db_time
+from hyperliquid_monitor.query import connect_readonly, iter_rows
+from hyperliquid_monitor.types import DEFAULT_NETWORK
+
+# Historical fills are fed through the same event handler as live websocket messages, one
+# message per fill in time order, so positions, alerts and the database end up exactly as a
+# live monitor would have left them. Fills are (address, websocket-shaped fill dict, network)
+# tuples; each network is replayed by its own monitor.
+ReplayFill = Tuple[str, Dict, str]
+
+_FILL_COLUMNS = ["address", "coin", "side", "size", "price", "direction", "tx_hash",
+                 "fee", "fee_token", "start_position", "closed_pnl", "oid", "tid", "network"]
+
+class VirtualClock:
+    """
+    Time source that follows the replayed fills instead of the wall clock. Only alert rules read
+    it: positions and stored rows take their times from the fills themselves.
+    """
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def advance_to(self, now: float) -> None:
+        """Move the clock forward; it never goes back, like time.monotonic"""
+        if now > self.now:
+            self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@dataclass
+class ReplayReport:
+    fills: int = 0
+    addresses: int = 0
+    positions_closed: int = 0
+    alerts: Dict[str, int] = field(default_factory=dict)  # Rule name -> alerts fired
+    start: Optional[datetime] = None  # Time of the first and last fill replayed
+    end: Optional[datetime] = None
+    seconds: float = 0.0  # Wall time
+    workers: int = 1
+
+    @property
+    def fills_per_second(self) -> float:
+        return self.fills / self.seconds if self.seconds else 0.0
+
+    @property
+    def speedup(self) -> float:
+        """Replayed history per second of wall time"""
+        if not self.seconds or self.start is None or self.end is None:
+            return 0.0
+        return (self.end - self.start).total_seconds() / self.seconds
+
+    def to_dict(self) -> Dict:
+        return {
+            "fills": self.fills,
+            "addresses": self.addresses,
+            "positions_closed": self.positions_closed,
+            "alerts": dict(self.alerts),
+            "start": self.start,
+            "end": self.end,
+            "seconds": round(self.seconds, 3),
+            "workers": self.workers,
+            "fills_per_second": round(self.fills_per_second),
+            "speedup": round(self.speedup)
+        }
+
+def _fill_time(fill: Dict) -> int:
+    return int(fill.get("time", 0))
+
+def fill_from_row(row: Dict) -> ReplayFill:
+    """
+    Convert a row of the fills table (as read from the database or exported by
+    `hyperliquid-monitor export fills`, JSON or CSV) to an address, a websocket fill and the
+    network, which defaults to mainnet for rows without one.
+
+    Rows that already have the websocket shape (a "px" field) are passed through.
+    """
+    def value(name):
+        item = row.get(name)
+        return None if item == "" else item
+
+    address = row["address"]
+    network = value("network") or DEFAULT_NETWORK
+    if "px" in row:
+        return address, {key: item for key, item in row.items() if key not in ("address", "network")}, network
+
+    timestamp = _parse_db_time(value("timestamp"))
+    oid, tid = value("oid"), value("tid")
+    return address, {
+        "coin": row["coin"],
+        "px": str(row["price"]),
+        "sz": str(row["size"]),
+        # The inverse of the side mapping applied when fills are stored
+        "side": "A" if row["side"] == "BUY" else "B",
+        "time": int(round(timestamp.timestamp() * 1000)),
+        "startPosition": str(value("start_position") or 0),
+        "dir": row["direction"],
+        "closedPnl": str(value("closed_pnl") or 0),
+        "hash": row["tx_hash"],
+        "oid": int(oid) if oid is not None else None,
+        "tid": int(tid) if tid is not None else None,
+        "fee": str(value("fee") or 0),
+        "feeToken": row["fee_token"]
+    }, network
+
+def database_addresses(db_path: str) -> List[str]:
+    """Addresses with fills in a database, archived fills included"""
+    conn = connect_readonly(db_path)
+    try:
+        addresses = {row[0] for row in conn.execute("SELECT DISTINCT address FROM fills")}
+        return sorted(addresses.union(archived_addresses(conn, "fills")))
+    finally:
+        conn.close()
+
+def iter_database_fills(db_path: str,
+                        addresses: Optional[Sequence[str]] = None,
+                        start: Optional[datetime] = None,
+                        end: Optional[datetime] = None,
+                        network: Optional[str] = None) -> Iterator[ReplayFill]:
+    """
+    Stream the fills of a database in time order, of one network or, with network None, all.
+
+    Each address is read with its own keyset query over the (address, timestamp) index and the
+    streams are merged, so a worker replaying a few addresses reads only their rows.
+    """
+    if addresses is None:
+        addresses = database_addresses(db_path)
+    conn = connect_readonly(db_path)
+    keys = ["id", "timestamp"] + _FILL_COLUMNS
+    try:
+        streams = [
+            (fill_from_row(dict(zip(keys, row)))
+             for row in iter_rows(conn, "fills", ", ".join(_FILL_COLUMNS), "timestamp",
+                                  {"address": address, "network": network},
+                                  start, end, fetch_size=2000))
+            for address in addresses
+        ]
+        yield from heapq.merge(*streams, key=lambda item: _fill_time(item[1]))
+    finally:
+        conn.close()
+
+def _iter_file(path: str) -> Iterator[ReplayFill]:
+    with open(path, newline="") as f:
+        if Path(path).suffix.lower() == ".csv":
+            rows: Iterable[Dict] = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            yield fill_from_row(row)
+
+def iter_file_fills(paths: Sequence[str],
+                    addresses: Optional[Sequence[str]] = None,
+                    network: Optional[str] = None) -> Iterator[ReplayFill]:
+    """
+    Stream the fills of exported files (JSON lines or .csv), merged in time order, of one
+    network or, with network None, all.
+
+    Each file must be in time order, as `hyperliquid-monitor export fills` writes them.
+    """
+    streams = [_iter_file(path) for path in paths]
+    fills = heapq.merge(*streams, key=lambda item: _fill_time(item[1]))
+    if network is not None:
+        fills = (item for item in fills if item[2] == network)
+    if addresses is None:
+        yield from fills
+    else:
+        wanted = set(addresses)
+        yield from (item for item in fills if item[0] in wanted)
+
+def partition(address: str, count: int) -> int:
+    """
+    Worker an address is replayed by: a stable hash, so every fill of an address, on every
+    network, lands on one worker
+    """
+    return zlib.crc32(address.lower().encode()) % count
+
+class Replayer:
+    def __init__(self,
+                 db_path: str,
+                 alert_rules: Optional[List[AlertRule]] = None,
+                 write_batch_size: int = 5000):
+        """
+        Drive a monitor's event handler and position tracker from historical fills.
+
+        Each network's fills go to a monitor of that network, so positions and order states are
+        kept and stored per network as they were live. The monitors record into their own
+        database (never the one replayed from) and are never started, so nothing touches the
+        network. Alert rules see a virtual clock that follows the fills' timestamps, so windows
+        and cooldowns behave as they would have live; it is the only component that reads the
+        clock, since positions and stored rows are timed by the fills themselves.
+
+        Args:
+            db_path: Database the replayed fills, positions and order states are written to
+            alert_rules: Optional alert rules evaluated against the replayed fills
+            write_batch_size: Maximum number of fills the writer thread commits in one transaction
+        """
+        self.db_path = db_path
+        self.alert_rules = alert_rules or []
+        self.write_batch_size = write_batch_size
+        self.clock = VirtualClock()
+
+    def run(self, fills: Iterable[ReplayFill]) -> ReplayReport:
+        """
+        Replay fills, which must be in time order.
+
+        Returns:
+            ReplayReport: Counts, the replayed time range and the throughput
+        """
+        from hyperliquid_monitor.monitor import HyperliquidMonitor
+
+        report = ReplayReport()
+        alerts: Counter = Counter()
+        engine = AlertEngine(self.alert_rules, lambda alert: alerts.update([alert.rule.name]),
+                             clock=self.clock) if self.alert_rules else None
+        closes = [0]
+
+        def count_close(trade) -> None:
+            closes[0] += 1
+
+        monitors: Dict[str, HyperliquidMonitor] = {}
+
+        def network_monitor(network: str) -> HyperliquidMonitor:
+            monitor = monitors.get(network)
+            if monitor is None:
+                monitor = monitors[network] = HyperliquidMonitor(
+                    [], db_path=self.db_path, silent=True, write_batch_size=self.write_batch_size, network=network)
+                if engine:
+                    monitor.subscribe("fills", engine.evaluate, name="replay-alerts", synchronous=True)
+                monitor.subscribe("position_closes", count_close, name="replay-closes", synchronous=True)
+            return monitor
+
+        # (network, address) -> event handler
+        handlers: Dict[Tuple[str, str], Callable] = {}
+        first_ms = last_ms = None
+        started = time.perf_counter()
+        try:
+            for address, fill, network in fills:
+                handler = handlers.get((network, address))
+                if handler is None:
+                    handler = handlers[network, address] = network_monitor(network).create_event_handler(address)
+                time_ms = _fill_time(fill)
+                if first_ms is None:
+                    first_ms = time_ms
+                last_ms = time_ms
+                self.clock.advance_to(time_ms / 1000)
+                handler({"data": {"fills": [fill]}})
+                report.fills += 1
+            if not monitors:
+                # Nothing to replay: still create the (empty) database, e.g. for a shard to merge
+                network_monitor(DEFAULT_NETWORK)
+            for monitor in monitors.values():
+                monitor.writer.flush()
+        finally:
+            for monitor in monitors.values():
+                monitor.stop()
+        report.seconds = time.perf_counter() - started
+        report.addresses = len({address for _, address in handlers})
+        report.positions_closed = closes[0]
+        report.alerts = dict(alerts)
+        if first_ms is not None:
+            report.start = datetime.fromtimestamp(first_ms / 1000)
+            report.end = datetime.fromtimestamp(last_ms / 1000)
+        return report
+
+def _shard_path(db_path: str, index: int) -> str:
+    path = Path(db_path)
+    return str(path.with_name(f"{path.stem}-{index}{path.suffix}"))
+
+def _holds_history(db_path: str) -> bool:
+    """Whether a database exists and already holds fills or positions"""
+    if not os.path.exists(db_path):
+        return False
+    conn = connect_readonly(db_path)
+    try:
+        return any(conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() for table in ("fills", "positions"))
+    except sqlite3.OperationalError:  # Not a monitor database (yet)
+        return False
+    finally:
+        conn.close()
+
+def _remove_database(db_path: str) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+def _replay_shard(db_path: str,
+                  source_db: Optional[str],
+                  files: Optional[Sequence[str]],
+                  addresses: Optional[List[str]],
+                  index: int,
+                  workers: int,
+                  alert_rules: List[AlertRule],
+                  start: Optional[datetime],
+                  end: Optional[datetime],
+                  network: Optional[str] = None) -> ReplayReport:
+    """Replay the addresses of one partition; runs in a worker process"""
+    if source_db:
+        if addresses is None:
+            addresses = database_addresses(source_db)
+        mine = [address for address in addresses if partition(address, workers) == index]
+        fills = iter_database_fills(source_db, mine, start, end, network)
+    else:
+        fills = (item for item in iter_file_fills(files, addresses, network) if partition(item[0], workers) == index)
+    return Replayer(db_path, alert_rules).run(fills)
+
+def _combine(reports: List[ReplayReport]) -> ReplayReport:
+    combined = ReplayReport(workers=len(reports))
+    alerts: Counter = Counter()
+    for report in reports:
+        combined.fills += report.fills
+        combined.addresses += report.addresses
+        combined.positions_closed += report.positions_closed
+        alerts.update(report.alerts)
+        if report.start is not None:
+            combined.start = min(combined.start or report.start, report.start)
+            combined.end = max(combined.end or report.end, report.end)
+    combined.alerts = dict(alerts)
+    return combined
+
+def replay(db_path: str,
+           source_db: Optional[str] = None,
+           files: Optional[Sequence[str]] = None,
+           addresses: Optional[List[str]] = None,
+           workers: int = 1,
+           alert_rules: Optional[List[AlertRule]] = None,
+           start: Optional[datetime] = None,
+           end: Optional[datetime] = None,
+           merge: bool = True,
+           network: Optional[str] = None,
+           fresh: bool = False) -> ReplayReport:
+    """
+    Replay historical fills from a database or exported files into a new database.
+
+    With several workers, addresses are partitioned by a stable hash and each worker process
+    replays its partition into its own shard database (`<db>-<index>.db`). Positions only depend
+    on the fills of their own address, so the shards hold the same results as one sequential
+    replay; with `merge` they are merged into db_path afterwards.
+
+    The target must not hold fills or positions yet: fills already stored would be skipped as
+    duplicates while their position changes were applied a second time.
+
+    Args:
+        db_path: Database the replay is written to, must not be the source
+        source_db: Database to read fills from
+        files: Exported fill files to read instead (JSON lines or .csv)
+        addresses: Optional addresses to replay, defaults to all
+        workers: Number of worker processes
+        alert_rules: Optional alert rules evaluated against the replayed fills
+        start: Optional inclusive start time (source_db only)
+        end: Optional exclusive end time (source_db only)
+        merge: If True, the shard databases of several workers are merged into db_path and removed
+        network: Optional network whose fills are replayed, defaults to all. Each network is
+               replayed by its own monitor, so an address's positions stay within one network.
+        fresh: If True, an existing target database (and shards of an earlier run) is deleted first
+
+    Returns:
+        ReplayReport: Combined counts and the wall time of the whole replay, merge included
+
+    Raises:
+        ValueError: If the arguments are inconsistent, or the target already holds history and
+            fresh is False
+    """
+    if (source_db is None) == (not files):
+        raise ValueError("Specify either source_db or files")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if source_db and Path(source_db).resolve() == Path(db_path).resolve():
+        raise ValueError("The replay database can't also be the source")
+    shards = [_shard_path(db_path, index) for index in range(workers)] if workers > 1 else []
+    for target in [db_path, *shards]:
+        if fresh:
+            _remove_database(target)
+        elif _holds_history(target):
+            raise ValueError(f"{target} already holds fills or positions; replay into a new database or pass fresh (--fresh)")
+    alert_rules = alert_rules or []
+
+    started = time.perf_counter()
+    if workers == 1:
+        reports = [_replay_shard(db_path, source_db, files, addresses, 0, 1, alert_rules, start, end, network)]
+    else:
+        # spawn: worker processes must not inherit the parent's threads and open connections
+        with multiprocessing.get_context("spawn").Pool(workers) as pool:
+            reports = pool.starmap(_replay_shard, [
+                (shard, source_db, files, addresses, index, workers, alert_rules, start, end, network)
+                for index, shard in enumerate(shards)
+            ])
+        if merge:
+            from hyperliquid_monitor.merge import ShardMerger
+
+            merger = ShardMerger(db_path, shards)
+            try:
+                merger.run()
+            finally:
+                merger.close()
+            for shard in shards:
+                _remove_database(shard)
+    report = _combine(reports)
+    report.seconds = time.perf_counter() - started
+    return report
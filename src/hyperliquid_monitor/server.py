@@ -0,0 +1,311 @@
+import asyncio
+import dataclasses
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from hyperliquid_monitor.cache import LRUCache
+
+if TYPE_CHECKING:
+    from hyperliquid_monitor.monitor import HyperliquidMonitor
+
+logger = logging.getLogger(__name__)
+
+# Largest request head accepted from a client
+_MAX_HEADER_BYTES = 16 * 1024
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error", 503: "Service Unavailable"}
+
+def _json_default(value: Any) -> Any:
+    """Serialize the non-JSON types found in trades and query results"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def to_json(value: Any) -> bytes:
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+class QueryServer:
+    def __init__(self,
+                 monitor: "HyperliquidMonitor",
+                 host: str = "127.0.0.1",
+                 port: int = 8765,
+                 cache_size: int = 256,
+                 stream_queue_size: int = 1000):
+        """
+        Embedded read-only HTTP server over a running monitor's live state and history.
+
+        Endpoints (GET, JSON responses):
+            /positions?address=        Open positions
+            /history?address=&coin=&limit=
+                                       Closed positions, newest first
+            /fills?address=&limit=     Recent fills, newest first
+            /orders?address=&coin=     Resting orders from the in-memory order book
+            /stats?address=&coin=      Position and order statistics
+            /pnl?address=              Live unrealized PnL (monitors with mark_to_market)
+            /portfolio?name=           Net positions, exposure and PnL of a portfolio
+            /timings                   Time spent per ingest stage
+            /stream?address=           Live fills, orders and position closes as server-sent events
+
+        Database-backed responses are cached per address and invalidated when the monitor's
+        database writer commits a trade for that address.
+
+        Args:
+            monitor: Monitor whose state is served
+            host: Interface to bind
+            port: Port to bind, 0 picks a free port (see `port` after start())
+            cache_size: Maximum number of cached responses
+            stream_queue_size: Events buffered per stream client before the oldest are dropped
+        """
+        self.monitor = monitor
+        self.host = host
+        self.port = port
+        self.cache = LRUCache(cache_size)
+        self.stream_queue_size = stream_queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        # Bumped on every invalidation so a response computed across an ingest isn't cached
+        self._generations: Dict[str, int] = {}
+        self._routes: Dict[str, Callable[[Dict[str, str]], Any]] = {
+            "/positions": self._positions,
+            "/history": self._history,
+            "/fills": self._fills,
+            "/stats": self._stats,
+        }
+
+    def start(self) -> "QueryServer":
+        """Start serving in a background thread"""
+        if self.monitor.writer:
+            self.monitor.writer.add_commit_listener(self._invalidate)
+        self._thread = threading.Thread(target=self._run, name="query-server", daemon=True)
+        self._thread.start()
+        self._started.wait(5)
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and stop listening to the monitor"""
+        if self.monitor.writer:
+            self.monitor.writer.remove_commit_listener(self._invalidate)
+        if self._loop and self._loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(5)
+            except Exception:
+                pass
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(5)
+            self._thread = None
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle_client, self.host, self.port)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _shutdown(self) -> None:
+        """Close the listening socket and cancel open client connections"""
+        self._server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _invalidate(self, keys) -> None:
+        """Drop cached responses for the addresses of a committed batch (runs on the writer thread)"""
+        for address in {key[0] for key in keys}:
+            self._generations[address] = self._generations.get(address, 0) + 1
+            self.cache.invalidate(address)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                if len(head) > _MAX_HEADER_BYTES:
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split(" ")
+                if len(parts) != 3:
+                    await self._respond(writer, 400, to_json({"error": "Malformed request line"}), close=True)
+                    return
+                method, target, version = parts
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+
+                url = urlsplit(target)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                if method != "GET":
+                    await self._respond(writer, 405, to_json({"error": "Only GET is supported"}), close=True)
+                    return
+                if url.path == "/stream":
+                    await self._stream(writer, params)
+                    return
+
+                status, body = await self._dispatch(url.path, params)
+                await self._respond(writer, status, body, close=not keep_alive)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def _dispatch(self, path: str, params: Dict[str, str]) -> Tuple[int, bytes]:
+        try:
+            if path == "/orders":
+                # Already in memory, nothing to cache
+                address = self._require(params, "address")
+                return 200, to_json(self.monitor.get_open_orders(address, params.get("coin")))
+            if path == "/pnl":
+                # Moves with every price tick, nothing to cache
+                address = self._require(params, "address")
+                if not self.monitor.mtm:
+                    raise HTTPError(503, "Monitor has no mark-to-market configured")
+                return 200, to_json(self.monitor.get_unrealized_pnl(address))
+            if path == "/timings":
+                return 200, to_json({name: {**vars(stats), "avg_us": stats.avg_us}
+                                     for name, stats in self.monitor.get_stage_timings().items()})
+            if path == "/portfolio":
+                # Kept in memory, nothing to cache
+                name = self._require(params, "name")
+                if not self.monitor.portfolios:
+                    raise HTTPError(503, "Monitor has no portfolios configured")
+                try:
+                    return 200, to_json(self.monitor.get_portfolio(name))
+                except KeyError:
+                    raise HTTPError(404, f"Unknown portfolio: {name}")
+
+            route = self._routes.get(path)
+            if route is None:
+                raise HTTPError(404, f"Unknown endpoint: {path}")
+            address = self._require(params, "address")
+            key = (path, tuple(sorted(params.items())))
+            body = self.cache.get(key)
+            if body is None:
+                generation = self._generations.get(address, 0)
+                result = await asyncio.get_running_loop().run_in_executor(None, route, params)
+                body = to_json(result)
+                if self._generations.get(address, 0) == generation:
+                    self.cache.put(key, body, tags=(address,))
+            return 200, body
+        except HTTPError as e:
+            return e.status, to_json({"error": e.message})
+        except Exception as e:
+            logger.exception("Error handling %s", path)
+            return 500, to_json({"error": str(e)})
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: bytes, close: bool) -> None:
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+        )
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+    async def _stream(self, writer: asyncio.StreamWriter, params: Dict[str, str]) -> None:
+        """Push fills, orders and position closes to the client as server-sent events"""
+        address = params.get("address")
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(self.stream_queue_size)
+
+        def enqueue(item):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(item)
+
+        subscriptions = []
+        for topic in ("fills", "orders", "position_closes", "account_events"):
+            def forward(trade, topic=topic):
+                if address is None or trade.address == address:
+                    loop.call_soon_threadsafe(enqueue, (topic, trade))
+            subscriptions.append(self.monitor.bus.subscribe(
+                topic, forward, name=f"server-stream-{id(writer)}-{topic}", synchronous=True
+            ))
+
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+            await writer.drain()
+            while True:
+                topic, trade = await queue.get()
+                writer.write(b"event: " + topic.encode() + b"\ndata: " + to_json(trade) + b"\n\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            for subscription in subscriptions:
+                self.monitor.bus.unsubscribe(subscription)
+
+    def _require(self, params: Dict[str, str], name: str) -> str:
+        value = params.get(name)
+        if not value:
+            raise HTTPError(400, f"Missing required parameter: {name}")
+        return value
+
+    def _limit(self, params: Dict[str, str], default: int = 50) -> int:
+        try:
+            limit = int(params.get("limit", default))
+        except ValueError:
+            raise HTTPError(400, "limit must be an integer")
+        if limit < 1:
+            raise HTTPError(400, "limit must be positive")
+        return limit
+
+    def _tracker(self):
+        if not self.monitor.position_tracker:
+            raise HTTPError(503, "Monitor has no database configured")
+        return self.monitor.position_tracker
+
+    def _database(self):
+        if not self.monitor.db:
+            raise HTTPError(503, "Monitor has no database configured")
+        return self.monitor.db
+
+    def _positions(self, params: Dict[str, str]):
+        return self._tracker().get_open_positions(params["address"])
+
+    def _history(self, params: Dict[str, str]):
+        return self._tracker().get_position_history(params["address"], params.get("coin"), self._limit(params))
+
+    def _fills(self, params: Dict[str, str]):
+        return self._database().get_recent_fills(params["address"], self._limit(params), self.monitor.network)
+
+    def _stats(self, params: Dict[str, str]):
+        return {
+            'positions': self._tracker().get_position_stats(params["address"], params.get("coin")),
+            'orders': self._database().get_order_stats(params["address"], self.monitor.network)
+        }
@@ -1,8 +1,11 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Literal, Callable
+from typing import Optional, Literal, Callable, List
 
 TradeType = Literal["FILL", "ORDER_PLACED", "ORDER_CANCELLED"]
+
+# Network of monitors created without one, and of rows recorded before networks were tracked
+DEFAULT_NETWORK = "mainnet"
 TradeSide = Literal["BUY", "SELL"]
 
 @dataclass
@@ -22,7 +25,11 @@ class Trade:
     closed_pnl: Optional[float] = None
     order_id: Optional[int] = None
     position_duration: Optional[str] = None
+    # The closed position (see PositionTracker.apply_fill); its position_id is None while the
+    # write of the fill that opened it hasn't committed yet
     position_info: Optional[dict] = None
+    fill_count: Optional[int] = None  # Number of fills merged into this trade by a FillCoalescer
+    network: str = DEFAULT_NETWORK  # Network the trade happened on, e.g. "mainnet" or "testnet"
 
     def __post_init__(self):
         """Validate trade data after initialization"""
@@ -35,4 +42,31 @@ class Trade:
                 "Must be 'FILL', 'ORDER_PLACED', or 'ORDER_CANCELLED'"
             )
 
-TradeCallback = Callable[[Trade], None]
\ No newline at end of file
+TradeCallback = Callable[[Trade], None]
+
+AccountEventType = Literal["FUNDING", "LIQUIDATION", "LEDGER"]
+
+@dataclass
+class AccountEvent:
+    """A change to an account that isn't a fill: funding payment, liquidation or ledger update"""
+    timestamp: datetime
+    address: str
+    event_type: AccountEventType
+    usdc: Optional[float] = None  # Signed USDC amount (funding, ledger updates)
+    coin: Optional[str] = None
+    tx_hash: Optional[str] = None
+    details: Optional[dict] = None  # The event as received
+    network: str = DEFAULT_NETWORK
+
+    def __post_init__(self):
+        if self.event_type not in ("FUNDING", "LIQUIDATION", "LEDGER"):
+            raise ValueError(
+                f"Invalid event_type: {self.event_type}. "
+                "Must be 'FUNDING', 'LIQUIDATION', or 'LEDGER'"
+            )
+
+@dataclass
+class Page:
+    """One page of a history query"""
+    items: List[dict]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page, None on the last page
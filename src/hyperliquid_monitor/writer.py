@@ -0,0 +1,219 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Hashable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from hyperliquid_monitor.profiling import StageTimings
+
+Job = Callable[[sqlite3.Cursor], Any]
+CommitListener = Callable[[Set[Hashable]], None]
+ErrorHandler = Callable[[Exception], None]
+
+# Sentinel telling the writer thread to exit once the queue is drained
+_STOP = object()
+
+@dataclass
+class WriterMetrics:
+    jobs: int = 0
+    batches: int = 0
+    errors: int = 0
+    max_batch: int = 0
+    queue_depth: int = 0
+    commit_seconds: float = 0.0  # Total time spent executing and committing batches
+    enqueue_wait_seconds: float = 0.0  # Time producers spent blocked on a full queue
+
+    @property
+    def avg_batch(self) -> float:
+        return self.jobs / self.batches if self.batches else 0.0
+
+class DatabaseWriter:
+    def __init__(self,
+                 db_path: str,
+                 batch_size: int = 500,
+                 maxsize: int = 10000,
+                 on_error: Optional[ErrorHandler] = None,
+                 timings: Optional["StageTimings"] = None):
+        """
+        Single writer thread that owns the database connection and group-commits jobs.
+
+        Producers never touch SQLite: they submit jobs (functions taking a cursor) and carry on.
+        The writer runs every job waiting in the queue, up to batch_size, inside one transaction,
+        so a burst of fills costs one commit instead of one per fill.
+
+        Args:
+            db_path: Path to the SQLite database
+            batch_size: Maximum number of jobs per transaction
+            maxsize: Maximum number of queued jobs; submit() blocks when the queue is full
+            on_error: Optional function called with the exception of each failing job
+            timings: Optional stage timings each batch's transaction is recorded in, as "db_commit"
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Tuple[Any, Optional[Future], Optional[Hashable]]]" = queue.Queue(maxsize)
+        self._on_error = on_error
+        self._timings = timings
+        self._listeners: List[CommitListener] = []
+        self._metrics = WriterMetrics()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self,
+               job: Job,
+               key: Optional[Hashable] = None,
+               callback: Optional[Callable[[Future], None]] = None) -> Future:
+        """
+        Queue a job for the writer thread.
+
+        Args:
+            job: Function called with the writer's cursor inside a transaction
+            key: Optional key (e.g. (address, coin)) reported to commit listeners once the
+                 job's transaction is committed
+            callback: Optional function called with the job's future on the writer thread once
+                      it is resolved: after the transaction commits, or once the job or the whole
+                      transaction failed. Callbacks run in job order, so in-memory state can be
+                      marked as committed (or rolled back) exactly as the database was.
+
+        Returns:
+            Future: Resolves to the job's return value after its transaction commits
+        """
+        if self._closed:
+            raise RuntimeError("DatabaseWriter is closed")
+        future: Future = Future()
+        if callback:
+            future.add_done_callback(callback)
+        item = (job, future, key)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            started = time.perf_counter()
+            self._queue.put(item)
+            self._metrics.enqueue_wait_seconds += time.perf_counter() - started
+        return future
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def add_commit_listener(self, listener: CommitListener) -> None:
+        """Call a function with the keys of the jobs in each committed batch"""
+        self._listeners = self._listeners + [listener]
+
+    def remove_commit_listener(self, listener: CommitListener) -> None:
+        self._listeners = [l for l in self._listeners if l is not listener]
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until every job submitted so far is committed"""
+        self.submit(lambda cursor: None).result(timeout)
+
+    def _run(self) -> None:
+        # Another process (or the writer of another network) may hold the write lock for a while
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        cursor = conn.cursor()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = any(item[0] is _STOP for item in batch)
+                jobs = [item for item in batch if item[0] is not _STOP]
+                # Don't keep the batch alive while blocked on the next one
+                batch.clear()
+                if jobs:
+                    self._execute(cursor, jobs)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _execute(self, cursor: sqlite3.Cursor, jobs: list) -> None:
+        """Run a batch of jobs in one transaction, isolating failures with savepoints"""
+        started = time.perf_counter()
+        started_ns = time.perf_counter_ns()
+        results = []
+        keys: Set[Hashable] = set()
+        try:
+            # Take the write lock up front: a deferred transaction that reads first can't wait for
+            # another writer's lock when it later writes (SQLITE_BUSY_SNAPSHOT in WAL mode)
+            cursor.execute("BEGIN IMMEDIATE")
+            for job, future, key in jobs:
+                cursor.execute("SAVEPOINT job")
+                try:
+                    results.append((future, job(cursor), None))
+                    cursor.execute("RELEASE job")
+                    if key is not None:
+                        keys.add(key)
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO job")
+                    cursor.execute("RELEASE job")
+                    results.append((future, None, e))
+                    self._metrics.errors += 1
+                    if self._on_error:
+                        self._on_error(e)
+            cursor.execute("COMMIT")
+        except Exception as e:
+            # The transaction as a whole failed (lock timeout, disk full, aborted by SQLite): none of
+            # the batch is committed. Fail its jobs and keep the writer running for the next batches.
+            self._abort(cursor, jobs, e)
+            results.clear()
+            return
+        if self._timings:
+            self._timings.record("db_commit", started_ns)
+
+        self._metrics.jobs += len(jobs)
+        self._metrics.batches += 1
+        self._metrics.max_batch = max(self._metrics.max_batch, len(jobs))
+        self._metrics.commit_seconds += time.perf_counter() - started
+        jobs.clear()
+
+        for listener in self._listeners:
+            try:
+                listener(keys)
+            except Exception as e:
+                if self._on_error:
+                    self._on_error(e)
+        for i, (future, result, error) in enumerate(results):
+            # Drop each entry before resolving it, so a flush() returning sees nothing retained
+            results[i] = None
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _abort(self, cursor: sqlite3.Cursor, jobs: list, error: Exception) -> None:
+        """
+        Roll back a failed batch and fail every job in it with the error. The jobs' callbacks
+        undo the in-memory state of the rolled back writes.
+        """
+        if cursor.connection.in_transaction:
+            try:
+                cursor.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+        self._metrics.errors += 1
+        if self._on_error:
+            self._on_error(error)
+        for _, future, _ in jobs:
+            if future is not None and not future.done():
+                future.set_exception(error)
+        jobs.clear()
+
+    def metrics(self) -> WriterMetrics:
+        self._metrics.queue_depth = self._queue.qsize()
+        return self._metrics
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Commit everything still queued and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((_STOP, None, None))
+        self._thread.join(timeout)
@@ -0,0 +1,76 @@
+import json
+from dataclasses import replace
+import pytest
+from hyperliquid_monitor.alerts import AlertEngine, AlertRule, load_rules
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_invalid_condition():
+    with pytest.raises(ValueError, match="Invalid condition"):
+        AlertRule(name="bad", condition="INVALID", threshold=1)
+
+def test_duplicate_rule_names():
+    rule = AlertRule(name="dup", condition="fill_notional_above", threshold=1)
+    with pytest.raises(ValueError, match="unique"):
+        AlertEngine([rule, rule])
+
+def test_fill_notional_rule_filtered_by_coin(sample_trade):
+    fired = []
+    engine = AlertEngine(
+        [AlertRule(name="big-eth", condition="fill_notional_above", threshold=900, coin="ETH"),
+         AlertRule(name="big-btc", condition="fill_notional_above", threshold=900, coin="BTC")],
+        callback=fired.append
+    )
+    
+    alerts = engine.evaluate(sample_trade)  # 0.5 * 1850.5 = 925.25
+    
+    assert [a.rule.name for a in alerts] == ["big-eth"]
+    assert fired == alerts
+    assert abs(alerts[0].value - 925.25) < 1e-9
+    metrics = engine.metrics()
+    assert metrics["big-eth"].evaluations == 1
+    assert metrics["big-btc"].evaluations == 0  # never dispatched for an ETH trade
+
+def test_closed_pnl_rule(sample_trade):
+    engine = AlertEngine([AlertRule(name="loss", condition="closed_pnl_below", threshold=-50)])
+    
+    assert engine.evaluate(sample_trade) == []  # no position closed
+    losing = replace(sample_trade, position_info={"pnl": -75.0})
+    assert [a.value for a in engine.evaluate(losing)] == [-75.0]
+
+def test_cancel_count_window_and_cooldown(sample_trade):
+    clock = FakeClock()
+    engine = AlertEngine(
+        [AlertRule(name="cancels", condition="cancel_count_above", threshold=2,
+                   window_seconds=10, cooldown_seconds=30)],
+        clock=clock
+    )
+    cancel = replace(sample_trade, trade_type="ORDER_CANCELLED", order_id=1)
+    
+    assert engine.evaluate(cancel) == []
+    clock.now = 1
+    assert engine.evaluate(cancel) == []
+    clock.now = 2
+    assert len(engine.evaluate(cancel)) == 1
+    clock.now = 3
+    assert engine.evaluate(cancel) == []  # cooldown
+    assert engine.metrics()["cancels"].suppressed == 1
+    
+    clock.now = 40  # earlier cancels left the window
+    assert engine.evaluate(cancel) == []
+    assert engine.evaluate(replace(sample_trade, trade_type="FILL")) == []
+
+def test_load_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [
+        {"name": "big", "condition": "fill_notional_above", "threshold": 100000, "coin": "ETH"}
+    ]}))
+    
+    rules = load_rules(str(path))
+    
+    assert rules == [AlertRule(name="big", condition="fill_notional_above", threshold=100000, coin="ETH")]
@@ -0,0 +1,146 @@
+import sqlite3
+
+import pytest
+
+from hyperliquid_monitor.archive import ArchiveError, Segment, archive_history, write_segment
+from hyperliquid_monitor.database import TradeDatabase, _parse_db_time
+from hyperliquid_monitor.position_tracker import PositionTracker
+from hyperliquid_monitor.query import connect_readonly, iter_rows
+
+ADDRESSES = ["0xaaa...", "0xbbb..."]
+
+@pytest.fixture
+def history(temp_db_path, sample_fill_data):
+    """Two addresses opening and closing ETH and BTC longs an hour apart, one left open each"""
+    db = TradeDatabase(temp_db_path)
+    tracker = PositionTracker(temp_db_path)
+    for i in range(42):
+        fill = _fill(sample_fill_data, i)
+        tracker.process_fill(fill, db.store_fill(fill))
+    db.close()
+    return temp_db_path
+
+def _fill(sample_fill_data, i):
+    opening = (i // 4) % 2 == 0
+    return {**sample_fill_data, "address": ADDRESSES[i % 2], "coin": "ETH" if i % 4 < 2 else "BTC",
+            "tid": i, "time": sample_fill_data["time"] + i * 3600000, "px": str(1800 + i % 7 * 10),
+            "dir": "Open Long" if opening else "Close Long", "closedPnl": "0" if opening else str(i % 5 - 2)}
+
+def _snapshot(db_path):
+    """Every history query, read through fresh (uncached) objects"""
+    db = TradeDatabase(db_path)
+    tracker = PositionTracker(db_path, cache_size=0)
+    result = {}
+    for address in ADDRESSES:
+        pages, cursor = [], None
+        while True:
+            page = db.get_fills_page(address, cursor=cursor, limit=3)
+            pages.append([fill["tid"] for fill in page.items])
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        result[address] = {
+            "fills": list(db.iter_fills(address, fetch_size=4)),
+            "fills_desc": [fill["tid"] for fill in db.iter_fills(address, descending=True)],
+            "btc": [fill["tid"] for fill in db.iter_fills(address, coin="BTC")],
+            "pages": pages,
+            "recent": db.get_recent_fills(address, limit=5),
+            "totals": db.get_realized_totals(address),
+            "history": tracker.get_position_history(address, limit=100),
+            "history_eth": tracker.get_position_history(address, coin="ETH"),
+            "streamed": list(tracker.iter_position_history(address, fetch_size=2)),
+            "open": tracker.get_open_positions(address),
+            "stats": tracker.get_position_stats(address),
+        }
+    db.close()
+    return result
+
+def test_archived_history_reads_through(history):
+    before = _snapshot(history)
+    conn = sqlite3.connect(history)
+    cutoff = _parse_db_time(conn.execute("SELECT timestamp FROM fills WHERE tid = 20").fetchone()[0])
+
+    report = archive_history(history, cutoff, block_rows=4)
+
+    assert report.rows["fills"] == 20
+    assert report.rows["positions"] > 0
+    assert len(report.segments) == 2
+    assert conn.execute("SELECT COUNT(*) FROM fills").fetchone()[0] == 22
+    assert conn.execute("SELECT MIN(tid) FROM fills").fetchone()[0] == 20
+    assert conn.execute("SELECT COUNT(*) FROM positions WHERE status = 'OPEN'").fetchone()[0] == 2
+    conn.close()
+    assert _snapshot(history) == before
+
+    # Time ranges spanning the database and the archive
+    db = TradeDatabase(history)
+    spanning = [fill["tid"] for fill in db.iter_fills(ADDRESSES[0], start=cutoff.replace(hour=0), end=cutoff.replace(hour=23))]
+    assert spanning == [fill["tid"] for fill in before[ADDRESSES[0]]["fills"]
+                        if cutoff.replace(hour=0) <= fill["timestamp"] < cutoff.replace(hour=23)]
+    db.close()
+
+    # Read-only connections (the CLI and query server) see the archive too
+    conn = connect_readonly(history)
+    assert sum(1 for _ in iter_rows(conn, "fills", "address", "timestamp", {"address": None})) == 42
+    conn.close()
+
+    # Nothing left to archive
+    assert archive_history(history, cutoff).rows == {}
+
+def test_positions_closed_after_archiving_merge_in_order(history, sample_fill_data):
+    conn = sqlite3.connect(history)
+    cutoff = _parse_db_time(conn.execute("SELECT MAX(timestamp) FROM fills").fetchone()[0])
+    conn.close()
+    archive_history(history, cutoff, vacuum=True)
+
+    tracker = PositionTracker(history, cache_size=0)
+    db = TradeDatabase(history)
+    close = {**sample_fill_data, "address": ADDRESSES[0], "dir": "Close Long", "tid": 100,
+             "time": sample_fill_data["time"] + 100 * 3600000}
+    tracker.process_fill(close, db.store_fill(close))
+
+    history_rows = tracker.get_position_history(ADDRESSES[0], limit=100)
+    exit_times = [position["exit_time"] for position in history_rows]
+    assert exit_times == sorted(exit_times, reverse=True)
+    assert history_rows[0]["exit_price"] == float(sample_fill_data["px"])
+    assert db.get_recent_fills(ADDRESSES[0], limit=1)[0]["tid"] == 100
+    db.close()
+
+def test_archived_fills_not_stored_again_after_restart(mocker, history, sample_fill_data):
+    from hyperliquid_monitor.monitor import HyperliquidMonitor
+
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    conn = sqlite3.connect(history)
+    cutoff = _parse_db_time(conn.execute("SELECT timestamp FROM fills WHERE tid = 20").fetchone()[0])
+    conn.close()
+    archive_history(history, cutoff)
+    before = _snapshot(history)
+
+    # The snapshot sent on subscription re-sends the archived fills along with the live ones
+    monitor = HyperliquidMonitor([ADDRESSES[0]], db_path=history, silent=True)
+    monitor.restore_state()
+    fills = [{key: value for key, value in _fill(sample_fill_data, i).items() if key != "address"}
+             for i in range(0, 42, 2)]
+    monitor.create_event_handler(ADDRESSES[0])({"data": {"isSnapshot": True, "user": ADDRESSES[0], "fills": fills}})
+    monitor.writer.flush()
+    monitor.stop()
+
+    assert _snapshot(history) == before
+
+def test_segment_format(tmp_path):
+    path = str(tmp_path / "fills.seg")
+    columns = ["id", "timestamp", "address", "coin"]
+    rows = [(i, f"2023-11-08 15:{i:02d}:00", "0xa" if i < 5 else "0xb", "ETH") for i in range(8)]
+    ids, min_time, max_time = write_segment(path, "fills", "timestamp", columns, rows, block_rows=2)
+
+    segment = Segment(path)
+    assert ids == list(range(8))
+    assert (min_time, max_time) == ("2023-11-08 15:00:00", "2023-11-08 15:07:00")
+    assert segment.addresses() == ["0xa", "0xb"]
+    assert [row[0] for row in segment.rows("0xa")] == [0, 1, 2, 3, 4]
+    assert [row[0] for row in segment.rows("0xa", descending=True, high="2023-11-08 15:01:00")] == [1, 0]
+    segment.close()
+
+    with open(path, "r+b") as f:
+        f.write(b"NOTSEG")
+    with pytest.raises(ArchiveError):
+        Segment(path)
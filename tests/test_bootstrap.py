@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from hyperliquid_monitor.bootstrap import SnapshotClient, positions_from_state
+from hyperliquid_monitor.monitor import HyperliquidMonitor
+
+def _state(*positions):
+    return {"assetPositions": [{"type": "oneWay", "position": {"coin": coin, "szi": szi, "entryPx": px}}
+                               for coin, szi, px in positions]}
+
+class StubInfoServer:
+    """Local stand-in for the info endpoint, answering from canned responses"""
+
+    def __init__(self, states, orders, rate_limit_first=0):
+        self.states = states
+        self.orders = orders
+        self.rate_limit_left = rate_limit_first
+        self.requests = []
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        self.release.set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.release.wait(5)
+                with stub.lock:
+                    stub.requests.append(body)
+                    limited = stub.rate_limit_left > 0
+                    stub.rate_limit_left -= limited
+                if limited:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                if self.path != "/info":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                if body["type"] == "clearinghouseState":
+                    response = stub.states.get(body["user"], _state())
+                elif body["type"] == "openOrders":
+                    response = stub.orders.get(body["user"], [])
+                else:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                data = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(states=None, orders=None, rate_limit_first=0):
+        server = StubInfoServer(states or {}, orders or {}, rate_limit_first)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+def test_positions_from_state():
+    positions = positions_from_state("0xa", _state(("ETH", "-1.5", "1800.0"), ("BTC", "0.0", None)))
+    assert [(p.coin, p.side, p.size, p.entry_price) for p in positions] == [("ETH", "SHORT", 1.5, 1800.0)]
+
+def test_concurrent_fetch_retries_rate_limited_requests(stub):
+    addresses = [f"0x{i:040x}" for i in range(20)]
+    server = stub({addresses[0]: _state(("ETH", "2", "1850"))},
+                  {addresses[1]: [{"coin": "BTC", "limitPx": "35000", "oid": 1, "side": "B", "sz": "0.1"}]},
+                  rate_limit_first=3)
+    client = SnapshotClient(server.url, workers=4, rate=1000, backoff=0)
+    try:
+        snapshots = client.fetch(addresses + addresses[:5])
+    finally:
+        client.close()
+
+    assert list(snapshots) == addresses
+    assert all(snapshot.error is None for snapshot in snapshots.values())
+    assert snapshots[addresses[0]].positions[0].size == 2.0
+    assert snapshots[addresses[1]].open_orders[0]["oid"] == 1
+    assert client.stats.rate_limited == 3
+    assert client.stats.requests == 2 * len(addresses) + 3
+
+def test_identical_requests_in_flight_coalesced(stub):
+    server = stub()
+    server.release.clear()
+    client = SnapshotClient(server.url, workers=2, rate=1000)
+    try:
+        first = client.clearinghouse_state("0xa")
+        second = client.clearinghouse_state("0xa")
+        server.release.set()
+        assert first is second
+        assert first.result(5) == _state()
+    finally:
+        client.close()
+    assert client.stats.coalesced == 1
+    assert len(server.requests) == 1
+
+def test_errors_reported_per_address(stub):
+    server = stub()
+    client = SnapshotClient(server.url + "/missing", retries=0)
+    try:
+        snapshot = client.fetch(["0xa"])["0xa"]
+    finally:
+        client.close()
+    assert "clearinghouseState" in snapshot.error
+    assert snapshot.open_orders is None
+
+def test_monitor_seeds_positions_before_monitoring(stub, temp_db_path, sample_fill_data):
+    server = stub({"0x123...": _state(("ETH", "0.5", "1800.0"), ("BTC", "-0.1", "35000"))},
+                  {"0x123...": [{"coin": "BTC", "limitPx": "35000.5", "oid": 54321, "side": "B", "sz": "0.1",
+                                 "timestamp": 1699457400000}]})
+    monitor = HyperliquidMonitor(["0x123..."], db_path=temp_db_path, silent=True, bootstrap=True)
+    # A position already tracked from fills isn't duplicated
+    handler = monitor.create_event_handler("0x123...")
+    handler({"data": {"fills": [{**sample_fill_data, "coin": "BTC", "dir": "Open Short", "tid": 1}]}})
+    monitor.writer.flush()
+
+    client = SnapshotClient(server.url)
+    try:
+        monitor.bootstrap_snapshots(client)
+    finally:
+        client.close()
+
+    positions = {p["coin"]: p for p in monitor.position_tracker.get_open_positions("0x123...")}
+    assert positions["ETH"]["size"] == 0.5 and positions["ETH"]["side"] == "LONG"
+    assert positions["BTC"]["entry_price"] == float(sample_fill_data["px"])
+    assert [order.oid for order in monitor.get_open_orders("0x123...")] == [54321]
+
+    # The fills sent on subscription reach back before the snapshot: the fill that opened the
+    # seeded position is stored, but doesn't open it a second time
+    handler({"data": {"isSnapshot": True, "user": "0x123...", "fills": [{**sample_fill_data, "tid": 3}]}})
+    monitor.writer.flush()
+    assert [(p["coin"], p["size"]) for p in monitor.position_tracker.get_open_positions("0x123...")
+            if p["coin"] == "ETH"] == [("ETH", 0.5)]
+    assert 3 in [fill["tid"] for fill in monitor.db.get_recent_fills("0x123...")]
+
+    # The first closing fill after the snapshot now closes the seeded position
+    handler({"data": {"fills": [{**sample_fill_data, "dir": "Close Long", "tid": 2,
+                                 "time": int(time.time() * 1000) + 1000}]}})
+    monitor.writer.flush()
+    history = monitor.position_tracker.get_position_history("0x123...")
+    assert history[0]["coin"] == "ETH"
+    assert history[0]["entry_price"] == 1800.0
+    monitor.stop()
+
+    with pytest.raises(ValueError):
+        HyperliquidMonitor(["0x123..."], bootstrap=True)
@@ -0,0 +1,120 @@
+import threading
+import pytest
+from hyperliquid_monitor.bus import EventBus
+
+def test_invalid_topic():
+    bus = EventBus()
+    with pytest.raises(ValueError, match="Invalid topic"):
+        bus.subscribe("INVALID", lambda item: None)
+
+def test_invalid_overflow_policy():
+    bus = EventBus()
+    with pytest.raises(ValueError, match="Invalid overflow policy"):
+        bus.subscribe("fills", lambda item: None, overflow="INVALID")
+
+def test_synchronous_delivery_per_topic():
+    bus = EventBus()
+    fills, orders = [], []
+    bus.subscribe("fills", fills.append, synchronous=True)
+    bus.subscribe("orders", orders.append, synchronous=True)
+    
+    bus.publish("fills", 1)
+    bus.publish("orders", 2)
+    
+    assert fills == [1]
+    assert orders == [2]
+    assert not bus.has_subscribers("position_closes")
+
+def test_queued_subscriber_delivers_in_order():
+    bus = EventBus()
+    received = []
+    subscription = bus.subscribe("fills", received.append, name="writer")
+    
+    for i in range(100):
+        bus.publish("fills", i)
+    bus.close()
+    
+    assert received == list(range(100))
+    metrics = subscription.metrics
+    assert metrics.delivered == 100
+    assert metrics.dropped == 0
+    assert metrics.queue_depth == 0
+
+def _blocked_subscriber(bus, overflow):
+    """Subscribe a handler that waits for a release event, so the queue fills up"""
+    started, release = threading.Event(), threading.Event()
+    received = []
+    def handler(item):
+        started.set()
+        release.wait(5)
+        received.append(item)
+    subscription = bus.subscribe("fills", handler, maxsize=2, overflow=overflow)
+    bus.publish("fills", 0)
+    started.wait(5)
+    return subscription, release, received
+
+def test_drop_oldest_overflow():
+    bus = EventBus()
+    subscription, release, received = _blocked_subscriber(bus, "drop_oldest")
+    for i in range(1, 5):
+        bus.publish("fills", i)
+    release.set()
+    bus.close()
+    
+    assert received == [0, 3, 4]
+    assert subscription.metrics.dropped == 2
+
+def test_drop_newest_overflow():
+    bus = EventBus()
+    subscription, release, received = _blocked_subscriber(bus, "drop_newest")
+    for i in range(1, 5):
+        bus.publish("fills", i)
+    release.set()
+    bus.close()
+    
+    assert received == [0, 1, 2]
+    assert subscription.metrics.dropped == 2
+
+def test_slow_subscriber_does_not_block_others():
+    bus = EventBus()
+    subscription, release, received = _blocked_subscriber(bus, "drop_newest")
+    fast = []
+    bus.subscribe("fills", fast.append, synchronous=True)
+    for i in range(1, 10):
+        bus.publish("fills", i)
+    
+    assert fast == list(range(1, 10))
+    release.set()
+    bus.close()
+
+def test_handler_errors_are_isolated():
+    errors = []
+    bus = EventBus(on_error=lambda name, e: errors.append((name, str(e))))
+    received = []
+    def failing(item):
+        raise RuntimeError("boom")
+    bus.subscribe("fills", failing, name="failing", synchronous=True)
+    bus.subscribe("fills", received.append, synchronous=True)
+    
+    bus.publish("fills", 1)
+    
+    assert received == [1]
+    assert errors == [("failing", "boom")]
+    assert bus.metrics()["failing"].errors == 1
+
+def test_metrics_counted_under_concurrent_publishers():
+    bus = EventBus()
+    subscription = bus.subscribe("fills", lambda item: None, synchronous=True)
+    
+    def publish():
+        for i in range(2000):
+            bus.publish("fills", i)
+    
+    threads = [threading.Thread(target=publish) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    metrics = subscription.metrics
+    assert metrics.published == metrics.delivered == 16000
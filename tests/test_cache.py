@@ -0,0 +1,42 @@
+import pytest
+from hyperliquid_monitor.cache import LRUCache
+
+def test_invalid_maxsize():
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+def test_lru_eviction_order():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+    
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats().evictions == 1
+
+def test_invalidate_by_tag():
+    cache = LRUCache(10)
+    cache.put(("positions", "0xa"), 1, tags=("0xa",))
+    cache.put(("history", "0xa"), 2, tags=("0xa", ("0xa", "ETH")))
+    cache.put(("positions", "0xb"), 3, tags=("0xb",))
+    
+    assert cache.invalidate(("0xa", "ETH")) == 1
+    assert cache.invalidate("0xa") == 1
+    assert cache.invalidate("0xa") == 0
+    assert len(cache) == 1
+    assert cache.get(("positions", "0xb")) == 3
+
+def test_hit_rate():
+    cache = LRUCache(10)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("missing")
+    
+    stats = cache.stats()
+    assert stats.hits == 2
+    assert stats.misses == 1
+    assert abs(stats.hit_rate - 2 / 3) < 1e-9
@@ -0,0 +1,90 @@
+import pytest
+from datetime import datetime
+from hyperliquid_monitor.checkpoint import (
+    Checkpoint, CheckpointError, decode_checkpoint, encode_checkpoint, read_checkpoint, write_checkpoint
+)
+from hyperliquid_monitor.dedup import FillDeduplicator
+from hyperliquid_monitor.monitor import HyperliquidMonitor
+from hyperliquid_monitor.position_tracker import Position
+
+def test_encode_decode_round_trip():
+    position = Position("0x1", "ETH", "LONG", 0.5, 1850.5, datetime(2023, 11, 8, 15, 30), 7, id=3)
+    checkpoint = Checkpoint(fill_high_water=10, position_high_water=3, positions={"0x1": [position]},
+                            fills={"0x1": {"last_time": 5, "floor_time": 0, "fills": [[1, 5]]}})
+    
+    restored = decode_checkpoint(encode_checkpoint(checkpoint))
+    
+    assert restored.positions == {"0x1": [position]}
+    assert restored.fills == checkpoint.fills
+    assert restored.fill_high_water == 10
+
+def test_invalid_checkpoints_rejected(tmp_path):
+    data = encode_checkpoint(Checkpoint(fill_high_water=0, position_high_water=0))
+    with pytest.raises(CheckpointError):
+        decode_checkpoint(b"garbage")
+    with pytest.raises(CheckpointError):
+        decode_checkpoint(data[:-5])
+    assert read_checkpoint(str(tmp_path / "missing.ckpt")) is None
+    
+    path = tmp_path / "state.ckpt"
+    write_checkpoint(str(path), decode_checkpoint(data))
+    assert read_checkpoint(str(path)).fill_high_water == 0
+    assert not (tmp_path / "state.ckpt.tmp").exists()
+
+def test_deduplicator_window():
+    dedup = FillDeduplicator(window=2)
+    assert not dedup.check("0x1", 1, 1000)
+    assert dedup.check("0x1", 1, 1000)
+    assert not dedup.check("0x1", None, 1000)  # No trade id, can't tell
+    dedup.add("0x1", 2, 2000)
+    dedup.add("0x1", 3, 3000)
+    
+    # tid 1 left the window but is older than what was evicted
+    assert dedup.check("0x1", 1, 1000)
+    assert not dedup.is_duplicate("0x1", 4, 4000)
+    
+    copy = FillDeduplicator(window=2)
+    copy.load(dedup.to_dict())
+    assert copy.is_duplicate("0x1", 3, 3000)
+    assert copy.last_fill_time("0x1") == 3000
+
+def _monitor(mocker, db_path, checkpoint_path=None):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    return HyperliquidMonitor(["0x123..."], db_path=db_path, silent=True, checkpoint_path=checkpoint_path)
+
+def test_warm_restart(mocker, tmp_path, sample_fill_data):
+    db_path = str(tmp_path / "trades.db")
+    checkpoint_path = str(tmp_path / "state.ckpt")
+    eth = {**sample_fill_data, "tid": 1}
+    btc = {**sample_fill_data, "coin": "BTC", "tid": 2, "time": sample_fill_data["time"] + 1000}
+    
+    monitor = _monitor(mocker, db_path, checkpoint_path)
+    monitor.create_event_handler("0x123...")({"data": {"fills": [eth, btc]}})
+    monitor.stop()  # Writes the final checkpoint
+    
+    # Rows committed after the checkpoint by a run that crashed before checkpointing again
+    crashed = _monitor(mocker, db_path)
+    crashed.restore_state()
+    crashed.create_event_handler("0x123...")({"data": {"fills": [
+        {**btc, "dir": "Close Long", "tid": 3, "time": btc["time"] + 1000},
+        {**sample_fill_data, "coin": "SOL", "tid": 4, "time": btc["time"] + 2000}
+    ]}})
+    crashed.writer.flush()
+    crashed.writer.close()
+    
+    restarted = _monitor(mocker, db_path, checkpoint_path)
+    restarted.restore_state()
+    tracker = restarted.position_tracker
+    assert sorted(p.coin for items in tracker._books["0x123..."].values() for p in items) == ["ETH", "SOL"]
+    
+    # The snapshot sent on subscription is skipped, new fills are processed
+    received = []
+    restarted.subscribe("fills", received.append, synchronous=True)
+    handler = restarted.create_event_handler("0x123...")
+    handler({"data": {"fills": [eth, btc, {**eth, "dir": "Close Long", "tid": 5, "time": btc["time"] + 5000}]}})
+    restarted.writer.flush()
+    
+    assert [trade.position_info["coin"] for trade in received] == ["ETH"]
+    assert [p["coin"] for p in tracker.get_open_positions("0x123...")] == ["SOL"]
+    assert len(restarted.db.get_recent_fills("0x123...", limit=10)) == 5
+    restarted.stop()
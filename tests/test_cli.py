@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import sqlite3
+
+import pytest
+
+from hyperliquid_monitor.cli import _shard, main
+from hyperliquid_monitor.database import TradeDatabase
+from hyperliquid_monitor.position_tracker import PositionTracker
+from hyperliquid_monitor.query import connect_readonly
+
+ADDRESS = "0x123..."
+
+@pytest.fixture
+def populated_db(temp_db_path, sample_fill_data):
+    db = TradeDatabase(temp_db_path)
+    tracker = PositionTracker(temp_db_path)
+    for i in range(3):
+        fill = {**sample_fill_data, "tid": i, "time": sample_fill_data["time"] + i * 2000}
+        fill_id = db.store_fill({**fill, "address": ADDRESS})
+        tracker.process_fill({**fill, "address": ADDRESS}, fill_id)
+    close = {**sample_fill_data, "tid": 10, "dir": "Close Long", "time": sample_fill_data["time"] + 10000}
+    tracker.process_fill({**close, "address": ADDRESS}, db.store_fill({**close, "address": ADDRESS}))
+    db.close()
+    return temp_db_path
+
+def run(*argv):
+    out = io.StringIO()
+    assert main(list(argv), out=out) == 0
+    return out.getvalue()
+
+def test_export_json_lines_and_csv(populated_db):
+    rows = [json.loads(line) for line in run("export", "fills", "--db", populated_db).splitlines()]
+    assert [row["tid"] for row in rows] == [0, 1, 2, 10]
+    assert rows[0]["address"] == ADDRESS
+    
+    rows = list(csv.DictReader(io.StringIO(run("export", "fills", "--db", populated_db, "--format", "csv",
+                                                "--start", "2023-11-08T15:30:01"))))
+    assert [row["tid"] for row in rows] == ["1", "2", "10"]
+
+def test_network_filter(populated_db, sample_fill_data):
+    db = TradeDatabase(populated_db)
+    db.store_fill({**sample_fill_data, "address": ADDRESS, "tid": 0, "network": "testnet"})
+    db.close()
+    
+    assert len(run("export", "fills", "--db", populated_db).splitlines()) == 5
+    rows = [json.loads(line) for line in run("export", "fills", "--db", populated_db, "--network", "testnet").splitlines()]
+    assert [(row["tid"], row["network"]) for row in rows] == [(0, "testnet")]
+    assert len(run("export", "fills", "--db", populated_db, "--network", "mainnet").splitlines()) == 4
+    assert json.loads(run("stats", ADDRESS, "--db", populated_db, "--network", "testnet"))["closed_positions"] == 0
+    assert run("tail", "--db", populated_db, "--from-id", "0", "--network", "testnet", "--count", "1").count("testnet") == 1
+
+def test_positions_and_stats(populated_db):
+    open_positions = run("positions", ADDRESS, "--db", populated_db).splitlines()
+    assert len(open_positions) == 2
+    closed, = [json.loads(line) for line in run("positions", ADDRESS, "--history", "--db", populated_db).splitlines()]
+    assert closed["status"] == "CLOSED"
+    
+    stats = json.loads(run("stats", ADDRESS, "--db", populated_db))
+    assert stats["address"] == ADDRESS
+    assert stats["closed_positions"] == 1
+    assert stats["open_positions"] == 2
+
+def test_tail_follows_by_row_id(populated_db):
+    rows = [json.loads(line) for line in
+            run("tail", "--db", populated_db, "--from-id", "1", "--count", "2").splitlines()]
+    assert [row["id"] for row in rows] == [2, 3]
+    # By default only fills committed after starting are shown
+    assert run("tail", "--db", populated_db, "--idle-timeout", "0") == ""
+
+def test_readonly_connection(populated_db, tmp_path):
+    conn = connect_readonly(populated_db)
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM fills")
+    conn.close()
+    with pytest.raises(sqlite3.OperationalError):
+        connect_readonly(str(tmp_path / "missing.db"))
+    assert not (tmp_path / "missing.db").exists()
+
+def test_shards_partition_addresses():
+    addresses = [f"0x{i:040x}" for i in range(100)]
+    shards = [_shard(addresses, f"{i}/4") for i in range(4)]
+    assert sorted(sum(shards, [])) == addresses
+    assert all(shards)
+    with pytest.raises(SystemExit):
+        _shard(addresses, "4/4")
+
+def test_archive_then_export(populated_db, tmp_path):
+    before = run("export", "fills", "--db", populated_db)
+    report = json.loads(run("archive", "--db", populated_db, "--before", "2030-01-01", "--dir", str(tmp_path / "segments")))
+    assert report["fills_archived"] == 4
+    assert report["positions_archived"] == 1
+    assert run("export", "fills", "--db", populated_db) == before
+    assert json.loads(run("stats", ADDRESS, "--db", populated_db))["closed_positions"] == 1
+    with pytest.raises(SystemExit):
+        run("archive", "--db", populated_db)
@@ -0,0 +1,101 @@
+import threading
+import time
+from dataclasses import replace
+
+import pytest
+
+from hyperliquid_monitor.coalesce import FillCoalescer, TokenBucket
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_token_bucket():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.wait_time() == pytest.approx(0.5)
+    clock.now = 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+def test_fills_of_one_order_merged(sample_trade):
+    clock = FakeClock()
+    emitted = []
+    coalescer = FillCoalescer(emitted.append, window=0.1, clock=clock, autostart=False)
+    coalescer.add(replace(sample_trade, size=1.0, price=100.0, fee=0.1, closed_pnl=1.0, order_id=1))
+    coalescer.add(replace(sample_trade, size=3.0, price=104.0, fee=0.3, closed_pnl=2.0, order_id=1))
+    coalescer.add(replace(sample_trade, size=2.0, price=50.0, order_id=2))
+    
+    assert coalescer.flush() == pytest.approx(0.1)
+    assert emitted == []
+    clock.now = 0.1
+    assert coalescer.flush() is None
+    
+    merged, other = emitted
+    assert merged.size == 4.0
+    assert merged.price == pytest.approx(103.0)
+    assert merged.fee == pytest.approx(0.4)
+    assert merged.closed_pnl == pytest.approx(3.0)
+    assert merged.fill_count == 2
+    assert other.size == 2.0 and other.fill_count is None
+    assert coalescer.stats().merged == 1
+
+def test_rate_limit_defers_without_dropping(sample_trade):
+    clock = FakeClock()
+    emitted = []
+    coalescer = FillCoalescer(emitted.append, window=0, rate=1, burst=1, clock=clock, autostart=False)
+    coalescer.add(replace(sample_trade, order_id=1))
+    coalescer.add(replace(sample_trade, order_id=2))
+    coalescer.add(replace(sample_trade, address="0xother", order_id=3))
+    
+    assert coalescer.flush() == pytest.approx(1.0)
+    assert [t.order_id for t in emitted] == [1, 3]
+    # The deferred group keeps absorbing fills of its order
+    coalescer.add(replace(sample_trade, order_id=2))
+    clock.now = 1.0
+    coalescer.flush()
+    assert [t.order_id for t in emitted] == [1, 3, 2]
+    assert emitted[-1].fill_count == 2
+    assert coalescer.stats().deferred == 1
+
+def test_close_emits_pending(sample_trade):
+    emitted = []
+    coalescer = FillCoalescer(emitted.append, window=60)
+    coalescer.add(replace(sample_trade, trade_type="ORDER_PLACED"))
+    coalescer.add(replace(sample_trade, trade_type="ORDER_PLACED"))
+    coalescer.close()
+    assert len(emitted) == 2
+    coalescer.add(sample_trade)
+    assert len(emitted) == 2
+
+def test_max_pending_drops_oldest(sample_trade):
+    emitted = []
+    coalescer = FillCoalescer(emitted.append, window=60, autostart=False, max_pending=2)
+    for order_id in range(4):
+        coalescer.add(replace(sample_trade, order_id=order_id))
+    coalescer.close()
+    assert [t.order_id for t in emitted] == [2, 3]
+    assert coalescer.stats().dropped == 2
+
+def test_rate_limited_address_does_not_delay_others(sample_trade):
+    emitted = threading.Event()
+    
+    def emit(trade):
+        if trade.address == "0xfree":
+            emitted.set()
+    
+    coalescer = FillCoalescer(emit, window=0.01, rate=0.2, burst=1)
+    coalescer.add(replace(sample_trade, order_id=1))
+    coalescer.add(replace(sample_trade, order_id=2))
+    time.sleep(0.1)  # Order 2 is deferred: the thread now waits 5 seconds for a token
+    
+    coalescer.add(replace(sample_trade, address="0xfree", order_id=3))
+    assert emitted.wait(1)
+    coalescer.close()
+
@@ -147,4 +147,222 @@ def test_database_connection_thread_safety(temp_db_path):
     assert len(connections) == 2
     assert connections[0] != connections[1]
     
-    db.close()
\ No newline at end of file
+    db.close()
+
+def test_store_fill_records_oid_and_tid(temp_db_path, sample_fill_data):
+    db = TradeDatabase(temp_db_path)
+    fill_id = db.store_fill({**sample_fill_data, "address": "0x123..."})
+    
+    cursor = db.conn.cursor()
+    cursor.execute("SELECT id, oid, tid FROM fills")
+    assert cursor.fetchone() == (fill_id, 12345, 67890)
+    
+    db.close()
+
+def test_fills_table_migrated_with_oid_and_tid(temp_db_path):
+    import sqlite3
+    conn = sqlite3.connect(temp_db_path)
+    conn.execute("CREATE TABLE fills (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp DATETIME, address TEXT)")
+    conn.commit()
+    conn.close()
+    
+    db = TradeDatabase(temp_db_path)
+    cursor = db.conn.cursor()
+    cursor.execute("PRAGMA table_info(fills)")
+    columns = [row[1] for row in cursor.fetchall()]
+    assert "oid" in columns
+    assert "tid" in columns
+    db.close()
+
+def test_order_lifecycle_partial_then_filled(temp_db_path, sample_order_data, sample_fill_data):
+    db = TradeDatabase(temp_db_path)
+    address = "0x123..."
+    db.store_order({**sample_order_data, "address": address}, "placed")
+    
+    state = db.get_order_state(address, 54321)
+    assert state["status"] == "OPEN"
+    assert state["filled_size"] == 0
+    assert [o["oid"] for o in db.get_open_orders(address)] == [54321]
+    
+    fill = {**sample_fill_data, "address": address, "coin": "BTC", "oid": 54321, "sz": "0.04",
+            "time": sample_order_data["time"] + 2000}
+    db.store_fill(fill)
+    state = db.get_order_state(address, 54321)
+    assert state["status"] == "PARTIALLY_FILLED"
+    assert abs(state["filled_size"] - 0.04) < 1e-9
+    assert len(db.get_open_orders(address, "BTC")) == 1
+    
+    db.store_fill({**fill, "sz": "0.06", "tid": 67891, "time": fill["time"] + 1000})
+    state = db.get_order_state(address, 54321)
+    assert state["status"] == "FILLED"
+    assert state["first_fill_time"] < state["last_fill_time"]
+    assert db.get_open_orders(address) == []
+    
+    stats = db.get_order_stats(address)
+    assert stats["placed"] == 1
+    assert stats["filled"] == 1
+    assert stats["fill_ratio"] == 1.0
+    assert abs(stats["avg_fill_latency_seconds"] - 2.0) < 0.01
+    
+    db.close()
+
+def test_order_lifecycle_cancel(temp_db_path, sample_order_data):
+    db = TradeDatabase(temp_db_path)
+    address = "0x123..."
+    db.store_order({**sample_order_data, "address": address}, "placed")
+    canceled = {"coin": "BTC", "time": sample_order_data["time"] + 500,
+                "canceled": sample_order_data["placed"], "address": address}
+    db.store_order(canceled, "canceled")
+    
+    state = db.get_order_state(address, 54321)
+    assert state["status"] == "CANCELED"
+    assert state["canceled_time"] is not None
+    assert db.get_open_orders(address) == []
+    assert db.get_order_stats(address)["cancel_ratio"] == 1.0
+    
+    db.close()
+
+def test_fill_without_placement_creates_filled_order(temp_db_path, sample_fill_data):
+    db = TradeDatabase(temp_db_path)
+    db.store_fill({**sample_fill_data, "address": "0x123..."})
+    
+    state = db.get_order_state("0x123...", 12345)
+    assert state["status"] == "FILLED"
+    assert state["size"] is None
+    assert state["placed_time"] is None
+    
+    db.close()
+
+def test_fills_keyset_pagination(temp_db_path, sample_fill_data):
+    from datetime import datetime
+    db = TradeDatabase(temp_db_path)
+    address = "0x123..."
+    for i in range(25):
+        coin = "ETH" if i % 2 == 0 else "BTC"
+        db.store_fill({**sample_fill_data, "address": address, "coin": coin, "tid": i,
+                       "time": sample_fill_data["time"] + i * 1000})
+    
+    tids, cursor = [], None
+    while True:
+        page = db.get_fills_page(address, cursor=cursor, limit=10)
+        tids.extend(fill["tid"] for fill in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert tids == list(range(24, -1, -1))
+    
+    streamed = [fill["tid"] for fill in db.iter_fills(address, coin="ETH", fetch_size=3)]
+    assert streamed == list(range(0, 25, 2))
+    
+    start = datetime.fromtimestamp((sample_fill_data["time"] + 5000) / 1000)
+    end = datetime.fromtimestamp((sample_fill_data["time"] + 10000) / 1000)
+    assert [fill["tid"] for fill in db.iter_fills(address, start=start, end=end)] == [5, 6, 7, 8, 9]
+    
+    # Resuming a stream from a page cursor continues in the same direction
+    first = db.get_fills_page(address, limit=5, descending=False)
+    assert [fill["tid"] for fill in db.iter_fills(address, cursor=first.next_cursor)][:2] == [5, 6]
+    db.close()
+
+def test_orders_pagination(temp_db_path, sample_order_data):
+    db = TradeDatabase(temp_db_path)
+    for i in range(7):
+        db.store_order({**sample_order_data, "address": "0x123...", "time": sample_order_data["time"] + i,
+                        "placed": {**sample_order_data["placed"], "oid": i}}, "placed")
+    
+    page = db.get_orders_page("0x123...", limit=4)
+    assert [order["order_id"] for order in page.items] == [6, 5, 4, 3]
+    rest = db.get_orders_page("0x123...", cursor=page.next_cursor, limit=4)
+    assert [order["order_id"] for order in rest.items] == [2, 1, 0]
+    assert rest.next_cursor is None
+    assert [order["action"] for order in db.iter_orders("0x123...", coin="BTC")] == ["placed"] * 7
+    
+    with pytest.raises(ValueError):
+        db.get_orders_page("0x123...", cursor="garbage")
+    db.close()
+
+def test_account_events_deduplicated(temp_db_path):
+    db = TradeDatabase(temp_db_path)
+    cursor = db.conn.cursor()
+    funding = {"address": "0x1", "time": 1699457400000, "coin": "ETH", "usdc": "-0.5",
+               "szi": "2.0", "fundingRate": "0.00001"}
+    update = {"address": "0x1", "time": 1699457400000, "hash": "0xabc",
+              "delta": {"type": "withdraw", "usdc": "10.0", "fee": "1.0"}}
+    liquidation = {"address": "0x1", "time": 1699457400000, "lid": 3, "liquidator": "0xliq"}
+    
+    assert db.insert_funding(cursor, funding)
+    assert not db.insert_funding(cursor, funding)
+    assert db.insert_funding(cursor, {**funding, "coin": "BTC"})
+    assert db.insert_ledger_update(cursor, update)
+    assert not db.insert_ledger_update(cursor, update)
+    assert db.insert_liquidation(cursor, liquidation)
+    assert not db.insert_liquidation(cursor, liquidation)
+    db.conn.commit()
+    
+    assert db.get_funding_summary("0x1") == {"ETH": -0.5, "BTC": -0.5}
+    assert [f["coin"] for f in db.get_funding_payments("0x1", coin="BTC")] == ["BTC"]
+    assert db.get_ledger_updates("0x1")[0]["details"] == update["delta"]
+    assert db.get_liquidations("0x1")[0]["liquidator"] == "0xliq"
+    db.close()
+
+def test_derived_fill_columns_and_largest_fills(temp_db_path, sample_fill_data):
+    db = TradeDatabase(temp_db_path)
+    for i, size in enumerate([0.5, 3.0, 1.0, 2.0]):
+        db.store_fill({**sample_fill_data, "address": "0x123...", "tid": i, "sz": str(size)})
+    
+    fill = db.get_recent_fills("0x123...", limit=1)[0]
+    assert fill["notional"] == 2.0 * 1850.5
+    assert fill["net_pnl"] == 100.25 - 1.5
+    assert [f["tid"] for f in db.get_largest_fills("0x123...", limit=3)] == [1, 3, 2]
+    assert [f["tid"] for f in db.get_largest_fills("0x123...", min_notional=3000)] == [1, 3]
+    
+    plan = " ".join(str(row) for row in db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM fills WHERE address = ? ORDER BY notional DESC LIMIT 5", ("0x123...",)))
+    assert "idx_fills_address_notional" in plan
+    db.close()
+
+def test_derived_fill_columns_backfilled(temp_db_path):
+    import sqlite3
+    conn = sqlite3.connect(temp_db_path)
+    conn.execute('''
+    CREATE TABLE fills (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp DATETIME, address TEXT, coin TEXT,
+                        side TEXT, size REAL, price REAL, direction TEXT, tx_hash TEXT, fee REAL, fee_token TEXT,
+                        start_position REAL, closed_pnl REAL, oid INTEGER, tid INTEGER)
+    ''')
+    conn.execute("INSERT INTO fills (address, size, price, fee, closed_pnl) VALUES ('0x1', 2.0, 10.0, 0.5, 3.0)")
+    conn.commit()
+    conn.close()
+    
+    db = TradeDatabase(temp_db_path)
+    assert db.conn.execute("SELECT notional, net_pnl FROM fills").fetchone() == (20.0, 2.5)
+    db.close()
+
+def test_network_keyed_tables_rebuilt(temp_db_path):
+    import sqlite3
+    conn = sqlite3.connect(temp_db_path)
+    conn.execute('''
+    CREATE TABLE funding_payments (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp DATETIME, address TEXT,
+                                   coin TEXT, usdc REAL, size REAL, funding_rate REAL,
+                                   UNIQUE (address, coin, timestamp))
+    ''')
+    conn.execute("INSERT INTO funding_payments (timestamp, address, coin, usdc) "
+                 "VALUES ('2023-11-08 15:30:00', '0x1', 'ETH', -0.5)")
+    conn.commit()
+    conn.close()
+    
+    db = TradeDatabase(temp_db_path)
+    cursor = db.conn.cursor()
+    funding = {"address": "0x1", "time": 1699457400000, "coin": "ETH", "usdc": "-0.25"}
+    assert not db.insert_funding(cursor, funding)
+    assert db.insert_funding(cursor, {**funding, "network": "testnet"})
+    db.conn.commit()
+    
+    # The row recorded before networks were tracked is mainnet's
+    assert sorted((f["network"], f["usdc"]) for f in db.get_funding_payments("0x1")) == [
+        ("mainnet", -0.5), ("testnet", -0.25)]
+    assert db.get_funding_summary("0x1", "testnet") == {"ETH": -0.25}
+    
+    plan = " ".join(str(row) for row in db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM fills WHERE network = ? AND address = ? ORDER BY timestamp",
+        ("testnet", "0x1")))
+    assert "idx_fills_network_address_timestamp" in plan
+    db.close()
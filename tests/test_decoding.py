@@ -0,0 +1,80 @@
+import json
+import subprocess
+import sys
+import pytest
+from hyperliquid_monitor import decoding
+from hyperliquid_monitor.decoding import DecodeError, FillRecord, OrderUpdateRecord
+
+@pytest.fixture
+def user_fills_message(sample_fill_data):
+    return json.dumps({
+        "channel": "userFills",
+        "data": {"isSnapshot": False, "user": "0x123...", "fills": [sample_fill_data]}
+    })
+
+def _assert_fill(fill):
+    assert fill.coin == "ETH"
+    assert fill.px == 1850.5
+    assert fill.sz == 0.5
+    assert fill.time == 1699457400000
+    assert fill.startPosition == -10.5
+    assert fill.oid == 12345
+    assert fill.tid == 67890
+
+def test_decode_user_fills(user_fills_message):
+    message = decoding.decode_message(user_fills_message)
+    
+    assert message["channel"] == "userFills"
+    assert message["data"]["user"] == "0x123..."
+    _assert_fill(message["data"]["fills"][0])
+
+def test_decode_with_stdlib_backend(user_fills_message):
+    # Run in a fresh interpreter where the optional backends can't be imported
+    script = (
+        "import sys; sys.modules['orjson'] = None; sys.modules['msgspec'] = None\n"
+        "from hyperliquid_monitor import decoding\n"
+        "fill = decoding.decode_message(sys.stdin.read())['data']['fills'][0]\n"
+        "print(decoding.BACKEND, fill.to_dict()['px'], fill.oid)"
+    )
+    result = subprocess.run([sys.executable, "-c", script], input=user_fills_message,
+                            capture_output=True, text=True, check=True)
+    
+    assert result.stdout.split() == ["json", "1850.5", "12345"]
+
+def test_decode_order_updates(sample_order_data):
+    raw = json.dumps({"channel": "user", "data": {"orderUpdates": [sample_order_data]}})
+    
+    update = decoding.decode_message(raw)["data"]["orderUpdates"][0]
+    
+    assert isinstance(update, OrderUpdateRecord)
+    assert update.action == "placed"
+    assert update.to_dict() == {
+        "coin": "BTC", "time": 1699457400000,
+        "placed": {"side": "B", "px": 35000.5, "sz": 0.1, "oid": 54321}
+    }
+
+def test_non_fill_messages_pass_through():
+    assert decoding.decode_message('{"channel":"pong"}') == {"channel": "pong"}
+
+@pytest.mark.parametrize("change", [{"side": "X"}, {"px": "not-a-number"}, {"coin": None}])
+def test_invalid_fills_rejected(sample_fill_data, change):
+    fill = {**sample_fill_data, **change}
+    if change.get("coin", "") is None:
+        del fill["coin"]
+    raw = json.dumps({"channel": "userFills", "data": {"user": "0x123...", "fills": [fill]}})
+    
+    with pytest.raises(DecodeError):
+        decoding.decode_message(raw)
+
+def test_invalid_json_rejected():
+    with pytest.raises(DecodeError, match="Invalid JSON"):
+        decoding.decode_message("{not json")
+
+def test_fill_record_to_dict_omits_missing_fields():
+    record = FillRecord(coin="ETH", px=1.0, sz=2.0, side="A", time=1)
+    
+    fill = record.to_dict()
+    
+    assert fill["px"] == 1.0
+    assert "dir" not in fill
+    assert "oid" not in fill
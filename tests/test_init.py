@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+import pytest
+
+import hyperliquid_monitor
+
+def test_query_imports_do_not_load_sdk():
+    code = (
+        "import sys\n"
+        "from hyperliquid_monitor import TradeDatabase, Trade\n"
+        "import hyperliquid_monitor.position_tracker\n"
+        "assert 'hyperliquid_monitor.monitor' not in sys.modules\n"
+        "assert 'hyperliquid.info' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+def test_lazy_exports():
+    from hyperliquid_monitor.database import TradeDatabase
+    assert hyperliquid_monitor.TradeDatabase is TradeDatabase
+    assert set(hyperliquid_monitor.__all__) <= set(dir(hyperliquid_monitor))
+    with pytest.raises(AttributeError):
+        hyperliquid_monitor.DoesNotExist
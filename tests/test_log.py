@@ -0,0 +1,92 @@
+import io
+import json
+import logging
+
+import pytest
+
+from hyperliquid_monitor.log import RateLimitFilter, SampleFilter, configure_logging, shutdown_logging
+from hyperliquid_monitor.monitor import HyperliquidMonitor
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    yield stream
+    shutdown_logging()
+    for name in ("hyperliquid_monitor", "hyperliquid_monitor.monitor"):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+def test_json_lines_with_extra_fields(log_stream):
+    configure_logging("INFO", stream=log_stream, asynchronous=False)
+    logging.getLogger("hyperliquid_monitor.monitor").warning("Error %s", "boom", extra={"address": "0x1"})
+    
+    entry, = _lines(log_stream)
+    assert entry["level"] == "WARNING"
+    assert entry["logger"] == "hyperliquid_monitor.monitor"
+    assert entry["message"] == "Error boom"
+    assert entry["address"] == "0x1"
+
+def test_per_module_levels_and_async_handler(log_stream):
+    configure_logging("WARNING", levels={"hyperliquid_monitor.monitor": "DEBUG"}, stream=log_stream)
+    logging.getLogger("hyperliquid_monitor.monitor").debug("kept")
+    logging.getLogger("hyperliquid_monitor.database").info("dropped")
+    shutdown_logging()  # Writes out the queue
+    
+    assert [entry["message"] for entry in _lines(log_stream)] == ["kept"]
+
+def test_async_handler_keeps_exception_field(log_stream):
+    configure_logging("INFO", stream=log_stream)
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logging.getLogger("hyperliquid_monitor.monitor").exception("Error %s", "boom", extra={"address": "0x1"})
+    shutdown_logging()
+    
+    entry, = _lines(log_stream)
+    assert entry["message"] == "Error boom"
+    assert entry["address"] == "0x1"
+    assert "ZeroDivisionError" in entry["exc_info"]
+
+def test_rate_limit_reports_suppressed():
+    now = [0.0]
+    rate_limit = RateLimitFilter(rate=1, burst=2, clock=lambda: now[0])
+    records = [logging.makeLogRecord({"name": "x", "msg": "Error %s", "levelno": logging.ERROR})
+               for _ in range(5)]
+    assert [rate_limit.filter(record) for record in records] == [True, True, False, False, False]
+    # Below the level nothing is limited
+    assert rate_limit.filter(logging.makeLogRecord({"name": "x", "msg": "Error %s", "levelno": logging.INFO}))
+    
+    now[0] = 1.0
+    record = logging.makeLogRecord({"name": "x", "msg": "Error %s", "levelno": logging.ERROR})
+    assert rate_limit.filter(record)
+    assert record.suppressed == 3
+
+def test_sampling():
+    sample = SampleFilter(every=3)
+    records = [logging.makeLogRecord({"name": "x", "msg": "tick", "levelno": logging.DEBUG}) for _ in range(7)]
+    assert [sample.filter(record) for record in records] == [True, False, False, True, False, False, True]
+
+def test_disabled_debug_logging_creates_no_records(mocker, sample_fill_data, log_stream):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    configure_logging("WARNING", stream=log_stream, asynchronous=False)
+    monitor = HyperliquidMonitor(["0x123..."])
+    handler = monitor.create_event_handler("0x123...")
+    make_record = mocker.spy(logging.Logger, "makeRecord")
+    
+    for tid in range(10):
+        handler({"data": {"fills": [{**sample_fill_data, "tid": tid}]}})
+    assert make_record.call_count == 0
+    
+    handler({"data": {"fills": [{**sample_fill_data, "tid": 99, "px": "not a number"}]}})
+    entry, = _lines(log_stream)
+    assert entry["message"] == "Error processing fill"
+    assert entry["address"] == "0x123..."
+    assert "exc_info" in entry
+    monitor.stop()
+
+def test_library_writes_nothing_without_configuration():
+    handlers = logging.getLogger("hyperliquid_monitor").handlers
+    assert any(isinstance(handler, logging.NullHandler) for handler in handlers)
+
@@ -0,0 +1,95 @@
+import gc
+import tracemalloc
+
+import pytest
+
+from hyperliquid_monitor.memory import MemoryMonitor, rss_bytes
+from hyperliquid_monitor.monitor import HyperliquidMonitor
+
+ADDRESSES = [f"0x{i:040x}" for i in range(10)]
+
+def test_report_tracks_growth_of_allocation_sites():
+    reports = []
+    monitor = MemoryMonitor(interval=3600, top=5, on_report=reports.append)
+    monitor.start()
+    try:
+        monitor.report()
+        leak = [bytearray(1000) for _ in range(1000)]
+        report = monitor.report()
+    finally:
+        monitor.stop()
+
+    assert not tracemalloc.is_tracing()
+    assert len(reports) == 2
+    assert report.traced_bytes >= 1000 * 1000
+    biggest = report.top[0]
+    assert "test_memory.py" in biggest.location
+    assert biggest.size_diff >= 1000 * 1000
+    del leak
+
+def test_report_without_tracing():
+    report = MemoryMonitor().report()
+    assert report.top == []
+    assert report.traced_bytes == 0
+    if rss_bytes() is not None:
+        assert report.rss_bytes > 0
+
+def _stream(handlers, start, count, base_time):
+    """Fills, order updates and funding spread over simulated time, 2.5 seconds apart"""
+    for i in range(start, start + count):
+        address = ADDRESSES[i % len(ADDRESSES)]
+        time_ms = base_time + i * 2500
+        opening = (i // len(ADDRESSES)) % 2 == 0
+        handlers[address]({"data": {
+            "fills": [{"coin": "ETH", "px": "1850.5", "sz": "0.5", "side": "B", "time": time_ms,
+                       "dir": "Open Long" if opening else "Close Long", "closedPnl": "0" if opening else "1.5",
+                       "hash": f"0x{i:x}", "oid": i, "tid": i, "fee": "0.1", "feeToken": "USDC"}],
+            "orderUpdates": [{"coin": "BTC", "time": time_ms,
+                              "placed" if opening else "canceled": {"px": "35000", "sz": "0.1", "side": "B",
+                                                                     "oid": i - len(ADDRESSES) * (not opening)}}],
+            "funding": {"time": time_ms, "coin": "ETH", "usdc": "-0.01", "szi": "0.5", "fundingRate": "0.0001"}
+        }})
+
+def test_soak_memory_stays_flat(temp_db_path):
+    """Hours of simulated activity on bounded structures: memory stops growing after warm-up"""
+    trades = []
+    monitor = HyperliquidMonitor(ADDRESSES, db_path=temp_db_path, callback=trades.append,
+                                 dedup_window=50, write_queue_size=1000, coalesce_window=60,
+                                 callback_rate=0.001, max_pending_callbacks=500)
+    handlers = {address: monitor.create_event_handler(address) for address in ADDRESSES}
+    base_time = 1699457400000
+    block = 800  # Fills per block: 2000 seconds of simulated time
+
+    tracemalloc.start()
+    try:
+        _stream(handlers, 0, block, base_time)
+        monitor.writer.flush()
+        gc.collect()
+        traced_before = tracemalloc.get_traced_memory()[0]
+        rss_before = rss_bytes()
+
+        for n in range(1, 6):  # Another ~2.8 hours
+            _stream(handlers, n * block, block, base_time)
+        monitor.writer.flush()
+        gc.collect()
+        traced_growth = tracemalloc.get_traced_memory()[0] - traced_before
+        rss_after = rss_bytes()
+    finally:
+        tracemalloc.stop()
+        monitor.stop()
+
+    assert monitor.coalescer.stats().dropped > 0
+    assert monitor.order_book.order_count() <= len(ADDRESSES)
+    assert traced_growth < 512 * 1024
+    if rss_before is not None:
+        assert rss_after - rss_before < 16 * 1024 * 1024
+
+def test_monitor_memory_report(temp_db_path):
+    monitor = HyperliquidMonitor(ADDRESSES, db_path=temp_db_path, silent=True, memory_report_interval=3600)
+    monitor.memory.start()
+    report = monitor.memory_report()
+    monitor.stop()
+    assert report.traced_bytes > 0
+    assert not tracemalloc.is_tracing()
+    with pytest.raises(ValueError):
+        MemoryMonitor(interval=0)
@@ -0,0 +1,133 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+from hyperliquid_monitor.database import TradeDatabase
+from hyperliquid_monitor.merge import ShardMerger
+from hyperliquid_monitor.position_tracker import SNAPSHOT_FILL_ID, Position, PositionTracker
+
+class Node:
+    """A monitor node's database, written the way the monitor writes it"""
+    def __init__(self, path):
+        self.path = str(path)
+        self.db = TradeDatabase(self.path)
+        self.tracker = PositionTracker(self.path)
+    
+    def ingest(self, fill):
+        fill_id = self.db.store_fill(fill)
+        self.tracker.process_fill(fill, fill_id)
+
+def _fill(sample_fill_data, tid, **overrides):
+    return {**sample_fill_data, "address": "0x123...", "tid": tid,
+            "time": sample_fill_data["time"] + tid * 1000, **overrides}
+
+@pytest.fixture
+def nodes(tmp_path):
+    return Node(tmp_path / "node1.db"), Node(tmp_path / "node2.db")
+
+def _count(path, table):
+    conn = sqlite3.connect(path)
+    count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.close()
+    return count
+
+def _open_positions(path):
+    return len(PositionTracker(path).get_open_positions("0x123..."))
+
+def test_merge_dedups_and_remaps(tmp_path, nodes, sample_fill_data, sample_order_data):
+    node1, node2 = nodes
+    # node2 also saw the first fill, then an unrelated one that shifts its ids
+    node2.db.store_fill(_fill(sample_fill_data, 99, coin="BTC", dir="Buy"))
+    for node in nodes:
+        node.ingest(_fill(sample_fill_data, 1))
+    node1.ingest(_fill(sample_fill_data, 2, dir="Close Long", closedPnl="5.0"))
+    node1.db.store_order({**sample_order_data, "address": "0x123..."}, "placed")
+    node2.db.store_order({**sample_order_data, "address": "0x123..."}, "placed")
+    
+    target = str(tmp_path / "central.db")
+    merger = ShardMerger(target, [node1.path, node2.path], batch_size=2)
+    stats = merger.run()
+    
+    assert _count(target, "fills") == 3
+    assert stats[node1.path].fills_inserted + stats[node2.path].fills_inserted == 3
+    assert stats[node1.path].fills_duplicate + stats[node2.path].fills_duplicate == 1
+    assert _count(target, "orders") == 1
+    assert _count(target, "order_states") == 2  # The placed order and the filled one
+    
+    central = PositionTracker(target)
+    history = central.get_position_history("0x123...")
+    assert len(history) == 1
+    assert history[0]["pnl"] == 5.0
+    conn = sqlite3.connect(target)
+    entry_tid, exit_tid = conn.execute('''
+    SELECT e.tid, x.tid FROM positions p
+    JOIN fills e ON e.id = p.entry_fill_id JOIN fills x ON x.id = p.exit_fill_id
+    ''').fetchone()
+    conn.close()
+    assert (entry_tid, exit_tid) == (1, 2)
+    merger.close()
+
+def test_merge_is_incremental(tmp_path, nodes, sample_fill_data):
+    node1, node2 = nodes
+    node1.ingest(_fill(sample_fill_data, 1))
+    target = str(tmp_path / "central.db")
+    
+    merger = ShardMerger(target, [node1.path, node2.path])
+    merger.run()
+    assert _open_positions(target) == 1
+    
+    # The position merged while open gets its close on the next run
+    node1.ingest(_fill(sample_fill_data, 2, dir="Close Long", closedPnl="-3.0"))
+    stats = ShardMerger(target, [node1.path, node2.path]).run()
+    
+    assert stats[node1.path].fills_read == 1
+    assert stats[node1.path].positions_closed == 1
+    assert _open_positions(target) == 0
+    assert _count(target, "fills") == 2
+
+def test_seeded_positions_merged(tmp_path, nodes, sample_fill_data):
+    node1 = nodes[0]
+    seeded = Position("0x123...", "ETH", "LONG", 0.5, 1800.0, datetime(2023, 11, 8, 15), SNAPSHOT_FILL_ID)
+    node1.tracker.seed_positions(node1.db.conn.cursor(), {"0x123...": [seeded]})
+    node1.db.conn.commit()
+    node1.tracker.reload(["0x123..."])
+    target = str(tmp_path / "central.db")
+    
+    stats = ShardMerger(target, [node1.path]).run()
+    assert stats[node1.path].positions_inserted == 1
+    assert stats[node1.path].positions_skipped == 0
+    assert _open_positions(target) == 1
+    
+    node1.ingest(_fill(sample_fill_data, 1, dir="Close Long", closedPnl="2.0"))
+    stats = ShardMerger(target, [node1.path]).run()
+    assert stats[node1.path].positions_inserted == 0
+    assert stats[node1.path].positions_closed == 1
+    history = PositionTracker(target).get_position_history("0x123...")
+    assert [(p["entry_price"], p["pnl"]) for p in history] == [(1800.0, 2.0)]
+
+def test_target_cannot_be_source(nodes):
+    with pytest.raises(ValueError):
+        ShardMerger(nodes[0].path, [nodes[0].path])
+
+def test_archive_keeps_unmerged_rows(tmp_path, nodes, sample_fill_data):
+    from hyperliquid_monitor.archive import archive_history
+
+    node1 = nodes[0]
+    node1.ingest(_fill(sample_fill_data, 1))
+    node1.ingest(_fill(sample_fill_data, 2, dir="Close Long", closedPnl="1.0"))
+    target = str(tmp_path / "central.db")
+    cutoff = datetime(2030, 1, 1)
+
+    # Nothing merged yet: nothing archived
+    assert archive_history(node1.path, cutoff, merged_into=target).rows == {}
+
+    ShardMerger(target, [node1.path]).run()
+    node1.ingest(_fill(sample_fill_data, 3))
+    report = archive_history(node1.path, cutoff, merged_into=target)
+    assert report.rows == {"fills": 2, "positions": 1}
+    assert _count(node1.path, "fills") == 1  # The fill merged after is kept for the merger
+
+    stats = ShardMerger(target, [node1.path]).run()
+    assert stats[node1.path].fills_inserted == 1
+    assert _count(target, "fills") == 3
+    assert _open_positions(target) == 1
@@ -111,4 +111,176 @@ def test_stop_monitor():
     assert not monitor._stop_event.is_set()
     
     monitor.stop()
-    assert monitor._stop_event.is_set()
\ No newline at end of file
+    assert monitor._stop_event.is_set()
+
+def test_order_book_seeded_and_updated(mocker, sample_order_data):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    snapshot = [{"coin": "ETH", "limitPx": "1850.0", "oid": 7, "side": "A", "sz": "1.0", "timestamp": 1699457400000}]
+    monitor = HyperliquidMonitor(["0x123..."], open_orders_source=lambda address: snapshot)
+    monitor.seed_order_book()
+    assert [o.oid for o in monitor.get_open_orders("0x123...")] == [7]
+    
+    handler = monitor.create_event_handler("0x123...")
+    handler({"data": {"orderUpdates": [sample_order_data]}})
+    handler({"data": {"fills": [{"coin": "ETH", "oid": 7, "sz": "1.0", "px": "1850.0", "time": 1699457402000}]}})
+    
+    assert [o.oid for o in monitor.get_open_orders("0x123...")] == [54321]
+    assert monitor.get_open_orders("0x123...", "ETH") == []
+
+def test_alert_rules_evaluated_in_silent_mode(mocker, sample_fill_data, temp_db_path):
+    from hyperliquid_monitor.alerts import AlertRule
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    alert_callback = Mock()
+    monitor = HyperliquidMonitor(
+        ["0x123..."],
+        db_path=temp_db_path,
+        silent=True,
+        alert_rules=[AlertRule(name="big", condition="fill_notional_above", threshold=900)],
+        alert_callback=alert_callback
+    )
+    
+    handler = monitor.create_event_handler("0x123...")
+    handler({"data": {"fills": [sample_fill_data]}})
+    
+    assert alert_callback.call_count == 1
+    assert alert_callback.call_args[0][0].rule.name == "big"
+
+def test_bus_subscribers_in_silent_mode(mocker, sample_fill_data, temp_db_path):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    monitor = HyperliquidMonitor(["0x123..."], db_path=temp_db_path, silent=True)
+    received = []
+    monitor.subscribe("fills", received.append, name="dashboard")
+    
+    handler = monitor.create_event_handler("0x123...")
+    handler({"data": {"fills": [sample_fill_data]}})
+    monitor.stop()
+    
+    assert [trade.coin for trade in received] == ["ETH"]
+    assert monitor.bus.metrics()["dashboard"].delivered == 1
+
+def test_handler_accepts_decoded_records(mocker, sample_fill_data, sample_order_data, temp_db_path):
+    from hyperliquid_monitor.decoding import FillRecord, OrderUpdateRecord, parse_fill, parse_order_update
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    # Records go through every stage as they are, without a round trip through dicts
+    mocker.patch.object(FillRecord, "to_dict", side_effect=AssertionError)
+    mocker.patch.object(OrderUpdateRecord, "to_dict", side_effect=AssertionError)
+    callback = Mock()
+    monitor = HyperliquidMonitor(["0x123..."], callback=callback, db_path=temp_db_path)
+    
+    handler = monitor.create_event_handler("0x123...")
+    handler({"data": {"fills": [parse_fill(sample_fill_data)],
+                      "orderUpdates": [parse_order_update(sample_order_data)]}})
+    monitor.writer.flush()
+    
+    fill = monitor.db.get_recent_fills("0x123...")[0]
+    assert (fill["coin"], fill["size"], fill["tid"]) == ("ETH", 0.5, sample_fill_data["tid"])
+    assert monitor.db.get_order_state("0x123...", 54321)["status"] == "OPEN"
+    assert [p["side"] for p in monitor.position_tracker.get_open_positions("0x123...")] == ["LONG"]
+    monitor.stop()
+    
+    fill_trade, order_trade = [c[0][0] for c in callback.call_args_list]
+    assert fill_trade.coin == "ETH"
+    assert fill_trade.side == "BUY"
+    assert abs(fill_trade.closed_pnl - 100.25) < 0.001
+    assert order_trade.trade_type == "ORDER_PLACED"
+    assert order_trade.order_id == 54321
+
+def test_fills_written_by_writer_thread(mocker, sample_fill_data, temp_db_path):
+    import threading
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    monitor = HyperliquidMonitor(["0x1", "0x2"], db_path=temp_db_path, silent=True)
+    
+    def ingest(address):
+        handler = monitor.create_event_handler(address)
+        for i in range(20):
+            base = {**sample_fill_data, "tid": i, "time": sample_fill_data["time"] + i * 2000}
+            handler({"data": {"fills": [base]}})
+            handler({"data": {"fills": [{**base, "dir": "Close Long", "tid": 100 + i,
+                                         "time": base["time"] + 1000}]}})
+    
+    threads = [threading.Thread(target=ingest, args=(address,)) for address in ("0x1", "0x2")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    monitor.writer.flush()
+    
+    for address in ("0x1", "0x2"):
+        assert len(monitor.db.get_recent_fills(address, limit=100)) == 40
+        assert monitor.position_tracker.get_open_positions(address) == []
+        assert len(monitor.position_tracker.get_position_history(address, limit=100)) == 20
+    assert monitor.writer.metrics().errors == 0
+    monitor.stop()
+
+def test_position_cache_invalidated_on_commit(mocker, sample_fill_data, temp_db_path):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    monitor = HyperliquidMonitor(["0x123..."], db_path=temp_db_path, silent=True)
+    handler = monitor.create_event_handler("0x123...")
+    
+    assert monitor.position_tracker.get_open_positions("0x123...") == []
+    handler({"data": {"fills": [sample_fill_data]}})
+    monitor.writer.flush()
+    
+    assert len(monitor.position_tracker.get_open_positions("0x123...")) == 1
+    monitor.stop()
+
+def test_account_events_stored_deduplicated_and_folded_into_pnl(mocker, sample_fill_data, temp_db_path):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    monitor = HyperliquidMonitor(["0x123..."], db_path=temp_db_path, silent=True)
+    events = []
+    monitor.subscribe("account_events", events.append, synchronous=True)
+    handler = monitor.create_event_handler("0x123...")
+    
+    handler({"data": {"fills": [sample_fill_data]}})
+    funding = {"time": sample_fill_data["time"] + 3600000, "coin": "ETH", "usdc": "-1.25",
+               "szi": "0.5", "fundingRate": "0.0001"}
+    handler({"data": {"funding": funding}})
+    # The same payment again on userFundings, in the info endpoint's shape
+    handler({"data": {"user": "0x123...", "isSnapshot": True, "fundings": [
+        {"time": funding["time"], "hash": "0x0", "delta": {"type": "funding", **funding}}
+    ]}})
+    handler({"data": {"liquidation": {"lid": 7, "liquidator": "0xliq", "liquidated_user": "0x123...",
+                                      "liquidated_ntl_pos": "925.25", "liquidated_account_value": "50.0"}}})
+    handler({"data": {"user": "0x123...", "isSnapshot": False, "nonFundingLedgerUpdates": [
+        {"time": sample_fill_data["time"], "hash": "0xdep", "delta": {"type": "deposit", "usdc": "1000.0"}}
+    ]}})
+    handler({"data": {"fills": [{**sample_fill_data, "dir": "Close Long", "tid": 2,
+                                 "time": funding["time"] + 1000}]}})
+    monitor.writer.flush()
+    
+    assert [e.event_type for e in events] == ["FUNDING", "LIQUIDATION", "LEDGER"]
+    assert events[0].usdc == -1.25 and events[0].coin == "ETH"
+    assert monitor.db.get_funding_summary("0x123...") == {"ETH": -1.25}
+    assert len(monitor.db.get_funding_payments("0x123...")) == 1
+    assert monitor.db.get_liquidations("0x123...")[0]["lid"] == 7
+    assert monitor.db.get_ledger_updates("0x123...", "deposit")[0]["usdc"] == 1000.0
+    
+    closed = monitor.position_tracker.get_position_history("0x123...")[0]
+    assert closed["funding"] == -1.25
+    assert closed["fees"] == 2 * float(sample_fill_data["fee"])  # Entry and exit fills
+    assert closed["net_pnl"] == closed["pnl"] - 1.25 - closed["fees"]
+    stats = monitor.position_tracker.get_position_stats("0x123...")
+    assert stats["total_funding"] == -1.25
+    assert stats["net_pnl"] == stats["total_pnl"] - 1.25 - stats["total_fees"]
+    monitor.stop()
+
+def test_callback_receives_coalesced_fills(mocker, sample_fill_data):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    trades = []
+    monitor = HyperliquidMonitor(["0x123..."], callback=trades.append, coalesce_window=60)
+    handler = monitor.create_event_handler("0x123...")
+    for tid in range(5):
+        handler({"data": {"fills": [{**sample_fill_data, "tid": tid}]}})
+    monitor.stop()
+    
+    assert len(trades) == 1
+    assert trades[0].fill_count == 5
+    assert trades[0].size == pytest.approx(2.5)
+
+def test_info_created_on_first_use(mocker):
+    info = mocker.patch("hyperliquid_monitor.monitor.Info")
+    monitor = HyperliquidMonitor(["0x123..."])
+    assert not info.called
+    assert monitor.info is info.return_value
+    assert monitor.info is info.return_value
+    assert info.call_count == 1
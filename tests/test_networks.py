@@ -0,0 +1,104 @@
+import sqlite3
+
+import pytest
+
+from hyperliquid_monitor.monitor import HyperliquidMonitor
+from hyperliquid_monitor.networks import NETWORKS, MultiNetworkMonitor, network_url
+from hyperliquid_monitor.position_tracker import position_stats
+from hyperliquid_monitor.profiling import StageTimings
+
+ADDRESS = "0x123..."
+
+def test_network_url():
+    assert network_url("mainnet") == "https://api.hyperliquid.xyz"
+    assert network_url("testnet") == NETWORKS["testnet"]
+    assert network_url("devnet", "http://127.0.0.1:3001/") == "http://127.0.0.1:3001"
+    with pytest.raises(ValueError):
+        network_url("devnet")
+    with pytest.raises(ValueError):
+        HyperliquidMonitor([ADDRESS], network="devnet")
+
+def test_networks_isolated_in_shared_database(mocker, temp_db_path, sample_fill_data):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    timings = StageTimings()
+    mainnet = HyperliquidMonitor([ADDRESS], db_path=temp_db_path, silent=True, timings=timings)
+    testnet = HyperliquidMonitor([ADDRESS], db_path=temp_db_path, silent=True, network="testnet", timings=timings)
+    trades = []
+    testnet.subscribe("fills", trades.append, synchronous=True)
+
+    # The same address and trade id on both networks are different fills
+    mainnet.create_event_handler(ADDRESS)({"data": {"fills": [{**sample_fill_data, "tid": 1}]}})
+    handler = testnet.create_event_handler(ADDRESS)
+    handler({"data": {"fills": [{**sample_fill_data, "tid": 1}]}})
+    handler({"data": {"funding": {"time": sample_fill_data["time"] + 1000, "coin": "ETH", "usdc": "-1.0",
+                                  "szi": "0.5", "fundingRate": "0.0001"}}})
+    handler({"data": {"fills": [{**sample_fill_data, "tid": 2, "dir": "Close Long",
+                                 "time": sample_fill_data["time"] + 2000}]}})
+    mainnet.writer.flush()
+    testnet.writer.flush()
+
+    assert [trade.network for trade in trades] == ["testnet", "testnet"]
+    db = mainnet.db
+    assert len(db.get_recent_fills(ADDRESS)) == 3
+    assert [f["tid"] for f in db.get_recent_fills(ADDRESS, network="mainnet")] == [1]
+    assert [(f["tid"], f["network"]) for f in db.get_recent_fills(ADDRESS, network="testnet")] == [
+        (2, "testnet"), (1, "testnet")]
+    assert db.get_funding_summary(ADDRESS, "mainnet") == {}
+    assert db.get_funding_summary(ADDRESS, "testnet") == {"ETH": -1.0}
+    assert db.get_order_state(ADDRESS, sample_fill_data["oid"], "mainnet")["filled_size"] == 0.5
+
+    assert [p["side"] for p in mainnet.position_tracker.get_open_positions(ADDRESS)] == ["LONG"]
+    assert testnet.position_tracker.get_open_positions(ADDRESS) == []
+    assert testnet.position_tracker.get_position_history(ADDRESS)[0]["funding"] == -1.0
+    assert mainnet.position_tracker.get_position_history(ADDRESS) == []
+    conn = sqlite3.connect(temp_db_path)
+    assert position_stats(conn, ADDRESS, network="testnet")["closed_positions"] == 1
+    assert position_stats(conn, ADDRESS, network="mainnet")["closed_positions"] == 0
+    conn.close()
+
+    # Both monitors recorded into the shared timings
+    assert mainnet.get_stage_timings()["normalize"].count == 3
+    mainnet.stop()
+    testnet.stop()
+
+    # Restarting reads back only the network's own processed fills: tid 2 is new on mainnet
+    restarted = HyperliquidMonitor([ADDRESS], db_path=temp_db_path, silent=True)
+    restarted.restore_state()
+    handler = restarted.create_event_handler(ADDRESS)
+    handler({"data": {"fills": [{**sample_fill_data, "tid": tid} for tid in (1, 2)]}})
+    restarted.writer.flush()
+    assert [f["tid"] for f in restarted.db.get_recent_fills(ADDRESS, network="mainnet")] == [2, 1]
+    restarted.stop()
+
+def test_multi_network_monitor(mocker, temp_db_path, tmp_path, sample_fill_data):
+    info = mocker.patch("hyperliquid_monitor.monitor.Info")
+    monitor = MultiNetworkMonitor({"mainnet": [ADDRESS], "testnet": [ADDRESS, "0x456..."]},
+                                  db_path=temp_db_path, api_urls={"testnet": "http://127.0.0.1:3002"},
+                                  checkpoint_path=str(tmp_path / "state.json"),
+                                  silent=True, open_orders_source=lambda address: [])
+    testnet = monitor.monitors["testnet"]
+    assert testnet.api_url == "http://127.0.0.1:3002"
+    assert testnet.checkpoint_path == str(tmp_path / "state.testnet.json")
+    assert testnet.timings is monitor.timings is monitor.monitors["mainnet"].timings
+    trades = []
+    assert len(monitor.subscribe("fills", trades.append, synchronous=True)) == 2
+
+    monitor.start_pipelines()
+    assert sorted(call.args[0] for call in info.call_args_list) == ["http://127.0.0.1:3002", NETWORKS["mainnet"]]
+    # Four subscriptions per address
+    assert info.return_value.subscribe.call_count == 4 * 3
+
+    for network, tid in (("mainnet", 1), ("testnet", 2)):
+        monitor.monitors[network].create_event_handler(ADDRESS)({"data": {"fills": [{**sample_fill_data, "tid": tid}]}})
+    assert [(trade.network, trade.size) for trade in trades] == [("mainnet", 0.5), ("testnet", 0.5)]
+    for network_monitor in monitor.monitors.values():
+        network_monitor.writer.flush()
+    metrics = monitor.writer_metrics()
+    assert sorted(metrics) == ["mainnet", "testnet"]
+    assert all(m.jobs >= 1 and m.errors == 0 for m in metrics.values())
+    monitor.stop()
+
+    assert (tmp_path / "state.mainnet.json").exists()
+    assert (tmp_path / "state.testnet.json").exists()
+    with pytest.raises(ValueError):
+        MultiNetworkMonitor({})
@@ -0,0 +1,58 @@
+import pytest
+from hyperliquid_monitor.order_book import OrderBook
+
+@pytest.fixture
+def open_orders_snapshot():
+    """Resting orders in the openOrders info format"""
+    return [
+        {"coin": "BTC", "limitPx": "35000.5", "oid": 1, "side": "B", "sz": "0.1", "timestamp": 1699457400000},
+        {"coin": "ETH", "limitPx": "1850.0", "oid": 2, "side": "A", "sz": "2.0", "timestamp": 1699457401000},
+    ]
+
+def test_seed_from_snapshot(open_orders_snapshot):
+    book = OrderBook()
+    book.seed("0x123...", open_orders_snapshot)
+    
+    assert book.order_count("0x123...") == 2
+    assert [o.oid for o in book.get_open_orders("0x123...", "ETH")] == [2]
+    order = book.get_order("0x123...", 1)
+    assert order.coin == "BTC"
+    assert order.side == "SELL"
+    assert order.price == 35000.5
+
+def test_seed_replaces_existing_book(open_orders_snapshot):
+    book = OrderBook()
+    book.seed("0x123...", open_orders_snapshot)
+    book.seed("0x123...", open_orders_snapshot[:1])
+    
+    assert book.order_count("0x123...") == 1
+    assert book.get_order("0x123...", 2) is None
+
+def test_placed_and_canceled_updates(sample_order_data):
+    book = OrderBook()
+    book.apply_order_update(sample_order_data, "0x123...")
+    assert book.get_order("0x123...", 54321).size == 0.1
+    
+    book.apply_order_update({"coin": "BTC", "canceled": {"oid": 54321}}, "0x123...")
+    assert book.get_order("0x123...", 54321) is None
+    assert book.get_open_orders("0x123...") == []
+
+def test_fills_reduce_and_remove_orders(open_orders_snapshot):
+    book = OrderBook()
+    book.seed("0x123...", open_orders_snapshot)
+    
+    before = book.get_order("0x123...", 2)
+    book.apply_fill({"oid": 2, "sz": "0.5"}, "0x123...")
+    assert book.get_order("0x123...", 2).size == 1.5
+    assert book.get_order("0x123...", 2).orig_size == 2.0
+    # Reads are copies, later fills don't change them
+    assert before.size == 2.0
+    
+    book.apply_fill({"oid": 2, "sz": "1.5"}, "0x123...")
+    assert book.get_order("0x123...", 2) is None
+    assert book.get_open_orders("0x123...", "ETH") == []
+
+def test_fill_for_unknown_order_is_ignored():
+    book = OrderBook()
+    book.apply_fill({"oid": 99, "sz": "1"}, "0x123...")
+    assert book.order_count() == 0
@@ -0,0 +1,89 @@
+import pytest
+from datetime import datetime
+from hyperliquid_monitor.monitor import HyperliquidMonitor
+from hyperliquid_monitor.portfolio import PortfolioTracker
+from hyperliquid_monitor.position_tracker import Position
+from hyperliquid_monitor.pricing import PriceCache
+from hyperliquid_monitor.types import AccountEvent
+
+def _position(address, coin, side, size, entry_price):
+    return Position(address, coin, side, size, entry_price, datetime(2023, 11, 8), 1)
+
+def test_net_position_across_addresses():
+    prices = PriceCache()
+    tracker = PortfolioTracker({"fund": ["0xa", "0xb"]}, prices)
+    tracker.on_position_change("open", _position("0xa", "ETH", "LONG", 2.0, 1800.0))
+    tracker.on_position_change("open", _position("0xb", "ETH", "SHORT", 0.5, 1900.0))
+    tracker.on_position_change("open", _position("0xc", "ETH", "LONG", 10.0, 1000.0))
+    prices.update({"ETH": "2000"})
+
+    eth = tracker.get_portfolio("fund")["coins"]["ETH"]
+
+    assert eth["net_size"] == pytest.approx(1.5)
+    assert eth["gross_size"] == pytest.approx(2.5)
+    assert eth["open_positions"] == 2
+    assert eth["avg_entry_price"] == pytest.approx((2.0 * 1800.0 - 0.5 * 1900.0) / 1.5)
+    assert eth["unrealized_pnl"] == pytest.approx(2.0 * 200.0 - 0.5 * 100.0)
+    assert eth["notional"] == pytest.approx(5000.0)
+    assert eth["net_notional"] == pytest.approx(3000.0)
+
+def test_closed_positions_leave_realized_results(sample_trade):
+    tracker = PortfolioTracker({"fund": ["0x123..."]})
+    position = _position("0x123...", "ETH", "LONG", 0.5, 1850.5)
+    tracker.on_position_change("open", position)
+    tracker.on_position_change("close", position)
+    tracker.on_fill(sample_trade)
+    tracker.on_account_event(AccountEvent(datetime(2023, 11, 8), "0x123...", "FUNDING", usdc=-0.25, coin="ETH"))
+
+    portfolio = tracker.get_portfolio("fund")
+
+    assert portfolio["coins"]["ETH"]["net_size"] == 0.0
+    assert portfolio["coins"]["ETH"]["avg_entry_price"] is None
+    assert portfolio["realized_pnl"] == sample_trade.closed_pnl
+    assert portfolio["net_pnl"] == pytest.approx(sample_trade.closed_pnl - sample_trade.fee - 0.25)
+    assert portfolio["unrealized_pnl"] == 0.0
+
+def test_groups_added_later_include_past_activity():
+    tracker = PortfolioTracker()
+    tracker.add_realized("0xa", "BTC", pnl=10.0, fees=1.0)
+    tracker.on_position_change("open", _position("0xa", "BTC", "LONG", 1.0, 30000.0))
+
+    tracker.add_group("fund", ["0xa"])
+    tracker.add_group("other", ["0xa", "0xb"])
+    tracker.add_realized("0xa", "BTC", pnl=5.0)
+
+    assert tracker.get_portfolio("fund")["realized_pnl"] == 15.0
+    assert tracker.get_portfolio("other")["coins"]["BTC"]["net_size"] == 1.0
+    assert tracker.groups() == {"fund": ["0xa"], "other": ["0xa", "0xb"]}
+    tracker.remove_group("fund")
+    with pytest.raises(KeyError):
+        tracker.get_portfolio("fund")
+
+def test_monitor_aggregates_portfolio(mocker, temp_db_path, sample_fill_data):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    monitor = HyperliquidMonitor(["0xa", "0xb"], db_path=temp_db_path, silent=True,
+                                 portfolios={"fund": ["0xa", "0xb"]})
+    monitor.create_event_handler("0xa")({"data": {"fills": [sample_fill_data]}})
+    monitor.create_event_handler("0xb")({"data": {"fills": [{**sample_fill_data, "tid": 1}]}})
+    monitor.writer.flush()
+    monitor._handle_mids({"channel": "allMids", "data": {"mids": {"ETH": "1860.5"}}})
+
+    portfolio = monitor.get_portfolio("fund")
+
+    assert portfolio["coins"]["ETH"]["net_size"] == pytest.approx(1.0)
+    assert portfolio["unrealized_pnl"] == pytest.approx(10.0)
+    assert portfolio["realized_pnl"] == pytest.approx(200.5)
+    assert portfolio["fees"] == pytest.approx(3.0)
+    monitor.stop()
+
+    # A restarted monitor seeds the portfolio from the database
+    restarted = HyperliquidMonitor(["0xa", "0xb"], db_path=temp_db_path, silent=True,
+                                   portfolios={"fund": ["0xa", "0xb"]})
+    restarted.seed_portfolios()
+    portfolio = restarted.get_portfolio("fund")
+    assert portfolio["coins"]["ETH"]["net_size"] == pytest.approx(1.0)
+    assert portfolio["realized_pnl"] == pytest.approx(200.5)
+    restarted.stop()
+
+    with pytest.raises(ValueError):
+        HyperliquidMonitor(["0xa"], portfolios={"fund": ["0xa"]})
@@ -0,0 +1,127 @@
+import pytest
+from hyperliquid_monitor.database import TradeDatabase
+from hyperliquid_monitor.position_tracker import PositionTracker
+
+@pytest.fixture
+def tracker(temp_db_path):
+    TradeDatabase(temp_db_path).close()
+    return PositionTracker(temp_db_path)
+
+def _round_trip(tracker, sample_fill_data, index, coin="ETH", pnl="1.0"):
+    """Open and close a long, returning the closed position info"""
+    opened = {**sample_fill_data, "address": "0x123...", "coin": coin,
+              "time": sample_fill_data["time"] + index * 10000}
+    tracker.process_fill(opened, index * 2)
+    closed = {**opened, "dir": "Close Long", "closedPnl": pnl, "time": opened["time"] + 5000}
+    return tracker.process_fill(closed, index * 2 + 1)
+
+def test_open_and_close_position(tracker, sample_fill_data):
+    info = _round_trip(tracker, sample_fill_data, 0, pnl="12.5")
+    
+    assert info["side"] == "LONG"
+    assert info["duration_seconds"] == 5
+    assert info["pnl"] == 12.5
+    assert tracker.get_open_positions("0x123...") == []
+    assert tracker.get_position_history("0x123...")[0]["pnl"] == 12.5
+
+def test_open_positions_loaded_from_database(tracker, temp_db_path, sample_fill_data):
+    tracker.process_fill({**sample_fill_data, "address": "0x123..."}, 1)
+    
+    # A new tracker picks up the open position left by the previous run
+    restarted = PositionTracker(temp_db_path)
+    closed = {**sample_fill_data, "address": "0x123...", "dir": "Close Long",
+              "time": sample_fill_data["time"] + 60000}
+    info = restarted.process_fill(closed, 2)
+    
+    assert info["duration_seconds"] == 60
+    assert restarted.get_open_positions("0x123...") == []
+
+def test_position_history_pagination(tracker, sample_fill_data):
+    for i in range(12):
+        _round_trip(tracker, sample_fill_data, i, coin="ETH" if i % 3 else "BTC", pnl=str(i))
+    
+    pnls, cursor = [], None
+    while True:
+        page = tracker.get_position_history_page("0x123...", cursor=cursor, limit=5)
+        pnls.extend(position["pnl"] for position in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert pnls == [float(i) for i in range(11, -1, -1)]
+    
+    streamed = list(tracker.iter_position_history("0x123...", coin="BTC", fetch_size=2))
+    assert [position["pnl"] for position in streamed] == [0.0, 3.0, 6.0, 9.0]
+    assert streamed[0]["duration_formatted"] == "5s"
+
+def test_reads_cached_until_invalidated(tracker, sample_fill_data):
+    _round_trip(tracker, sample_fill_data, 0, coin="ETH")
+    _round_trip(tracker, sample_fill_data, 1, coin="BTC")
+    
+    eth = tracker.get_position_history("0x123...", coin="ETH")
+    eth[0]["pnl"] = -1  # Callers get copies
+    assert tracker.get_position_history("0x123...", coin="ETH")[0]["pnl"] == 1.0
+    tracker.get_position_history("0x123...", coin="BTC")
+    tracker.get_open_positions("0x123...")
+    stats = tracker.cache_stats()
+    assert (stats.hits, stats.misses) == (1, 3)
+    
+    # An ETH fill drops the ETH and all-coin reads but keeps the BTC history
+    _round_trip(tracker, sample_fill_data, 2, coin="ETH")
+    assert len(tracker.get_position_history("0x123...", coin="ETH")) == 2
+    assert len(tracker.get_position_history("0x123...", coin="BTC")) == 1
+    stats = tracker.cache_stats()
+    assert (stats.hits, stats.misses) == (2, 4)
+    assert 0 < stats.hit_rate < 1
+
+def test_cache_disabled(temp_db_path, sample_fill_data):
+    tracker = PositionTracker(temp_db_path, cache_size=0)
+    _round_trip(tracker, sample_fill_data, 0)
+    
+    assert len(tracker.get_position_history("0x123...")) == 1
+    assert tracker.cache_stats() is None
+
+def test_derived_position_columns_and_ranking(tracker, sample_fill_data):
+    for i, pnl in enumerate(["5", "-3", "12", "0.5"]):
+        _round_trip(tracker, sample_fill_data, i, pnl=pnl)
+    
+    closed = tracker.get_position_history("0x123...")[0]
+    fee = float(sample_fill_data["fee"])
+    assert closed["notional"] == 0.5 * 1850.5
+    assert closed["fees"] == 2 * fee
+    assert closed["net_pnl"] == 0.5 - 2 * fee
+    assert closed["duration_seconds"] == 5
+    
+    best = tracker.get_ranked_positions("0x123...", limit=2)
+    assert [p["pnl"] for p in best] == [12.0, 5.0]
+    worst = tracker.get_ranked_positions("0x123...", limit=1, descending=False)
+    assert worst[0]["net_pnl"] == -3.0 - 2 * fee
+    assert tracker.get_position_stats("0x123...")["net_pnl"] == pytest.approx(14.5 - 8 * fee)
+    with pytest.raises(ValueError):
+        tracker.get_ranked_positions("0x123...", by="pnl * 2")
+
+def test_derived_position_columns_backfilled(temp_db_path):
+    import sqlite3
+    conn = sqlite3.connect(temp_db_path)
+    conn.execute("CREATE TABLE fills (id INTEGER PRIMARY KEY, fee REAL)")
+    conn.execute("INSERT INTO fills VALUES (1, 0.25), (2, 0.5)")
+    conn.execute('''
+    CREATE TABLE positions (id INTEGER PRIMARY KEY AUTOINCREMENT, address TEXT NOT NULL, coin TEXT NOT NULL,
+                            side TEXT NOT NULL, size REAL NOT NULL, entry_price REAL NOT NULL,
+                            entry_time DATETIME NOT NULL, entry_fill_id INTEGER NOT NULL, exit_price REAL,
+                            exit_time DATETIME, exit_fill_id INTEGER, duration_seconds INTEGER, pnl REAL,
+                            status TEXT DEFAULT 'OPEN', created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                            funding REAL DEFAULT 0)
+    ''')
+    conn.execute('''
+    INSERT INTO positions (address, coin, side, size, entry_price, entry_time, entry_fill_id, exit_fill_id,
+                           exit_time, pnl, funding, status)
+    VALUES ('0x1', 'ETH', 'LONG', 2.0, 100.0, '2023-11-08 15:30:00', 1, 2, '2023-11-08 16:30:00', 10.0, -1.0,
+            'CLOSED')
+    ''')
+    conn.commit()
+    conn.close()
+    
+    PositionTracker(temp_db_path)
+    conn = sqlite3.connect(temp_db_path)
+    assert conn.execute("SELECT notional, fees, net_pnl FROM positions").fetchone() == (200.0, 0.75, 8.25)
+    conn.close()
@@ -0,0 +1,74 @@
+import pytest
+from datetime import datetime
+from hyperliquid_monitor.monitor import HyperliquidMonitor
+from hyperliquid_monitor.position_tracker import Position
+from hyperliquid_monitor.pricing import MarkToMarket, PriceCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+def _position(address, coin, side, size, entry_price):
+    return Position(address, coin, side, size, entry_price, datetime(2023, 11, 8), 1)
+
+def test_price_cache_reports_changes():
+    prices = PriceCache()
+    assert prices.update({"ETH": "1850.5", "BTC": "35000"}) == {"ETH", "BTC"}
+    assert prices.update({"ETH": "1850.5", "BTC": "35001", "BAD": "x"}) == {"BTC"}
+    assert prices.get("BTC") == 35001.0
+    assert prices.get("BAD") is None
+    assert len(prices) == 2
+
+def test_unrealized_pnl_from_aggregates():
+    clock = FakeClock()
+    mtm = MarkToMarket(PriceCache(clock), min_interval=1.0, clock=clock)
+    long_eth = _position("0x1", "ETH", "LONG", 2.0, 1800.0)
+    mtm.on_position_change("open", long_eth)
+    mtm.on_position_change("open", _position("0x1", "ETH", "SHORT", 1.0, 1900.0))
+    mtm.on_position_change("open", _position("0x1", "BTC", "LONG", 0.1, 30000.0))
+    mtm.on_position_change("open", _position("0x2", "ETH", "LONG", 1.0, 2000.0))
+    
+    assert mtm.on_prices({"ETH": "1850", "BTC": "31000"})
+    pnl = mtm.get_unrealized("0x1")
+    # ETH: long 2 @ 1800 (+100), short 1 @ 1900 (+50); BTC: +100
+    assert pnl["coins"]["ETH"]["unrealized_pnl"] == pytest.approx(150.0)
+    assert pnl["coins"]["ETH"]["notional"] == pytest.approx(3 * 1850.0)
+    assert pnl["unrealized_pnl"] == pytest.approx(250.0)
+    assert mtm.get_unrealized("0x2")["unrealized_pnl"] == pytest.approx(-150.0)
+    
+    mtm.on_position_change("close", long_eth)
+    assert mtm.get_unrealized("0x1")["coins"]["ETH"]["unrealized_pnl"] == pytest.approx(50.0)
+
+def test_ticks_throttled():
+    clock = FakeClock()
+    mtm = MarkToMarket(PriceCache(clock), min_interval=1.0, clock=clock)
+    mtm.on_position_change("open", _position("0x1", "ETH", "LONG", 1.0, 1800.0))
+    
+    assert mtm.on_prices({"ETH": "1850"})
+    clock.now = 0.5
+    assert not mtm.on_prices({"ETH": "1860"})
+    assert mtm.stats().throttled == 1
+    clock.now = 1.0
+    assert mtm.on_prices({"ETH": "1870"})
+    assert mtm.get_unrealized("0x1")["unrealized_pnl"] == pytest.approx(70.0)
+    assert mtm.stats().revaluations == 2
+
+def test_monitor_marks_open_positions(mocker, temp_db_path, sample_fill_data):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    monitor = HyperliquidMonitor(["0x123..."], db_path=temp_db_path, silent=True, mark_to_market=True)
+    monitor.create_event_handler("0x123...")({"data": {"fills": [sample_fill_data]}})
+    monitor.writer.flush()
+    
+    monitor._handle_mids({"channel": "allMids", "data": {"mids": {"ETH": "1860.5"}}})
+    
+    assert monitor.get_unrealized_pnl("0x123...")["unrealized_pnl"] == pytest.approx(5.0)
+    position = monitor.get_open_positions("0x123...")[0]
+    assert position["mark_price"] == 1860.5
+    assert position["unrealized_pnl"] == pytest.approx(5.0)
+    monitor.stop()
+    
+    with pytest.raises(ValueError):
+        HyperliquidMonitor(["0x123..."], mark_to_market=True)
@@ -0,0 +1,85 @@
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from hyperliquid_monitor.monitor import HyperliquidMonitor
+from hyperliquid_monitor.profiling import SamplingProfiler, StageTimings, write_collapsed
+
+def test_stage_timings():
+    timings = StageTimings()
+    started = time.perf_counter_ns()
+    started = timings.record("normalize", started - 2000)
+    timings.record("normalize", started - 1000)
+    with timings.span("callback"):
+        pass
+
+    stats = timings.snapshot()
+
+    assert stats["normalize"].count == 2
+    assert stats["normalize"].max_seconds >= 2e-6
+    assert stats["normalize"].avg_us >= 1.5
+    assert stats["callback"].count == 1
+    timings.reset()
+    assert timings.snapshot() == {}
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_sampler_writes_collapsed_stacks(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    path = str(tmp_path / "profile.collapsed")
+    done = []
+    try:
+        profiler.start(0.2, path, on_done=done.append)
+        with pytest.raises(RuntimeError):
+            profiler.start(0.2, path)
+        profiler.join()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert done == [path]
+    assert not profiler.running
+    lines = open(path).read().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy and all("test_profiling.py:_busy_loop" in line for line in busy)
+    assert not any(line.startswith("sampling-profiler;") for line in lines)
+
+def test_write_collapsed_orders_by_count(tmp_path):
+    from collections import Counter
+    path = str(tmp_path / "out.collapsed")
+    write_collapsed(Counter({"main;a": 1, "main;a;b": 3}), path)
+    assert open(path).read() == "main;a;b 3\nmain;a 1\n"
+
+def test_monitor_stage_timings_and_profile(mocker, temp_db_path, sample_fill_data, sample_order_data, tmp_path):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    monitor = HyperliquidMonitor(["0x123..."], db_path=temp_db_path, callback=lambda trade: None,
+                                 profile_dir=str(tmp_path), profile_seconds=0.05)
+    handler = monitor.create_event_handler("0x123...")
+    handler({"data": {"fills": [sample_fill_data], "orderUpdates": [sample_order_data]}})
+    monitor.writer.flush()
+
+    stats = monitor.get_stage_timings()
+
+    assert stats["normalize"].count == 2
+    assert stats["position"].count == 1
+    assert stats["db_write"].count == 2
+    assert stats["callback"].count == 2
+    assert stats["db_commit"].count >= 1
+
+    if hasattr(signal, "SIGUSR1"):
+        monitor._handle_profile_signal()
+        monitor._handle_profile_signal()  # Already running: logged, not raised
+        monitor.profiler.join()
+        profiles = list(tmp_path.glob("profile-*.collapsed"))
+        assert len(profiles) == 1 and os.path.getsize(profiles[0]) > 0
+    monitor.stop()
@@ -0,0 +1,128 @@
+import io
+import json
+
+import pytest
+
+from hyperliquid_monitor.alerts import AlertRule
+from hyperliquid_monitor.cli import main
+from hyperliquid_monitor.database import TradeDatabase
+from hyperliquid_monitor.position_tracker import PositionTracker
+from hyperliquid_monitor.replay import Replayer, fill_from_row, iter_database_fills, replay
+
+ADDRESSES = ["0xaaa", "0xbbb", "0xccc"]
+
+@pytest.fixture
+def history_db(tmp_path, sample_fill_data):
+    """Each address opens a position every two minutes and closes one every other time"""
+    path = str(tmp_path / "history.db")
+    db = TradeDatabase(path)
+    tracker = PositionTracker(path)
+    for i in range(12):
+        address = ADDRESSES[i % len(ADDRESSES)]
+        fill = {**sample_fill_data, "address": address, "tid": i, "time": sample_fill_data["time"] + i * 120000,
+                "dir": "Open Long" if (i // len(ADDRESSES)) % 2 == 0 else "Close Long"}
+        tracker.process_fill(fill, db.store_fill(fill))
+    db.close()
+    return path
+
+def _positions(db_path):
+    db = TradeDatabase(db_path)
+    rows = db.conn.execute(
+        "SELECT address, coin, side, size, entry_price, status FROM positions ORDER BY address, entry_time"
+    ).fetchall()
+    db.close()
+    return rows
+
+def test_row_round_trips_to_websocket_fill(sample_fill_data):
+    row = {"timestamp": "2023-11-08 15:30:00", "address": "0xaaa", "coin": "ETH", "side": "BUY", "size": 0.5,
+           "price": 1850.5, "direction": "Open Long", "tx_hash": "0x1", "fee": "", "fee_token": "USDC",
+           "start_position": "0", "closed_pnl": "1.5", "oid": "7", "tid": "8"}
+
+    address, fill, network = fill_from_row(row)
+
+    assert (address, network) == ("0xaaa", "mainnet")
+    assert fill["side"] == "A"  # Stored fills map "A" to BUY
+    assert (fill["oid"], fill["tid"], fill["fee"]) == (7, 8, "0")
+    assert fill_from_row({**sample_fill_data, "address": "0xaaa"})[1] == sample_fill_data
+
+def test_replay_rebuilds_positions(history_db, tmp_path):
+    report = replay(str(tmp_path / "replay.db"), source_db=history_db)
+
+    assert report.fills == 12
+    assert report.addresses == 3
+    assert report.positions_closed == 6
+    assert report.fills_per_second > 0
+    assert (report.end - report.start).total_seconds() == 11 * 120
+    assert _positions(str(tmp_path / "replay.db")) == _positions(history_db)
+
+def test_alert_windows_follow_virtual_clock(history_db, tmp_path):
+    rule = AlertRule(name="big", condition="fill_notional_above", threshold=100, address="0xaaa",
+                     cooldown_seconds=300)
+    fills = list(iter_database_fills(history_db))
+
+    report = Replayer(str(tmp_path / "replay.db"), [rule]).run(fills)
+
+    # 0xaaa fills every 6 minutes of history, so the 5 minute cooldown never suppresses one,
+    # however fast the replay runs
+    assert report.alerts == {"big": 4}
+
+def test_parallel_replay_from_exported_files(history_db, tmp_path):
+    exported = tmp_path / "fills.csv"
+    out = io.StringIO()
+    main(["export", "fills", "--db", history_db, "--format", "csv"], out=out)
+    exported.write_text(out.getvalue())
+    target = str(tmp_path / "replay.db")
+
+    out = io.StringIO()
+    assert main(["replay", str(exported), "--db", target, "--workers", "2"], out=out) == 0
+    report = json.loads(out.getvalue())
+
+    assert report["fills"] == 12
+    assert report["workers"] == 2
+    assert report["positions_closed"] == 6
+    assert _positions(target) == _positions(history_db)
+    assert not list(tmp_path.glob("replay-*.db"))
+
+def test_replay_keeps_networks_apart(tmp_path, sample_fill_data):
+    # The same address and trade ids on two networks: open and close on testnet, only open on mainnet
+    path = str(tmp_path / "history.db")
+    db = TradeDatabase(path)
+    for network, dirs in (("mainnet", ["Open Long"]), ("testnet", ["Open Long", "Close Long"])):
+        tracker = PositionTracker(path, network=network)
+        for i, direction in enumerate(dirs):
+            fill = {**sample_fill_data, "address": "0xaaa", "tid": i, "dir": direction, "network": network,
+                    "time": sample_fill_data["time"] + i * 1000}
+            tracker.process_fill(fill, db.store_fill(fill))
+    db.close()
+    target = str(tmp_path / "replay.db")
+
+    report = replay(target, source_db=path)
+
+    assert (report.fills, report.addresses, report.positions_closed) == (3, 1, 1)
+    db = TradeDatabase(target)
+    assert [f["tid"] for f in db.get_recent_fills("0xaaa", network="testnet")] == [1, 0]
+    assert [f["tid"] for f in db.get_recent_fills("0xaaa", network="mainnet")] == [0]
+    positions = db.conn.execute("SELECT network, status FROM positions ORDER BY network").fetchall()
+    db.close()
+    assert positions == [("mainnet", "OPEN"), ("testnet", "CLOSED")]
+    assert replay(str(tmp_path / "testnet.db"), source_db=path, network="testnet").fills == 2
+
+def test_replay_rejects_source_as_target(history_db):
+    with pytest.raises(ValueError):
+        replay(history_db, source_db=history_db)
+    with pytest.raises(ValueError):
+        replay("out.db")
+
+def test_replay_refuses_target_with_history(history_db, tmp_path):
+    target = str(tmp_path / "replay.db")
+    replay(target, source_db=history_db)
+    positions = _positions(target)
+
+    with pytest.raises(ValueError, match="already holds"):
+        replay(target, source_db=history_db)
+    with pytest.raises(SystemExit, match="already holds"):
+        main(["replay", "--from-db", history_db, "--db", target])
+    assert _positions(target) == positions
+
+    assert replay(target, source_db=history_db, fresh=True).fills == 12
+    assert _positions(target) == positions
@@ -0,0 +1,83 @@
+import json
+import socket
+import urllib.error
+import urllib.request
+import pytest
+from hyperliquid_monitor.monitor import HyperliquidMonitor
+
+@pytest.fixture
+def served_monitor(mocker, temp_db_path):
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    monitor = HyperliquidMonitor(["0x123..."], db_path=temp_db_path, open_orders_source=lambda a: [])
+    server = monitor.serve(port=0)
+    yield monitor, f"http://127.0.0.1:{server.port}"
+    monitor.stop()
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+def test_fills_cached_and_invalidated_on_ingest(served_monitor, sample_fill_data):
+    monitor, base = served_monitor
+    handler = monitor.create_event_handler("0x123...")
+    
+    assert _get(f"{base}/fills?address=0x123...") == []
+    assert _get(f"{base}/fills?address=0x123...") == []
+    assert monitor.server.cache.stats().hits == 1
+    
+    handler({"data": {"fills": [sample_fill_data]}})
+    monitor.writer.flush()
+    fills = _get(f"{base}/fills?address=0x123...")
+    
+    assert [fill["tid"] for fill in fills] == [67890]
+
+def test_positions_history_and_stats(served_monitor, sample_fill_data):
+    monitor, base = served_monitor
+    handler = monitor.create_event_handler("0x123...")
+    handler({"data": {"fills": [sample_fill_data]}})
+    close = {**sample_fill_data, "dir": "Close Long", "time": sample_fill_data["time"] + 60000,
+             "closedPnl": "12.5", "tid": 67891}
+    handler({"data": {"fills": [close]}})
+    monitor.writer.flush()
+    
+    assert _get(f"{base}/positions?address=0x123...") == []
+    history = _get(f"{base}/history?address=0x123...&limit=5")
+    assert history[0]["pnl"] == 12.5
+    assert history[0]["duration"] == 60.0
+    stats = _get(f"{base}/stats?address=0x123...")
+    assert stats["positions"]["closed_positions"] == 1
+    assert stats["orders"]["placed"] == 0
+
+def test_orders_from_order_book(served_monitor, sample_order_data):
+    monitor, base = served_monitor
+    monitor.create_event_handler("0x123...")({"data": {"orderUpdates": [sample_order_data]}})
+    
+    orders = _get(f"{base}/orders?address=0x123...")
+    
+    assert [order["oid"] for order in orders] == [54321]
+
+def test_errors(served_monitor):
+    _, base = served_monitor
+    with pytest.raises(urllib.error.HTTPError) as missing:
+        _get(f"{base}/fills")
+    assert missing.value.code == 400
+    with pytest.raises(urllib.error.HTTPError) as unknown:
+        _get(f"{base}/unknown?address=0x123...")
+    assert unknown.value.code == 404
+
+def test_stream_pushes_events(served_monitor, sample_fill_data):
+    monitor, base = served_monitor
+    port = int(base.rsplit(":", 1)[1])
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(b"GET /stream?address=0x123... HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        received = b""
+        while b"\r\n\r\n" not in received:
+            received += sock.recv(4096)
+        
+        monitor.create_event_handler("0x123...")({"data": {"fills": [sample_fill_data]}})
+        while b"\n\n" not in received.split(b"\r\n\r\n", 1)[1]:
+            received += sock.recv(4096)
+    
+    event = received.split(b"\r\n\r\n", 1)[1].decode()
+    assert event.startswith("event: fills\ndata: ")
+    assert json.loads(event.split("data: ", 1)[1])["coin"] == "ETH"
@@ -0,0 +1,159 @@
+import sqlite3
+import threading
+import pytest
+from hyperliquid_monitor.writer import DatabaseWriter
+
+@pytest.fixture
+def writer(temp_db_path):
+    conn = sqlite3.connect(temp_db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER UNIQUE)")
+    conn.close()
+    writer = DatabaseWriter(temp_db_path, batch_size=50)
+    yield writer
+    writer.close()
+
+def _insert(value):
+    def job(cursor):
+        cursor.execute("INSERT INTO items (value) VALUES (?)", (value,))
+        return cursor.lastrowid
+    return job
+
+def _values(db_path):
+    conn = sqlite3.connect(db_path)
+    values = [row[0] for row in conn.execute("SELECT value FROM items ORDER BY id")]
+    conn.close()
+    return values
+
+def test_jobs_committed_in_order(writer, temp_db_path):
+    futures = [writer.submit(_insert(i)) for i in range(200)]
+    writer.flush(5)
+    
+    assert [f.result() for f in futures] == list(range(1, 201))
+    assert _values(temp_db_path) == list(range(200))
+    metrics = writer.metrics()
+    assert metrics.jobs == 201  # Including the flush job
+    assert metrics.batches <= metrics.jobs
+    assert metrics.max_batch <= 50
+
+def test_failing_job_rolled_back_alone(temp_db_path, writer):
+    errors = []
+    writer._on_error = errors.append
+    writer.submit(_insert(1))
+    duplicate = writer.submit(_insert(1))
+    writer.submit(_insert(2))
+    writer.flush(5)
+    
+    with pytest.raises(sqlite3.IntegrityError):
+        duplicate.result()
+    assert _values(temp_db_path) == [1, 2]
+    assert len(errors) == 1
+    assert writer.metrics().errors == 1
+
+def test_commit_listener_receives_keys(writer):
+    committed = []
+    writer.add_commit_listener(committed.append)
+    writer.submit(_insert(1), key=("0x1", "ETH"))
+    writer.submit(_insert(2), key=("0x2", "BTC"))
+    writer.flush(5)
+    
+    assert set().union(*committed) == {("0x1", "ETH"), ("0x2", "BTC")}
+    writer.remove_commit_listener(committed.append)
+
+def test_concurrent_producers(writer, temp_db_path):
+    def produce(start):
+        for i in range(start, start + 100):
+            writer.submit(_insert(i))
+    
+    threads = [threading.Thread(target=produce, args=(n * 100,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.flush(5)
+    
+    assert sorted(_values(temp_db_path)) == list(range(400))
+
+def test_close_drains_queue(temp_db_path):
+    conn = sqlite3.connect(temp_db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER UNIQUE)")
+    conn.close()
+    writer = DatabaseWriter(temp_db_path)
+    for i in range(100):
+        writer.submit(_insert(i))
+    writer.close()
+    
+    assert len(_values(temp_db_path)) == 100
+    with pytest.raises(RuntimeError):
+        writer.submit(_insert(1000))
+
+def _fail_commits(mocker) -> threading.Event:
+    """Make the writer's COMMIT fail while the returned event is set"""
+    fail_commit = threading.Event()
+
+    class FailingCursor(sqlite3.Cursor):
+        def execute(self, sql, *args):
+            if sql == "COMMIT" and fail_commit.is_set():
+                raise sqlite3.OperationalError("database or disk is full")
+            return super().execute(sql, *args)
+
+    class FailingConnection(sqlite3.Connection):
+        def cursor(self, factory=FailingCursor):
+            return super().cursor(factory)
+
+    connect = sqlite3.connect
+    mocker.patch("hyperliquid_monitor.writer.sqlite3.connect",
+                 side_effect=lambda *args, **kwargs: connect(*args, factory=FailingConnection, **kwargs))
+    return fail_commit
+
+def test_failed_commit_fails_batch_and_writer_keeps_running(mocker, temp_db_path):
+    conn = sqlite3.connect(temp_db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER UNIQUE)")
+    conn.close()
+    fail_commit = _fail_commits(mocker)
+    errors = []
+    writer = DatabaseWriter(temp_db_path, on_error=errors.append)
+    fail_commit.set()
+    lost = writer.submit(_insert(1))
+    with pytest.raises(sqlite3.OperationalError):
+        writer.flush(5)
+    with pytest.raises(sqlite3.OperationalError):
+        lost.result(0)
+    assert errors and writer.metrics().errors >= 1
+
+    # The writer survived: later batches commit, nothing of the failed one did
+    fail_commit.clear()
+    assert writer.submit(_insert(2)).result(5) is not None
+    writer.close()
+    assert _values(temp_db_path) == [2]
+
+def test_failed_commit_rolls_back_monitor_state(mocker, temp_db_path, sample_fill_data):
+    from hyperliquid_monitor.monitor import HyperliquidMonitor
+    mocker.patch("hyperliquid_monitor.monitor.Info")
+    fail_commit = _fail_commits(mocker)
+    monitor = HyperliquidMonitor(["0xa", "0xb"], db_path=temp_db_path, silent=True)
+    fill_a = monitor.create_event_handler("0xa")
+    fill_b = monitor.create_event_handler("0xb")
+    opening = {**sample_fill_data, "tid": 1, "dir": "Open Long"}
+    
+    fail_commit.set()
+    fill_a({"data": {"fills": [opening]}})
+    with pytest.raises(sqlite3.OperationalError):
+        monitor.writer.flush(5)
+    fail_commit.clear()
+    
+    # The rolled back position id is handed out again, to 0xb's position
+    fill_b({"data": {"fills": [{**sample_fill_data, "coin": "BTC", "tid": 2, "dir": "Open Long",
+                                "time": opening["time"] + 1000}]}})
+    # The lost fill is re-sent (as in the next subscription snapshot) and applied this time
+    fill_a({"data": {"fills": [opening]}})
+    fill_a({"data": {"fills": [{**opening, "tid": 3, "dir": "Close Long", "time": opening["time"] + 2000}]}})
+    monitor.writer.flush(5)
+    
+    conn = sqlite3.connect(temp_db_path)
+    assert conn.execute("SELECT id, address, coin, status FROM positions ORDER BY id").fetchall() == [
+        (1, "0xb", "BTC", "OPEN"), (2, "0xa", "ETH", "CLOSED")]
+    assert [row[0] for row in conn.execute("SELECT tid FROM fills ORDER BY tid")] == [1, 2, 3]
+    conn.close()
+    assert [p.id for p in monitor.position_tracker.persisted_positions()["0xb"]] == [1]
+    assert monitor.position_tracker.persisted_positions()["0xa"] == []
+    monitor.stop()